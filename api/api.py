@@ -70,6 +70,8 @@ localisations = [
     {"name": "Ellipsoid Parametric (Mean)", "id": "ellipsoid-parametric-mean"},
     {"name": "Ellipsoid Parametric (Min)", "id": "ellipsoid-parametric-min"},
     {"name": "Spherical Intersection", "id": "spherical-intersection"},
+    {"name": "Least Squares (Levenberg-Marquardt)", "id": "least-squares"},
+    {"name": "Ensemble (All Methods, Fused)", "id": "ensemble"},
 ]
 
 adsbs = [
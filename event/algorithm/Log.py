@@ -0,0 +1,69 @@
+import logging
+import logging.handlers
+import queue
+
+ROOT = "3lips"
+
+
+def get_logger(name):
+    """Logger for a part of the event service, under the 3lips root logger."""
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+class Sampler:
+    """Lets through one in every `every` calls, for per-object debug messages.
+
+    Usage: `if logger.isEnabledFor(logging.DEBUG) and sample(): logger.debug(...)`,
+    so nothing is counted or formatted while debug logging is off.
+    """
+
+    every = 1  # shared default, set by configure_logging
+
+    def __init__(self, every=None):
+        """Create a sampler.
+
+        Args:
+            every: Keep one call in this many, or None for the shared default
+        """
+        if every is not None:
+            self.every = every
+        self.count = 0
+
+    def __call__(self):
+        keep = self.count % max(1, self.every) == 0
+        self.count += 1
+        return keep
+
+
+def configure_logging(level="INFO", queued=False, sample_every=1):
+    """Send 3lips log records to stderr.
+
+    Args:
+        level: Level name or number for the 3lips root logger
+        queued: Hand records to a background thread that writes them, so the
+            event loop does not block on the stream
+        sample_every: Default Sampler rate for per-object messages
+
+    Returns:
+        The started QueueListener when queued, to be stopped on exit, otherwise None.
+    """
+    logger = logging.getLogger(ROOT)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    Sampler.every = sample_every
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    if not queued:
+        logger.addHandler(handler)
+        return None
+
+    records = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    listener = logging.handlers.QueueListener(records, handler)
+    listener.start()
+    return listener
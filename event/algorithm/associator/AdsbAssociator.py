@@ -3,12 +3,16 @@
 """
 
 import math
-import os
 
 import requests
+from algorithm.Log import get_logger
+from data.RadarGeometry import RadarGeometry
+from data.RadarRegistry import RadarRegistry
 
 from .Associator import Associator
 
+logger = get_logger("associator")
+
 
 class AdsbAssociator(Associator):
     """@class AdsbAssociator
@@ -21,8 +25,11 @@ class AdsbAssociator(Associator):
     @todo Add adjustable window for associating truth/detections.
     """
 
-    def __init__(self):
-        """@brief Constructor for the AdsbAssociator class."""
+    def __init__(self, registry=None):
+        """@brief Constructor for the AdsbAssociator class.
+        @param registry (RadarRegistry): Shared radar geometry, private if None.
+        """
+        self.registry = registry if registry is not None else RadarRegistry()
 
     def process(self, radar_list, radar_data, timestamp):
         """@brief Associate detections from 2+ radars.
@@ -38,7 +45,7 @@ class AdsbAssociator(Associator):
             valid_detection = radar_data[radar]["detection"] is not None
             if valid_config and valid_detection:
                 # get URL for adsb2truth
-                url = self.generate_api_url(radar, radar_data[radar])
+                url = self.registry.get(radar, radar_data[radar]["config"]).adsb2dd_url
 
                 # get ADSB detections
                 try:
@@ -47,7 +54,7 @@ class AdsbAssociator(Associator):
                     data = response.json()
                     adsb_detections = data
                 except requests.exceptions.RequestException as e:
-                    print(f"Error fetching data from {url}: {e}")
+                    logger.warning("Error fetching data from %s: %s", url, e)
                     adsb_detections = None
                     continue
 
@@ -132,41 +139,7 @@ class AdsbAssociator(Associator):
         @param radar_data (dict): Radar data for this radar.
         @return str: adsb2dd API for radar.
         """
-        rx_lat = radar_data["config"]["location"]["rx"]["latitude"]
-        rx_lon = radar_data["config"]["location"]["rx"]["longitude"]
-        rx_alt = radar_data["config"]["location"]["rx"]["altitude"]
-        tx_lat = radar_data["config"]["location"]["tx"]["latitude"]
-        tx_lon = radar_data["config"]["location"]["tx"]["longitude"]
-        tx_alt = radar_data["config"]["location"]["tx"]["altitude"]
-        fc = radar_data["config"]["capture"]["fc"]
-
-        adsb = radar_data["config"]["truth"]["adsb"]["tar1090"]
-
-        api_url = os.environ.get("ADSB2DD_API_URL", "http://adsb2dd.30hours.dev/api/dd")
-        if not api_url.startswith("http://") and not api_url.startswith("https://"):
-            api_url = "http://" + api_url
-
-        api_query = (
-            api_url
-            + "?rx="
-            + str(rx_lat)
-            + ","
-            + str(rx_lon)
-            + ","
-            + str(rx_alt)
-            + "&tx="
-            + str(tx_lat)
-            + ","
-            + str(tx_lon)
-            + ","
-            + str(tx_alt)
-            + "&fc="
-            + str(fc / 1000000)
-            + "&server="
-            + (str(adsb) if str(adsb).startswith("http") else "http://" + str(adsb))
-        )
-
-        return api_query
+        return RadarGeometry.generate_adsb2dd_url(radar_data["config"])
 
     def closest_point(self, x1, y1, x_coords, y_coords):
         x1, y1 = float(x1), float(y1)
@@ -1,33 +1,52 @@
 import numpy as np
 from algorithm.geometry.Geometry import Geometry
+from algorithm.geometry.SpatialIndex import SpatialIndex
 
 
 class NodeDetectionsHelper:  # Or place in an appropriate existing class/module
+    def __init__(self, frame):
+        """frame is the tracker LocalFrame that track state vectors are in."""
+        self.frame = frame
+        self._indexed_key = None
+        self._track_index = None
+
+    def _index(self, existing_tracks_map, timestamp_ms=None):
+        """KD-tree over track positions.
+
+        The tracker changes its tracks map in place, so the tree is only reused
+        for the same map at the same timestamp_ms, e.g. the tracker's
+        last_timestamp_ms, and rebuilt on every call without one.
+        """
+        key = (id(existing_tracks_map), timestamp_ms)
+        if timestamp_ms is None or self._indexed_key != key:
+            positions = [
+                np.asarray(track.state_vector[:3], dtype=float).ravel()
+                for track in existing_tracks_map.values()
+            ]
+            self._track_index = SpatialIndex(positions)
+            self._indexed_key = key
+        return self._track_index
+
     def has_existing_tracks_in_detection_space(
         self,
         new_detection_lla,
         existing_tracks_map,
         gating_threshold_m,
+        timestamp_ms=None,
     ):
-        """Checks if a new LLA detection falls within the gating distance of any existing ECEF tracks."""
+        """Checks if a new LLA detection falls within the gating distance of any existing ENU tracks.
+
+        Pass the tracker's last_timestamp_ms as timestamp_ms to share one index
+        between the queries of a tick.
+        """
         if not existing_tracks_map:
             return False
 
-        new_detection_ecef = np.array(
-            Geometry.lla2ecef(
-                new_detection_lla[0],
-                new_detection_lla[1],
-                new_detection_lla[2],
-            ),
+        new_detection_enu = self.frame.lla2enu(new_detection_lla)
+        nearby = self._index(existing_tracks_map, timestamp_ms).within(
+            new_detection_enu, gating_threshold_m
         )
-
-        for _, track in existing_tracks_map.items():
-            track_pos_ecef = track.state_vector[:3]
-            distance_sq = np.sum((new_detection_ecef - track_pos_ecef) ** 2)
-
-            if distance_sq < (gating_threshold_m**2):
-                return True
-        return False
+        return len(nearby) > 0
 
     def _get_node_rx_ecef(self, node_config_dict):
         """Helper to get RX ECEF from a node's full config dict"""
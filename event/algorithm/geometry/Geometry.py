@@ -4,14 +4,25 @@
 
 import math
 
+import numpy as np
+
 
 class Geometry:
     """@class Geometry
     @brief A class to store geometric functions for passive radar applications.
     @details Uses ENU coordinate system for all internal calculations. 
     Input and output should be LLA. WGS-84 ellipsoid assumed.
+    The *_array functions take [..., 3] arrays and broadcast over reference
+    points; the scalar functions are thin wrappers around them.
+    lla2enu/enu2lla are a small-angle approximation, the ECEF functions are
+    exact. Use LocalFrame for exact ENU about a fixed reference point.
     """
 
+    # WGS-84 ellipsoid
+    WGS84_A = 6378137.0
+    WGS84_F = 1 / 298.257223563
+    WGS84_E2 = WGS84_F * (2 - WGS84_F)
+
     def __init__(self):
         """@brief Constructor for the Geometry class."""
 
@@ -28,26 +39,35 @@ class Geometry:
         @return north (float): North coordinate in meters.
         @return up (float): Up coordinate in meters.
         """
-        # Convert to radians
-        lat_rad = math.radians(lat)
-        lon_rad = math.radians(lon)
-        ref_lat_rad = math.radians(ref_lat)
-        ref_lon_rad = math.radians(ref_lon)
-        
-        # Difference in coordinates
-        dlat = lat_rad - ref_lat_rad
-        dlon = lon_rad - ref_lon_rad
-        dalt = alt - ref_alt
-        
+        east, north, up = Geometry.lla2enu_array(
+            [lat, lon, alt],
+            [ref_lat, ref_lon, ref_alt],
+        )
+        return float(east), float(north), float(up)
+
+    @staticmethod
+    def lla2enu_array(lla, ref_lla):
+        """@brief Converts geodetic coordinates to ENU coordinates in bulk.
+        @param lla (np.ndarray): Target [..., 3] of lat, lon (degrees) and alt (m).
+        @param ref_lla (np.ndarray): Reference [..., 3], broadcast against lla.
+        @return np.ndarray: [..., 3] of east, north, up in meters.
+        """
+        lla = np.asarray(lla, dtype=float)
+        ref_lla = np.asarray(ref_lla, dtype=float)
+        lat_rad = np.radians(lla[..., 0])
+        lon_rad = np.radians(lla[..., 1])
+        ref_lat_rad = np.radians(ref_lla[..., 0])
+        ref_lon_rad = np.radians(ref_lla[..., 1])
+
         # Earth radius approximation (WGS84)
         a = 6378137.0  # semi-major axis in meters
-        
+
         # Convert to ENU
-        east = a * math.cos(ref_lat_rad) * dlon
-        north = a * dlat
-        up = dalt
-        
-        return east, north, up
+        east = a * np.cos(ref_lat_rad) * (lon_rad - ref_lon_rad)
+        north = a * (lat_rad - ref_lat_rad)
+        up = lla[..., 2] - ref_lla[..., 2]
+
+        return np.stack(np.broadcast_arrays(east, north, up), axis=-1)
 
     @staticmethod
     def enu2lla(east, north, up, ref_lat, ref_lon, ref_alt):
@@ -62,30 +82,195 @@ class Geometry:
         @return lon (float): Target geodetic longitude in degrees.
         @return alt (float): Target altitude above ellipsoid in meters.
         """
-        # Convert reference to radians
-        ref_lat_rad = math.radians(ref_lat)
-        ref_lon_rad = math.radians(ref_lon)
-        
+        lat, lon, alt = Geometry.enu2lla_array(
+            [east, north, up],
+            [ref_lat, ref_lon, ref_alt],
+        )
+        return float(lat), float(lon), float(alt)
+
+    @staticmethod
+    def enu2lla_array(enu, ref_lla):
+        """@brief Converts ENU coordinates to geodetic coordinates in bulk.
+        @param enu (np.ndarray): Target [..., 3] of east, north, up in meters.
+        @param ref_lla (np.ndarray): Reference [..., 3], broadcast against enu.
+        @return np.ndarray: [..., 3] of lat, lon (degrees) and alt (m).
+        """
+        enu = np.asarray(enu, dtype=float)
+        ref_lla = np.asarray(ref_lla, dtype=float)
+        ref_lat_rad = np.radians(ref_lla[..., 0])
+        ref_lon_rad = np.radians(ref_lla[..., 1])
+
         # Earth radius approximation (WGS84)
         a = 6378137.0  # semi-major axis in meters
-        
-        # Convert from ENU to LLA differences
-        dlat = north / a
-        dlon = east / (a * math.cos(ref_lat_rad))
-        dalt = up
-        
-        # Add to reference position
-        lat = math.degrees(ref_lat_rad + dlat)
-        lon = math.degrees(ref_lon_rad + dlon)
-        alt = ref_alt + dalt
-        
+
+        # Add ENU offsets to reference position
+        lat = np.degrees(ref_lat_rad + enu[..., 1] / a)
+        lon = np.degrees(ref_lon_rad + enu[..., 0] / (a * np.cos(ref_lat_rad)))
+        alt = ref_lla[..., 2] + enu[..., 2]
+
         # Normalize longitude to [-180, 180] range
-        while lon > 180:
-            lon -= 360
-        while lon < -180:
-            lon += 360
-            
-        return lat, lon, alt
+        wrapped = np.mod(lon + 180, 360) - 180
+        lon = np.where((wrapped == -180) & (lon > 0), 180.0, wrapped)
+
+        return np.stack(np.broadcast_arrays(lat, lon, alt), axis=-1)
+
+    @staticmethod
+    def lla2ecef(lat, lon, alt):
+        """@brief Converts geodetic coordinates to Earth-Centred Earth-Fixed (ECEF).
+        @param lat (float): Geodetic latitude in degrees.
+        @param lon (float): Geodetic longitude in degrees.
+        @param alt (float): Altitude above ellipsoid in meters.
+        @return x (float): ECEF X coordinate in meters.
+        @return y (float): ECEF Y coordinate in meters.
+        @return z (float): ECEF Z coordinate in meters.
+        """
+        x, y, z = Geometry.lla2ecef_array([lat, lon, alt])
+        return float(x), float(y), float(z)
+
+    @staticmethod
+    def lla2ecef_array(lla):
+        """@brief Converts geodetic coordinates to ECEF coordinates in bulk.
+        @param lla (np.ndarray): [..., 3] of lat, lon (degrees) and alt (m).
+        @return np.ndarray: [..., 3] of ECEF x, y, z in meters.
+        """
+        lla = np.asarray(lla, dtype=float)
+        lat_rad = np.radians(lla[..., 0])
+        lon_rad = np.radians(lla[..., 1])
+        sin_lat = np.sin(lat_rad)
+        cos_lat = np.cos(lat_rad)
+
+        # prime vertical radius of curvature
+        N = Geometry.WGS84_A / np.sqrt(1 - Geometry.WGS84_E2 * sin_lat**2)
+
+        x = (N + lla[..., 2]) * cos_lat * np.cos(lon_rad)
+        y = (N + lla[..., 2]) * cos_lat * np.sin(lon_rad)
+        z = (N * (1 - Geometry.WGS84_E2) + lla[..., 2]) * sin_lat
+
+        return np.stack([x, y, z], axis=-1)
+
+    @staticmethod
+    def ecef2lla(x, y, z):
+        """@brief Converts ECEF coordinates to geodetic coordinates.
+        @param x (float): ECEF X coordinate in meters.
+        @param y (float): ECEF Y coordinate in meters.
+        @param z (float): ECEF Z coordinate in meters.
+        @return lat (float): Geodetic latitude in degrees.
+        @return lon (float): Geodetic longitude in degrees.
+        @return alt (float): Altitude above ellipsoid in meters.
+        """
+        lat, lon, alt = Geometry.ecef2lla_array([x, y, z])
+        return float(lat), float(lon), float(alt)
+
+    @staticmethod
+    def ecef2lla_array(ecef):
+        """@brief Converts ECEF coordinates to geodetic coordinates in bulk.
+        @details Bowring's method with two iterations, sub-millimetre for
+        points between the surface and low Earth orbit.
+        @param ecef (np.ndarray): [..., 3] of ECEF x, y, z in meters.
+        @return np.ndarray: [..., 3] of lat, lon (degrees) and alt (m).
+        """
+        ecef = np.asarray(ecef, dtype=float)
+        x, y, z = ecef[..., 0], ecef[..., 1], ecef[..., 2]
+        a = Geometry.WGS84_A
+        e2 = Geometry.WGS84_E2
+        b = a * np.sqrt(1 - e2)
+        ep2 = e2 / (1 - e2)
+
+        p = np.hypot(x, y)
+        lon = np.arctan2(y, x)
+
+        # parametric latitude, refined from the geodetic estimate
+        beta = np.arctan2(z * a, p * b)
+        for _ in range(2):
+            lat = np.arctan2(
+                z + ep2 * b * np.sin(beta) ** 3,
+                p - e2 * a * np.cos(beta) ** 3,
+            )
+            beta = np.arctan2((1 - Geometry.WGS84_F) * np.sin(lat), np.cos(lat))
+
+        # altitude without the singularity of p / cos(lat) at the poles
+        sin_lat = np.sin(lat)
+        alt = p * np.cos(lat) + z * sin_lat - a * np.sqrt(1 - e2 * sin_lat**2)
+
+        return np.stack([np.degrees(lat), np.degrees(lon), alt], axis=-1)
+
+    @staticmethod
+    def enu_rotation(ref_lla):
+        """@brief Rotation matrix from ECEF to ENU at a reference point.
+        @param ref_lla (np.ndarray): Reference [..., 3] of lat, lon (degrees), alt.
+        @return np.ndarray: [..., 3, 3] with east, north and up as rows.
+        """
+        ref_lla = np.asarray(ref_lla, dtype=float)
+        lat_rad = np.radians(ref_lla[..., 0])
+        lon_rad = np.radians(ref_lla[..., 1])
+        sin_lat, cos_lat = np.sin(lat_rad), np.cos(lat_rad)
+        sin_lon, cos_lon = np.sin(lon_rad), np.cos(lon_rad)
+        zero = np.zeros_like(lat_rad)
+
+        east = np.stack([-sin_lon, cos_lon, zero], axis=-1)
+        north = np.stack([-sin_lat * cos_lon, -sin_lat * sin_lon, cos_lat], axis=-1)
+        up = np.stack([cos_lat * cos_lon, cos_lat * sin_lon, sin_lat], axis=-1)
+
+        return np.stack([east, north, up], axis=-2)
+
+    @staticmethod
+    def ecef2enu(x, y, z, ref_lat, ref_lon, ref_alt):
+        """@brief Converts ECEF coordinates to East-North-Up (ENU) coordinates.
+        @param x (float): ECEF X coordinate in meters.
+        @param y (float): ECEF Y coordinate in meters.
+        @param z (float): ECEF Z coordinate in meters.
+        @param ref_lat (float): Reference geodetic latitude in degrees.
+        @param ref_lon (float): Reference geodetic longitude in degrees.
+        @param ref_alt (float): Reference altitude above ellipsoid in meters.
+        @return east (float): East coordinate in meters.
+        @return north (float): North coordinate in meters.
+        @return up (float): Up coordinate in meters.
+        """
+        east, north, up = Geometry.ecef2enu_array(
+            [x, y, z],
+            [ref_lat, ref_lon, ref_alt],
+        )
+        return float(east), float(north), float(up)
+
+    @staticmethod
+    def ecef2enu_array(ecef, ref_lla):
+        """@brief Converts ECEF coordinates to ENU coordinates in bulk.
+        @param ecef (np.ndarray): [..., 3] of ECEF x, y, z in meters.
+        @param ref_lla (np.ndarray): Reference [..., 3], broadcast against ecef.
+        @return np.ndarray: [..., 3] of east, north, up in meters.
+        """
+        offset = np.asarray(ecef, dtype=float) - Geometry.lla2ecef_array(ref_lla)
+        return np.einsum("...ij,...j->...i", Geometry.enu_rotation(ref_lla), offset)
+
+    @staticmethod
+    def enu2ecef(east, north, up, ref_lat, ref_lon, ref_alt):
+        """@brief Converts East-North-Up (ENU) coordinates to ECEF coordinates.
+        @param east (float): East coordinate in meters.
+        @param north (float): North coordinate in meters.
+        @param up (float): Up coordinate in meters.
+        @param ref_lat (float): Reference geodetic latitude in degrees.
+        @param ref_lon (float): Reference geodetic longitude in degrees.
+        @param ref_alt (float): Reference altitude above ellipsoid in meters.
+        @return x (float): ECEF X coordinate in meters.
+        @return y (float): ECEF Y coordinate in meters.
+        @return z (float): ECEF Z coordinate in meters.
+        """
+        x, y, z = Geometry.enu2ecef_array(
+            [east, north, up],
+            [ref_lat, ref_lon, ref_alt],
+        )
+        return float(x), float(y), float(z)
+
+    @staticmethod
+    def enu2ecef_array(enu, ref_lla):
+        """@brief Converts ENU coordinates to ECEF coordinates in bulk.
+        @param enu (np.ndarray): [..., 3] of east, north, up in meters.
+        @param ref_lla (np.ndarray): Reference [..., 3], broadcast against enu.
+        @return np.ndarray: [..., 3] of ECEF x, y, z in meters.
+        """
+        enu = np.asarray(enu, dtype=float)
+        rotated = np.einsum("...ji,...j->...i", Geometry.enu_rotation(ref_lla), enu)
+        return rotated + Geometry.lla2ecef_array(ref_lla)
 
     @staticmethod
     def distance_enu(point1, point2):
@@ -100,6 +285,16 @@ class Geometry:
             + (point2[2] - point1[2]) ** 2,
         )
 
+    @staticmethod
+    def distance_enu_array(points1, points2):
+        """@brief Computes Euclidean distances between ENU points in bulk.
+        @param points1 (np.ndarray): [..., 3] ENU points in meters.
+        @param points2 (np.ndarray): [..., 3] ENU points, broadcast against points1.
+        @return np.ndarray: [...] distances in meters.
+        """
+        difference = np.asarray(points2, dtype=float) - np.asarray(points1, dtype=float)
+        return np.linalg.norm(difference, axis=-1)
+
     @staticmethod
     def average_points(points):
         """@brief Computes the average point from a list of points.
@@ -115,14 +310,14 @@ class Geometry:
         @param point2 (tuple): Second point (lat, lon, alt) in degrees and meters.
         @return distance (float): Distance between the two points in meters.
         """
-        # Use first point as reference
-        ref_lat, ref_lon, ref_alt = point1
-        
-        # Convert second point to ENU relative to first point
-        east, north, up = Geometry.lla2enu(
-            point2[0], point2[1], point2[2],
-            ref_lat, ref_lon, ref_alt
-        )
-        
-        # Calculate distance from origin (0,0,0) to the ENU point
-        return math.sqrt(east**2 + north**2 + up**2)
+        return float(Geometry.distance_lla_array(point1, point2))
+
+    @staticmethod
+    def distance_lla_array(points1, points2):
+        """@brief Computes distances between LLA points in bulk using ENU conversion.
+        @param points1 (np.ndarray): [..., 3] LLA points, used as ENU references.
+        @param points2 (np.ndarray): [..., 3] LLA points, broadcast against points1.
+        @return np.ndarray: [...] distances in meters.
+        """
+        enu = Geometry.lla2enu_array(points2, points1)
+        return np.linalg.norm(enu, axis=-1)
@@ -0,0 +1,54 @@
+"""@file LocalFrame.py
+@brief Exact ENU frame about a fixed reference point.
+"""
+
+import numpy as np
+
+from .Geometry import Geometry
+
+
+class LocalFrame:
+    """@class LocalFrame
+    @brief A class for exact WGS-84 conversion to and from a local ENU frame.
+    @details The ECEF origin and rotation are computed once on construction,
+    so each conversion is a single vectorised ECEF transform and matrix
+    product. Accepts [..., 3] arrays and returns arrays of the same shape.
+    """
+
+    def __init__(self, ref_lat, ref_lon, ref_alt):
+        """@brief Constructor for the LocalFrame class.
+        @param ref_lat (float): Reference geodetic latitude in degrees.
+        @param ref_lon (float): Reference geodetic longitude in degrees.
+        @param ref_alt (float): Reference altitude above ellipsoid in meters.
+        """
+        self.ref_lla = [float(ref_lat), float(ref_lon), float(ref_alt)]
+        self.origin = Geometry.lla2ecef_array(self.ref_lla)
+        self.rotation = Geometry.enu_rotation(self.ref_lla)
+
+    def ecef2enu(self, ecef):
+        """@brief Converts ECEF coordinates to this frame.
+        @param ecef (np.ndarray): [..., 3] of ECEF x, y, z in meters.
+        @return np.ndarray: [..., 3] of east, north, up in meters.
+        """
+        return (np.asarray(ecef, dtype=float) - self.origin) @ self.rotation.T
+
+    def enu2ecef(self, enu):
+        """@brief Converts coordinates in this frame to ECEF.
+        @param enu (np.ndarray): [..., 3] of east, north, up in meters.
+        @return np.ndarray: [..., 3] of ECEF x, y, z in meters.
+        """
+        return np.asarray(enu, dtype=float) @ self.rotation + self.origin
+
+    def lla2enu(self, lla):
+        """@brief Converts geodetic coordinates to this frame.
+        @param lla (np.ndarray): [..., 3] of lat, lon (degrees) and alt (m).
+        @return np.ndarray: [..., 3] of east, north, up in meters.
+        """
+        return self.ecef2enu(Geometry.lla2ecef_array(lla))
+
+    def enu2lla(self, enu):
+        """@brief Converts coordinates in this frame to geodetic coordinates.
+        @param enu (np.ndarray): [..., 3] of east, north, up in meters.
+        @return np.ndarray: [..., 3] of lat, lon (degrees) and alt (m).
+        """
+        return Geometry.ecef2lla_array(self.enu2ecef(enu))
@@ -0,0 +1,48 @@
+"""@file SpatialIndex.py
+@brief KD-tree over ENU positions for fixed-radius neighbour queries.
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class SpatialIndex:
+    """@class SpatialIndex
+    @brief A class to find indexed points within a radius of query points.
+    @details The tree is built once per set of positions, e.g. predicted
+    track positions each tick. Queries then cost in proportion to the
+    number of nearby points rather than the total number indexed.
+    """
+
+    def __init__(self, positions):
+        """@brief Constructor for the SpatialIndex class.
+        @param positions (np.ndarray): Indexed ENU positions [n, 3].
+        """
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        self.tree = cKDTree(self.positions) if len(self.positions) else None
+
+    def pairs(self, queries, radius):
+        """@brief All indexed and query point pairs within radius.
+        @param queries (np.ndarray): Query ENU positions [m, 3].
+        @param radius (float): Search radius (m).
+        @return np.ndarray: Indexed point of each pair [k].
+        @return np.ndarray: Query point of each pair [k].
+        @return np.ndarray: Distance of each pair (m) [k].
+        """
+        queries = np.asarray(queries, dtype=float).reshape(-1, 3)
+        if self.tree is None or len(queries) == 0:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0)
+        matrix = self.tree.sparse_distance_matrix(
+            cKDTree(queries), radius, output_type="ndarray"
+        )
+        return matrix["i"], matrix["j"], matrix["v"]
+
+    def within(self, point, radius):
+        """@brief Indexed points within radius of a single point.
+        @param point (np.ndarray): Query ENU position [3].
+        @param radius (float): Search radius (m).
+        @return np.ndarray: Indices of the points within radius.
+        """
+        if self.tree is None:
+            return np.zeros(0, dtype=int)
+        return np.asarray(self.tree.query_ball_point(point, radius), dtype=int)
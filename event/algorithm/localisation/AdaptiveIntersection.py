@@ -0,0 +1,94 @@
+"""@file AdaptiveIntersection.py
+@brief Coarse-to-fine intersection search for the parametric localisers.
+"""
+
+import numpy as np
+
+
+class AdaptiveIntersection:
+    """@class AdaptiveIntersection
+    @brief A class for finding intersections of bistatic surfaces by refinement.
+    @details Samples the master surface on a coarse (u, v) grid, keeps the
+    cells within a loose threshold of every other surface, then resamples
+    only those patches until the sample spacing reaches the tolerance.
+    Distance to the other surfaces is the first-order bistatic range
+    residual, so only the master surface is ever sampled.
+    """
+
+    def __init__(self, nCoarse=24, tolerance=50, refine=5, maxPatches=64, maxLevels=12):
+        """@brief Constructor for the AdaptiveIntersection class.
+        @param nCoarse (int): Samples along u on the coarse grid (v uses half).
+        @param tolerance (float): Target sample spacing and threshold (m).
+        @param refine (int): Samples per parameter across each refined patch.
+        @param maxPatches (int): Maximum patches refined per level.
+        @param maxLevels (int): Maximum refinement levels.
+        """
+        self.nCoarse = nCoarse
+        self.tolerance = tolerance
+        self.refine = refine
+        self.maxPatches = maxPatches
+        self.maxLevels = maxLevels
+
+    def search(self, surface, bounds, scale, foci, ranges):
+        """@brief Refine the master surface towards the intersection.
+        @param surface (callable): Maps parameter arrays to ENU points [n, 3].
+        @param bounds (list): (min, max) of each surface parameter.
+        @param scale (float): Upper bound on metres per radian of parameter.
+        @param foci (np.ndarray): TX/RX ENU of the other surfaces [m, 2, 3].
+        @param ranges (np.ndarray): Focal distance sum of each other surface [m].
+        @return points (np.ndarray): Final level samples [k, 3] in ENU.
+        @return distances (np.ndarray): Distance to each other surface [k, m].
+        @return threshold (float): Threshold achieved at the final level (m).
+        """
+        counts = [self.nCoarse] + [max(self.nCoarse // 2, 2)] * (len(bounds) - 1)
+        axes = [np.linspace(lo, hi, n) for (lo, hi), n in zip(bounds, counts)]
+        step = np.array([(hi - lo) / (n - 1) for (lo, hi), n in zip(bounds, counts)])
+        params = self._grid(axes)
+
+        for _ in range(self.maxLevels):
+            points = surface(*params.T)
+            distances = self.distance(points, foci, ranges)
+            worst = distances.max(axis=1)
+            worst[points[:, 2] <= 0] = np.inf
+            spacing = scale * step.max()
+            if spacing <= self.tolerance:
+                break
+
+            # keep the best cells within a spacing of every other surface
+            keep = np.flatnonzero(worst < spacing)
+            if keep.size == 0:
+                break
+            keep = keep[np.argsort(worst[keep])[: self.maxPatches]]
+
+            # resample a patch of +/- one step around each kept cell
+            offsets = self._grid([np.linspace(-s, s, self.refine) for s in step])
+            params = (params[keep][:, None, :] + offsets[None, :, :]).reshape(
+                -1, len(bounds)
+            )
+            step = 2 * step / (self.refine - 1)
+
+        valid = np.isfinite(worst)
+        return points[valid], distances[valid], max(spacing, self.tolerance)
+
+    @staticmethod
+    def distance(points, foci, ranges):
+        """@brief Approximate distance from points to bistatic surfaces.
+        @details Range residual divided by its gradient norm.
+        @param points (np.ndarray): ENU points [n, 3].
+        @param foci (np.ndarray): TX/RX ENU of each surface [m, 2, 3].
+        @param ranges (np.ndarray): Focal distance sum of each surface [m].
+        @return np.ndarray: Distance from each point to each surface [n, m].
+        """
+        d_tx = points[:, None, :] - foci[None, :, 0, :]
+        d_rx = points[:, None, :] - foci[None, :, 1, :]
+        n_tx = np.maximum(np.linalg.norm(d_tx, axis=-1), 1e-9)
+        n_rx = np.maximum(np.linalg.norm(d_rx, axis=-1), 1e-9)
+        residual = n_tx + n_rx - ranges[None, :]
+        gradient = d_tx / n_tx[..., None] + d_rx / n_rx[..., None]
+        return np.abs(residual) / np.maximum(np.linalg.norm(gradient, axis=-1), 1e-9)
+
+    @staticmethod
+    def _grid(axes):
+        """@brief Cartesian product of parameter axes as rows [n, len(axes)]."""
+        mesh = np.meshgrid(*axes, indexing="ij")
+        return np.stack([m.ravel() for m in mesh], axis=-1)
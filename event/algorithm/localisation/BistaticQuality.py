@@ -0,0 +1,63 @@
+"""@file BistaticQuality.py
+@brief Quality metrics for bistatic range localisation.
+"""
+
+import numpy as np
+from algorithm.geometry.Geometry import Geometry
+
+
+class BistaticQuality:
+    """@class BistaticQuality
+    @brief A class to compute position covariance, GDOP and residuals.
+    @details Linearises the bistatic range equations at each solution, so
+    the cost is one small matrix inverse per target. Covariance is reported
+    in the ENU frame at the solution itself, so consumers with a different
+    reference point can rotate it exactly.
+    """
+
+    @staticmethod
+    def assess(frame, positions, tx, rx, ranges, rangeStd, spread=None):
+        """@brief Compute quality metrics for a batch of solutions.
+        @param frame (LocalFrame): Frame of positions, tx and rx.
+        @param positions (np.ndarray): Solutions in ENU [n, 3].
+        @param tx (np.ndarray): TX ENU of each radar [n, m, 3].
+        @param rx (np.ndarray): RX ENU of each radar [n, m, 3].
+        @param ranges (np.ndarray): Measured TX-target-RX path lengths [n, m].
+        @param rangeStd (float): Bistatic range standard deviation (m).
+        @param spread (np.ndarray): Extra covariance in the localiser frame
+        [n, 3, 3], e.g. the spread of accepted samples.
+        @return covariance (np.ndarray): ENU covariance at solution [n, 3, 3].
+        @return gdop (np.ndarray): Geometric dilution of precision [n].
+        @return residual (np.ndarray): RMS range residual (m) [n].
+        """
+        positions = np.asarray(positions, dtype=float)
+        d_tx = positions[:, None, :] - tx
+        d_rx = positions[:, None, :] - rx
+        n_tx = np.maximum(np.linalg.norm(d_tx, axis=-1), 1e-9)
+        n_rx = np.maximum(np.linalg.norm(d_rx, axis=-1), 1e-9)
+        jacobian = d_tx / n_tx[..., None] + d_rx / n_rx[..., None]
+
+        dop = np.linalg.pinv(np.swapaxes(jacobian, 1, 2) @ jacobian)
+        gdop = np.sqrt(np.maximum(np.trace(dop, axis1=1, axis2=2), 0))
+        residual = np.sqrt(np.mean((n_tx + n_rx - ranges) ** 2, axis=1))
+
+        covariance = rangeStd**2 * dop
+        if spread is not None:
+            covariance = covariance + spread
+
+        # rotate from the localiser frame to ENU at each solution
+        rotation = Geometry.enu_rotation(frame.enu2lla(positions)) @ frame.rotation.T
+        covariance = rotation @ covariance @ np.swapaxes(rotation, 1, 2)
+
+        return covariance, gdop, residual
+
+    @staticmethod
+    def to_output(covariance, gdop, residual):
+        """@brief Compact JSON form of the metrics for one target.
+        @return dict: Covariance (m^2), GDOP and RMS residual (m).
+        """
+        return {
+            "covariance": np.round(covariance, 1).tolist(),
+            "gdop": round(float(gdop), 3),
+            "residual": round(float(residual), 1),
+        }
@@ -2,11 +2,16 @@
 @author 30hours
 """
 
-import math
-
 import numpy as np
 from algorithm.geometry.Geometry import Geometry
-from data.Ellipsoid import Ellipsoid
+from algorithm.localisation.AdaptiveIntersection import AdaptiveIntersection
+from algorithm.localisation.BistaticQuality import BistaticQuality
+from algorithm.localisation.IntersectionKernel import IntersectionKernel
+from algorithm.localisation.TrackGate import TrackGate
+from algorithm.Log import get_logger
+from data.RadarRegistry import RadarRegistry
+
+logger = get_logger("localisation")
 
 
 class EllipsoidParametric:
@@ -16,12 +21,44 @@ class EllipsoidParametric:
     @see blah2 at https://github.com/30hours/blah2.
     """
 
-    def __init__(self, method="mean", nSamples=100, threshold=500):
-        """@brief Constructor for the EllipsoidParametric class."""
-        self.ellipsoids = []
+    def __init__(
+        self,
+        method="mean",
+        nSamples=100,
+        threshold=500,
+        adaptive=False,
+        nCoarse=24,
+        tolerance=50,
+        registry=None,
+        quality=False,
+        rangeStd=100,
+        kernel=None,
+    ):
+        """@brief Constructor for the EllipsoidParametric class.
+        @details Adaptive mode replaces the fixed grid with a coarse-to-fine
+        search, where nCoarse and tolerance replace nSamples and threshold.
+        @param registry (RadarRegistry): Shared radar geometry, private if None.
+        @param quality (bool): Also output covariance, GDOP and residual.
+        @param rangeStd (float): Bistatic range standard deviation (m).
+        @param kernel (IntersectionKernel): Distance kernels, numpy if None.
+        """
+        self.registry = registry if registry is not None else RadarRegistry()
+        self.quality = quality
+        self.rangeStd = rangeStd
         self.nSamples = nSamples
         self.threshold = threshold
         self.method = method
+        self.adaptive = AdaptiveIntersection(nCoarse, tolerance) if adaptive else None
+        self.kernel = kernel if kernel is not None else IntersectionKernel("numpy")
+        self.gates = {}
+
+    def set_gates(self, gates):
+        """@brief Set track gates for the next call to process.
+        @details Gated targets are searched near their track first, and over
+        the whole surfaces only if nothing intersects inside the gate.
+        @param gates (dict): ([lat, lon, alt], radius in m) by target.
+        """
+        self.gates = gates
 
     def process(self, assoc_detections, radar_data):
         """@brief Perform target localisation using the ellipsoid parametric method.
@@ -36,163 +73,215 @@ class EllipsoidParametric:
         if not assoc_detections:
             return output
 
-        for target in assoc_detections:
-            target_samples = {}
-            target_samples[target] = {}
-
-            for radar in assoc_detections[target]:
-                # create ellipsoid for radar
-                ellipsoid = next(
-                    (item for item in self.ellipsoids if item.name == radar["radar"]),
-                    None,
-                )
+        self.registry.update(radar_data)
 
-                if ellipsoid is None:
-                    config = radar_data[radar["radar"]]["config"]
-                    tx_lla = [
-                        config["location"]["tx"]["latitude"],
-                        config["location"]["tx"]["longitude"],
-                        config["location"]["tx"]["altitude"],
-                    ]
-                    rx_lla = [
-                        config["location"]["rx"]["latitude"],
-                        config["location"]["rx"]["longitude"],
-                        config["location"]["rx"]["altitude"],
-                    ]
-                    ellipsoid = Ellipsoid(tx_lla, rx_lla, radar["radar"])
-                    self.ellipsoids.append(ellipsoid)
-
-                samples = self.sample(ellipsoid, radar["delay"] * 1000, self.nSamples)
-                target_samples[target][radar["radar"]] = samples
-
-            # find close points, ellipsoid 1 is master
-            radar_keys = list(target_samples[target].keys())
-            samples_intersect = []
+        for target in assoc_detections:
+            samples_intersect = None
+            if target in self.gates:
+                samples_intersect = self.intersect(assoc_detections[target], self.gates[target])
+            if not samples_intersect:
+                samples_intersect = self.intersect(assoc_detections[target])
+            if samples_intersect is None:
+                return output
+            if len(samples_intersect) == 0:
+                continue
 
+            # average close points, keeping their spread for quality
+            spread = None
             if self.method == "mean":
-                # loop points in main ellipsoid
-                for point1 in target_samples[target][radar_keys[0]]:
-                    valid_point = True
-                    # loop over each other list
-                    for i in range(1, len(radar_keys)):
-                        # loop points in other list
-                        if not any(
-                            Geometry.distance_enu(point1, point2) < self.threshold
-                            for point2 in target_samples[target][radar_keys[i]]
-                        ):
-                            valid_point = False
-                            break
-                    if valid_point:
-                        samples_intersect.append(point1)
-
-                if len(samples_intersect) == 0:
-                    continue
-
-                average_point = Geometry.average_points(samples_intersect)
-                samples_intersect = [average_point]
-
-            elif self.method == "minimum":
-                min_distance = self.threshold
-                min_point1 = None
-                # loop points in main ellipsoid
-                for point1 in target_samples[target][radar_keys[0]]:
-                    valid_point = True
-                    distance_from_point1 = [self.threshold] * (len(radar_keys) - 1)
-                    # loop over each other list
-                    for i in range(1, len(radar_keys)):
-                        if i > 1 and distance_from_point1[i - 1] > self.threshold:
-                            valid_point = False
-                            break
-                        # loop points in other list
-                        for point2 in target_samples[target][radar_keys[i]]:
-                            distance = Geometry.distance_enu(point1, point2)
-                            distance_from_point1[i - 1] = min(
-                                distance_from_point1[i - 1], distance
-                            )
-                    norm = math.sqrt(sum(x**2 for x in distance_from_point1))
-                    if valid_point and norm < min_distance:
-                        min_distance = norm
-                        min_point1 = point1
-
-                if min_point1 is not None:
-                    samples_intersect.append(min_point1)
-                else:
-                    continue
+                if len(samples_intersect) > 1:
+                    spread = np.cov(np.transpose(samples_intersect))
+                samples_intersect = [Geometry.average_points(samples_intersect)]
 
-            else:
-                print("Invalid method.")
-                return output
-
-            # convert ENU samples to LLA
+            # convert ENU samples to LLA (first radar's midpoint is reference)
+            frame = self.registry[assoc_detections[target][0]["radar"]].frame
+            lla = frame.enu2lla(np.reshape(samples_intersect, (-1, 3)))
             output[target] = {}
-            output[target]["points"] = []
-            
-            # Get reference point (use first radar's midpoint)
-            ref_ellipsoid = next(
-                (item for item in self.ellipsoids if item.name == radar_keys[0]),
-                None,
-            )
-            ref_lat = ref_ellipsoid.midpoint_lla[0]
-            ref_lon = ref_ellipsoid.midpoint_lla[1]
-            ref_alt = ref_ellipsoid.midpoint_lla[2]
-            
-            for enu_point in samples_intersect:
-                lat, lon, alt = Geometry.enu2lla(
-                    enu_point[0], enu_point[1], enu_point[2],
-                    ref_lat, ref_lon, ref_alt
-                )
-                output[target]["points"].append(
-                    [round(lat, 3), round(lon, 3), round(alt)]
+            output[target]["points"] = [
+                [round(lat, 3), round(lon, 3), round(alt)] for lat, lon, alt in lla.tolist()
+            ]
+            if self.quality:
+                output[target].update(
+                    self.assess(
+                        frame, samples_intersect[0], assoc_detections[target], spread
+                    )
                 )
 
         return output
 
-    def sample(self, ellipsoid, bistatic_range, n):
-        """@brief Generate a set of ENU points for the ellipsoid.
-        @details No arc length parametrisation.
-        @details Points are in ENU coordinates relative to ellipsoid midpoint.
-        @param ellipsoid (Ellipsoid): The ellipsoid object to use.
+    def intersect(self, detections, gate=None):
+        """@brief Intersect the ellipsoids of one target.
+        @param detections (list): Associated detections of the target.
+        @param gate (tuple): ([lat, lon, alt], radius in m) to search within,
+        or None to search the whole surfaces.
+        @return list: Intersection point(s) in ENU relative to the master
+        midpoint, or None if the method is invalid.
+        """
+        surfaces = []
+        for radar in detections:
+            geometry = self.registry[radar["radar"]]
+            bistatic_range = radar["delay"] * 1000
+            bounds = None
+            if gate is not None:
+                centre = geometry.frame.lla2enu(gate[0])
+                bounds = self.window(geometry, bistatic_range, centre, gate[1])
+            surfaces.append((geometry, bistatic_range, bounds))
+
+        # find close points, ellipsoid 1 is master
+        if self.adaptive:
+            samples_intersect = self.intersect_adaptive(
+                [surface[:2] for surface in surfaces], surfaces[0][2]
+            )
+        elif self.method in ["mean", "minimum"]:
+            samples = [self.sample(*surface[:2], self.nSamples, surface[2]) for surface in surfaces]
+            if self.method == "mean":
+                # points in main ellipsoid close to every other
+                samples_intersect = self.kernel.mean(samples[0], samples[1:], self.threshold).tolist()
+            else:
+                min_point1 = self.kernel.minimum(samples[0], samples[1:], self.threshold)
+                samples_intersect = [] if min_point1 is None else [min_point1.tolist()]
+        else:
+            logger.error("Invalid method: %s", self.method)
+            return None
+
+        if gate is not None:
+            master = surfaces[0][0]
+            samples_intersect = TrackGate.inside(
+                samples_intersect, master.frame.lla2enu(gate[0]), gate[1]
+            )
+        return samples_intersect
+
+    def window(self, geometry, bistatic_range, centre, radius):
+        """@brief Parameter window of the ellipsoid around a gate.
+        @details The centre is scaled onto the ellipsoid axes to find its
+        nearest (u, v), which is close to the true projection near the surface.
+        @param geometry (RadarGeometry): The radar geometry to use.
         @param bistatic_range (float): Bistatic range for ellipsoid.
-        @param n (int): Number of points to generate.
-        @return list: Samples with size [n, 3] in ENU coordinates.
+        @param centre (np.ndarray): Gate centre in ENU relative to midpoint.
+        @param radius (float): Gate radius (m).
+        @return list: (min, max) of u and v.
+        """
+        distance = geometry.ellipsoid.distance
+        a = (bistatic_range + distance) / 2
+        b = np.sqrt(a**2 - (distance / 2) ** 2)
+        x, y, z = np.dot(geometry.rotation_ellipsoid, centre)
+        u = np.arctan2(np.hypot(y, z) / b, x / a)
+        v = np.arctan2(z, y)
+        return TrackGate.bounds(
+            lambda u, v: self.surface(geometry, bistatic_range, u, v),
+            [u, v],
+            [b, b * abs(np.sin(u))],
+            centre,
+            radius,
+        )
+
+    def intersect_adaptive(self, surfaces, bounds=None):
+        """@brief Intersect ellipsoids with a coarse-to-fine search.
+        @details The first ellipsoid is master and is the only one sampled.
+        @param surfaces (list): (RadarGeometry, bistatic range) for each radar.
+        @param bounds (list): (min, max) of u and v on the master, or None for all.
+        @return list: Intersection point(s) in ENU relative to master midpoint,
+        all points within the threshold for the mean method.
         """
-        # rotation matrix
-        phi = ellipsoid.pitch
-        theta = ellipsoid.yaw
-        R = np.array(
+        master, master_range = surfaces[0]
+        foci = master.frame.lla2enu(
+            [[geometry.tx_lla, geometry.rx_lla] for geometry, _ in surfaces[1:]],
+        )
+        ranges = np.array(
             [
-                [
-                    np.cos(theta),
-                    -np.sin(theta) * np.cos(phi),
-                    np.sin(theta) * np.sin(phi),
-                ],
-                [
-                    np.sin(theta),
-                    np.cos(theta) * np.cos(phi),
-                    -np.cos(theta) * np.sin(phi),
-                ],
-                [0, np.sin(phi), np.cos(phi)],
+                bistatic_range + geometry.ellipsoid.distance
+                for geometry, bistatic_range in surfaces[1:]
             ],
         )
 
-        # compute samples vectorised
-        a = (bistatic_range + ellipsoid.distance) / 2
-        b = np.sqrt(a**2 - (ellipsoid.distance / 2) ** 2)
-        u_values = np.linspace(0, 2 * np.pi, n)
-        v_values = np.linspace(-np.pi / 2, np.pi / 2, int(n / 2))
-        u, v = np.meshgrid(u_values, v_values, indexing="ij")
+        points, distances, threshold = self.adaptive.search(
+            lambda u, v: self.surface(master, master_range, u, v),
+            bounds or [(0, 2 * np.pi), (-np.pi / 2, np.pi / 2)],
+            (master_range + master.ellipsoid.distance) / 2,
+            foci,
+            ranges,
+        )
+
+        if self.method == "mean":
+            return points[distances.max(axis=1) < threshold].tolist()
+        if self.method == "minimum":
+            norm = np.linalg.norm(distances, axis=1)
+            if len(norm) == 0 or norm.min() >= threshold:
+                return []
+            return [points[np.argmin(norm)].tolist()]
+        logger.error("Invalid method: %s", self.method)
+        return []
+
+    def assess(self, frame, point, detections, spread=None):
+        """@brief Quality metrics for an intersection point.
+        @param frame (LocalFrame): Frame of the point (master midpoint).
+        @param point (list): Intersection point in ENU.
+        @param detections (list): Associated detections of the target.
+        @param spread (np.ndarray): Covariance of the averaged points, if any.
+        @return dict: Covariance, GDOP and RMS residual, see BistaticQuality.
+        """
+        geometries = [self.registry[radar["radar"]] for radar in detections]
+        foci = frame.lla2enu(
+            [[geometry.tx_lla, geometry.rx_lla] for geometry in geometries],
+        )
+        ranges = np.array(
+            [
+                radar["delay"] * 1000 + geometry.ellipsoid.distance
+                for radar, geometry in zip(detections, geometries)
+            ],
+        )
+        quality = BistaticQuality.assess(
+            frame,
+            np.reshape(point, (1, 3)),
+            foci[None, :, 0],
+            foci[None, :, 1],
+            ranges[None],
+            self.rangeStd,
+            None if spread is None else spread[None],
+        )
+        return BistaticQuality.to_output(*(metric[0] for metric in quality))
+
+    def surface(self, geometry, bistatic_range, u, v):
+        """@brief Evaluate the parametric ellipsoid at (u, v).
+        @param geometry (RadarGeometry): The radar geometry to use.
+        @param bistatic_range (float): Bistatic range for ellipsoid.
+        @param u (np.ndarray): Angle about the major axis in radians.
+        @param v (np.ndarray): Elevation angle in radians, same shape as u.
+        @return np.ndarray: Points with size [n, 3] in ENU relative to midpoint.
+        """
+        distance = geometry.ellipsoid.distance
+        a = (bistatic_range + distance) / 2
+        b = np.sqrt(a**2 - (distance / 2) ** 2)
         x = a * np.cos(u)
         y = b * np.sin(u) * np.cos(v)
         z = b * np.sin(u) * np.sin(v)
         r = np.stack([x, y, z], axis=-1).reshape(-1, 3)
 
-        r_1 = np.dot(r, R)
-        output = []
+        return np.dot(r, geometry.rotation_ellipsoid)
+
+    def sample(self, geometry, bistatic_range, n, bounds=None):
+        """@brief Generate a set of ENU points for the ellipsoid.
+        @details No arc length parametrisation.
+        @details Points are in ENU coordinates relative to ellipsoid midpoint.
+        @param geometry (RadarGeometry): The radar geometry to use.
+        @param bistatic_range (float): Bistatic range for ellipsoid.
+        @param n (int): Number of points to generate.
+        @param bounds (list): (min, max) of u and v, or None for the whole surface.
+        @return list: Samples with size [n, 3] in ENU coordinates.
+        """
+        return np.round(self.sample_array(geometry, bistatic_range, n, bounds), 3).tolist()
 
-        for i in range(len(r_1)):
-            # only store points above ground (positive up in ENU)
-            if r_1[i][2] > 0:
-                # points in ENU relative to midpoint
-                output.append([round(r_1[i][0], 3), round(r_1[i][1], 3), round(r_1[i][2], 3)])
+    def sample_array(self, geometry, bistatic_range, n, bounds=None):
+        """@brief Generate ENU points for the ellipsoid as an array.
+        @details Same grid as sample, only points above ground are kept.
+        Bounds keep the grid spacing of n samples over the whole surface.
+        @return np.ndarray: Samples with size [k, 3] in ENU relative to midpoint.
+        """
+        u_values, v_values = TrackGate.axes(
+            [(0, 2 * np.pi, n), (-np.pi / 2, np.pi / 2, int(n / 2))], bounds
+        )
+        u, v = np.meshgrid(u_values, v_values, indexing="ij")
+        r_1 = self.surface(geometry, bistatic_range, u, v)
 
-        return output
+        # only keep points above ground (positive up in ENU)
+        return r_1[r_1[:, 2] > 0]
@@ -0,0 +1,145 @@
+"""@file Ensemble.py
+@brief Run several localisers concurrently and fuse their estimates.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from algorithm.geometry.Geometry import Geometry
+from algorithm.Log import get_logger
+from data.RadarRegistry import RadarRegistry
+
+logger = get_logger("localisation")
+
+
+class Ensemble:
+    """@class Ensemble
+    @brief A class for localising with several methods on a worker pool.
+    @details Every localiser gets the same associated detections, so the
+    wall time is roughly that of the slowest method. Estimates are fused
+    per target by inverse covariance weighting when every method reports a
+    covariance, otherwise by the median in ECEF. Threads suit the numpy
+    solvers. Processes pickle every localiser and the detections on each
+    call, so they only pay off for methods that hold the GIL for long.
+    The pool is started on first use and stopped by shutdown.
+    """
+
+    def __init__(self, localisers, registry=None, workers=None, processes=False):
+        """@brief Constructor for the Ensemble class.
+        @param localisers (dict): Localiser objects keyed by localisation id.
+        @param registry (RadarRegistry): Shared radar geometry, private if None.
+        @param workers (int): Pool size, one per localiser if None.
+        @param processes (bool): Use a process pool instead of threads.
+        """
+        self.localisers = localisers
+        self.registry = registry if registry is not None else RadarRegistry()
+        self.workers = workers or max(len(localisers), 1)
+        self.processes = processes
+        self.executor = None
+
+    def start(self):
+        """@brief Start the worker pool if it is not running.
+        @return Executor: The worker pool.
+        """
+        if self.executor is None:
+            if self.processes:
+                # forkserver avoids forking a parent with numba or BLAS threads
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("forkserver"),
+                )
+            else:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        return self.executor
+
+    def shutdown(self):
+        """@brief Stop the worker pool, it restarts on the next process call.
+        @return None.
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def set_gates(self, gates):
+        """@brief Set track gates on every localiser that uses them.
+        @param gates (dict): ([lat, lon, alt], radius in m) by target.
+        """
+        for localiser in self.localisers.values():
+            if hasattr(localiser, "set_gates"):
+                localiser.set_gates(gates)
+
+    def process(self, assoc_detections, radar_data):
+        """@brief Perform target localisation with every localiser.
+        @param assoc_detections (dict): JSON of blah2 radar detections.
+        @param radar_data (dict): JSON of adsb2dd truth detections.
+        @return dict: Fused points per target, with each method's output for
+        that target under "methods".
+        """
+        if not assoc_detections:
+            return {}
+
+        # build shared geometry once so workers only read the registry
+        self.registry.update(radar_data)
+
+        executor = self.start()
+        futures = {
+            localisation_id: executor.submit(
+                localiser.process, assoc_detections, radar_data
+            )
+            for localisation_id, localiser in self.localisers.items()
+        }
+        outputs = {}
+        for localisation_id, future in futures.items():
+            try:
+                outputs[localisation_id] = future.result()
+            except Exception as e:
+                logger.warning("Ensemble method %s failed: %s", localisation_id, e)
+
+        return self.fuse(outputs)
+
+    def fuse(self, outputs):
+        """@brief Fuse the first point of each method for every target.
+        @param outputs (dict): Localiser output keyed by localisation id.
+        @return dict: Fused [lat, lon, alt] per target, with covariance in
+        ENU at the fused point (m^2) if every method provided one.
+        """
+        fused = {}
+        targets = dict.fromkeys(
+            target for output in outputs.values() for target in output
+        )
+        for target in targets:
+            methods = {
+                localisation_id: output[target]
+                for localisation_id, output in outputs.items()
+                if output.get(target, {}).get("points")
+            }
+            if not methods:
+                continue
+
+            lla = np.array([method["points"][0] for method in methods.values()])
+            ecef = Geometry.lla2ecef_array(lla)
+            covariance = None
+            if all(method.get("covariance") for method in methods.values()):
+                # information form in ECEF, each covariance is ENU at its point
+                rotation = Geometry.enu_rotation(lla)
+                ecef_covariance = (
+                    np.swapaxes(rotation, 1, 2)
+                    @ np.array([method["covariance"] for method in methods.values()])
+                    @ rotation
+                )
+                information = np.linalg.pinv(ecef_covariance)
+                covariance = np.linalg.pinv(information.sum(axis=0))
+                point = covariance @ np.einsum("nij,nj->i", information, ecef)
+            else:
+                point = np.median(ecef, axis=0)
+
+            point_lla = Geometry.ecef2lla_array(point)
+            fused[target] = {"points": [point_lla.tolist()], "methods": methods}
+            if covariance is not None:
+                rotation = Geometry.enu_rotation(point_lla)
+                fused[target]["covariance"] = np.round(
+                    rotation @ covariance @ rotation.T, 1
+                ).tolist()
+
+        return fused
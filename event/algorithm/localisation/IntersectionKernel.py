@@ -0,0 +1,118 @@
+"""@file IntersectionKernel.py
+@brief Compiled or vectorised kernels for parametric intersection search.
+"""
+
+import numpy as np
+from algorithm.Log import get_logger
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+logger = get_logger("localisation")
+
+
+if numba is not None:
+
+    @numba.njit(parallel=True, cache=True)
+    def _min_distance_numba(master, other, threshold):
+        """@brief Distance from each master point to the nearest other point,
+        capped at threshold. Compiled with parallel loops over master points.
+        """
+        output = np.empty(master.shape[0])
+        for i in numba.prange(master.shape[0]):
+            best = threshold * threshold
+            for j in range(other.shape[0]):
+                dx = master[i, 0] - other[j, 0]
+                dy = master[i, 1] - other[j, 1]
+                dz = master[i, 2] - other[j, 2]
+                distance = dx * dx + dy * dy + dz * dz
+                if distance < best:
+                    best = distance
+            output[i] = np.sqrt(best)
+        return output
+
+
+class IntersectionKernel:
+    """@class IntersectionKernel
+    @brief A class for the pairwise distance tests of the parametric methods.
+    @details The backend is chosen once on construction. "numba" compiles
+    the nearest-point search with parallel loops, "numpy" uses chunked
+    matrix products, and "auto" picks numba when it is installed. Both
+    backends give the same results as each other. mean matches the original
+    nested loops over distance_enu. minimum scores every master point and
+    has no early exit after the second surface.
+    """
+
+    def __init__(self, backend="auto", chunk=512):
+        """@brief Constructor for the IntersectionKernel class.
+        @param backend (str): One of "auto", "numba" or "numpy".
+        @param chunk (int): Master points per block for the numpy backend.
+        """
+        self.chunk = chunk
+        if backend == "numba" and numba is None:
+            logger.warning("numba is not installed, using numpy backend.")
+        if backend in ["auto", "numba"] and numba is not None:
+            self.backend = "numba"
+        else:
+            self.backend = "numpy"
+
+    def min_distance(self, master, other, threshold):
+        """@brief Distance from each master point to the nearest other point.
+        @param master (np.ndarray): ENU points [n, 3].
+        @param other (np.ndarray): ENU points [m, 3].
+        @param threshold (float): Cap on the returned distance (m).
+        @return np.ndarray: Nearest distance capped at threshold [n].
+        """
+        master = np.ascontiguousarray(master, dtype=float).reshape(-1, 3)
+        other = np.ascontiguousarray(other, dtype=float).reshape(-1, 3)
+        if len(other) == 0:
+            return np.full(len(master), float(threshold))
+        if self.backend == "numba":
+            return _min_distance_numba(master, other, float(threshold))
+
+        other_sq = np.sum(other**2, axis=1)
+        output = np.empty(len(master))
+        for start in range(0, len(master), self.chunk):
+            block = master[start : start + self.chunk]
+            distance = (
+                np.sum(block**2, axis=1)[:, None] + other_sq[None, :] - 2 * block @ other.T
+            )
+            output[start : start + self.chunk] = distance.min(axis=1)
+        return np.minimum(np.sqrt(np.maximum(output, 0)), threshold)
+
+    def mean(self, master, others, threshold):
+        """@brief Master points within threshold of a point on every other.
+        @param master (np.ndarray): ENU points of the master surface [n, 3].
+        @param others (list): ENU points of each other surface [m_i, 3].
+        @param threshold (float): Distance threshold (m).
+        @return np.ndarray: Close master points [k, 3].
+        """
+        master = np.asarray(master, dtype=float).reshape(-1, 3)
+        valid = np.ones(len(master), dtype=bool)
+        for other in others:
+            # only test points still valid against the previous surfaces
+            index = np.flatnonzero(valid)
+            valid[index] = self.min_distance(master[index], other, threshold) < threshold
+        return master[valid]
+
+    def minimum(self, master, others, threshold):
+        """@brief Master point with the smallest combined distance to others.
+        @details Per-surface distances are capped at threshold and combined
+        by their norm, which must also be under threshold.
+        @param master (np.ndarray): ENU points of the master surface [n, 3].
+        @param others (list): ENU points of each other surface [m_i, 3].
+        @param threshold (float): Distance threshold (m).
+        @return np.ndarray: Best master point [3], or None if none qualify.
+        """
+        master = np.asarray(master, dtype=float).reshape(-1, 3)
+        if len(master) == 0:
+            return None
+        distances = np.stack(
+            [self.min_distance(master, other, threshold) for other in others],
+            axis=1,
+        )
+        norm = np.linalg.norm(distances, axis=1)
+        best = np.argmin(norm)
+        return master[best] if norm[best] < threshold else None
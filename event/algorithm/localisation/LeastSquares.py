@@ -0,0 +1,208 @@
+"""@file LeastSquares.py
+@brief Iterative least-squares localisation on bistatic range.
+"""
+
+import numpy as np
+from algorithm.localisation.BistaticQuality import BistaticQuality
+from algorithm.localisation.SphericalIntersection import SphericalIntersection
+from data.RadarRegistry import RadarRegistry
+
+
+class LeastSquares:
+    """@class LeastSquares
+    @brief A class for localising targets with Levenberg-Marquardt.
+    @details Minimises bistatic range residuals over all associated radars.
+    Starts from a track prior or gate centre if one is set for the target,
+    otherwise from the spherical intersection solution, which is only
+    computed for targets without either. Optionally solves for velocity
+    from the bistatic Doppler once position has converged.
+    """
+
+    def __init__(self, rangeStd=100, maxIterations=10, doppler=False, registry=None):
+        """@brief Constructor for the LeastSquares class.
+        @param rangeStd (float): Bistatic range standard deviation (m).
+        @param maxIterations (int): Maximum Levenberg-Marquardt iterations.
+        @param doppler (bool): Also estimate velocity from Doppler.
+        @param registry (RadarRegistry): Shared radar geometry, private if None.
+        """
+        self.rangeStd = rangeStd
+        self.maxIterations = maxIterations
+        self.doppler = doppler
+        self.tolerance = 0.1
+        self.priors = {}
+        self.gates = {}
+        self.registry = registry if registry is not None else RadarRegistry()
+        self.sphericalIntersection = SphericalIntersection(self.registry)
+
+    def set_priors(self, priors):
+        """@brief Set initial positions for the next call to process.
+        @param priors (dict): [lat, lon, alt] by target, e.g. track positions.
+        """
+        self.priors = priors
+
+    def set_gates(self, gates):
+        """@brief Set track gates for the next call to process.
+        @details A gate's centre is used as the initial position when the
+        target has no prior.
+        @param gates (dict): ([lat, lon, alt], radius in m) by target.
+        """
+        self.gates = gates
+
+    def process(self, assoc_detections, radar_data):
+        """@brief Perform target localisation using Levenberg-Marquardt.
+        @param assoc_detections (dict): JSON of blah2 radar detections.
+        @param radar_data (dict): JSON of adsb2dd truth detections.
+        @return dict: Dict of associated detections, with position covariance
+        in ENU at the solution (m^2), GDOP, RMS residual (m) and optionally
+        velocity in ENU (m/s).
+        """
+        output = {}
+
+        # return if no detections
+        if not assoc_detections:
+            return output
+
+        self.registry.update(radar_data)
+
+        # pick first radar rx node as ENU reference (arbitrary)
+        frame = self.registry[next(iter(radar_data))].rx_frame
+
+        # convert every radar's nodes to ENU once per call
+        names = [radar for radar in radar_data if radar in self.registry]
+        nodes = frame.lla2enu(
+            [
+                [self.registry[radar].tx_lla, self.registry[radar].rx_lla]
+                for radar in names
+            ],
+        )
+        nodes = dict(zip(names, nodes))
+
+        # full search only for targets without a track to start from
+        untracked = {
+            target: detections
+            for target, detections in assoc_detections.items()
+            if target not in self.priors and target not in self.gates
+        }
+        try:
+            initial = self.sphericalIntersection.process(untracked, radar_data)
+        except np.linalg.LinAlgError:
+            initial = {}
+
+        for target in assoc_detections:
+            tx = np.zeros((len(assoc_detections[target]), 3))
+            rx = np.zeros((len(assoc_detections[target]), 3))
+            ranges = np.zeros(len(assoc_detections[target]))
+            for index, radar in enumerate(assoc_detections[target]):
+                tx[index, :], rx[index, :] = nodes[radar["radar"]]
+                ranges[index] = radar["delay"] * 1000
+            ranges += np.linalg.norm(tx - rx, axis=1)
+
+            # initial position from prior, gate, SX or centroid of nodes
+            if target in self.priors:
+                x0 = frame.lla2enu(self.priors[target])
+            elif target in self.gates:
+                x0 = frame.lla2enu(self.gates[target][0])
+            elif target in initial and np.all(np.isfinite(initial[target]["points"][0])):
+                x0 = frame.lla2enu(initial[target]["points"][0])
+            else:
+                x0 = np.concatenate([np.vstack([tx, rx]).mean(axis=0)[:2], [5000]])
+
+            position, _ = self.solve(x0, tx, rx, ranges)
+            # nodes are near the ground, so retry from the mirror solution
+            if position is not None and position[2] < 0:
+                position, _ = self.solve(position * [1, 1, -1], tx, rx, ranges)
+            if position is None:
+                continue
+
+            quality = BistaticQuality.assess(
+                frame, position[None], tx[None], rx[None], ranges[None], self.rangeStd
+            )
+            output[target] = {}
+            output[target]["points"] = [frame.enu2lla(position).tolist()]
+            output[target].update(
+                BistaticQuality.to_output(*(metric[0] for metric in quality))
+            )
+
+            if self.doppler:
+                velocity = self.solve_velocity(
+                    position, tx, rx, assoc_detections[target], radar_data
+                )
+                if velocity is not None:
+                    output[target]["velocity"] = velocity.tolist()
+
+        return output
+
+    def residuals(self, position, tx, rx, ranges):
+        """@brief Bistatic range residuals and Jacobian at a position.
+        @param position (np.ndarray): Target ENU position [3].
+        @param tx (np.ndarray): TX ENU positions [n, 3].
+        @param rx (np.ndarray): RX ENU positions [n, 3].
+        @param ranges (np.ndarray): Measured TX-target-RX path lengths [n].
+        @return residual (np.ndarray): Predicted minus measured [n].
+        @return jacobian (np.ndarray): Residual derivative wrt position [n, 3].
+        """
+        d_tx = position - tx
+        d_rx = position - rx
+        n_tx = np.maximum(np.linalg.norm(d_tx, axis=1), 1e-9)
+        n_rx = np.maximum(np.linalg.norm(d_rx, axis=1), 1e-9)
+        residual = n_tx + n_rx - ranges
+        jacobian = d_tx / n_tx[:, None] + d_rx / n_rx[:, None]
+        return residual, jacobian
+
+    def solve(self, x0, tx, rx, ranges):
+        """@brief Levenberg-Marquardt iterations from an initial position.
+        @return position (np.ndarray): Solution in ENU, or None if diverged.
+        @return jacobian (np.ndarray): Jacobian at the solution.
+        """
+        position = x0.astype(float)
+        residual, jacobian = self.residuals(position, tx, rx, ranges)
+        cost = residual @ residual
+        damping = 1e-3
+
+        for _ in range(self.maxIterations):
+            A = jacobian.T @ jacobian
+            g = jacobian.T @ residual
+            try:
+                step = np.linalg.solve(A + damping * np.diag(np.diag(A) + 1e-9), -g)
+            except np.linalg.LinAlgError:
+                return None, None
+            candidate = position + step
+            residual_new, jacobian_new = self.residuals(candidate, tx, rx, ranges)
+            cost_new = residual_new @ residual_new
+            if cost_new < cost:
+                position, residual, jacobian, cost = (
+                    candidate,
+                    residual_new,
+                    jacobian_new,
+                    cost_new,
+                )
+                damping /= 10
+                if np.linalg.norm(step) < self.tolerance:
+                    break
+            else:
+                damping *= 10
+
+        if not np.all(np.isfinite(position)):
+            return None, None
+        return position, jacobian
+
+    def solve_velocity(self, position, tx, rx, detections, radar_data):
+        """@brief Linear least-squares velocity from bistatic Doppler.
+        @details Range rate is -doppler * c / fc for each radar.
+        @return np.ndarray: Velocity in ENU (m/s), or None if underdetermined.
+        """
+        rows = []
+        range_rates = []
+        for index, radar in enumerate(detections):
+            fc = self.registry[radar["radar"]].fc
+            if radar.get("doppler") is None or fc is None:
+                continue
+            u_tx = position - tx[index]
+            u_rx = position - rx[index]
+            rows.append(u_tx / np.linalg.norm(u_tx) + u_rx / np.linalg.norm(u_rx))
+            range_rates.append(-radar["doppler"] * 299792458 / fc)
+
+        if len(rows) < 3:
+            return None
+        velocity, *_ = np.linalg.lstsq(np.array(rows), np.array(range_rates), rcond=None)
+        return velocity
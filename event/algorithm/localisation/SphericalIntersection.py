@@ -3,7 +3,8 @@
 """
 
 import numpy as np
-from algorithm.geometry.Geometry import Geometry
+from algorithm.localisation.BistaticQuality import BistaticQuality
+from data.RadarRegistry import RadarRegistry
 
 
 class SphericalIntersection:
@@ -13,10 +14,18 @@ class SphericalIntersection:
     @see https://ieeexplore.ieee.org/document/6129656
     """
 
-    def __init__(self):
-        """@brief Constructor for the SphericalIntersection class."""
+    def __init__(self, registry=None, quality=False, rangeStd=100):
+        """@brief Constructor for the SphericalIntersection class.
+        @param registry (RadarRegistry): Shared radar geometry, private if None.
+        @param quality (bool): Also output covariance, GDOP, residual and
+        the alternative root.
+        @param rangeStd (float): Bistatic range standard deviation (m).
+        """
         self.type = "rx"
         self.not_type = "rx" if self.type == "tx" else "tx"
+        self.registry = registry if registry is not None else RadarRegistry()
+        self.quality = quality
+        self.rangeStd = rangeStd
 
     def process(self, assoc_detections, radar_data):
         """@brief Perform target localisation using the SX method.
@@ -30,98 +39,95 @@ class SphericalIntersection:
         if not assoc_detections:
             return output
 
+        self.registry.update(radar_data)
+
         # pick first radar rx node as ENU reference (arbitrary)
         radar = next(iter(radar_data))
-        reference_lla = [
-            radar_data[radar]["config"]["location"][self.not_type]["latitude"],
-            radar_data[radar]["config"]["location"][self.not_type]["longitude"],
-            radar_data[radar]["config"]["location"][self.not_type]["altitude"],
-        ]
-        # No need for ECEF reference anymore
-
+        frame = getattr(self.registry[radar], f"{self.not_type}_frame")
+
+        # convert each radar's non-constant node to ENU once per call
+        names = [radar for radar in radar_data if radar in self.registry]
+        enu = frame.lla2enu(
+            [getattr(self.registry[radar], f"{self.type}_lla") for radar in names],
+        )
+        positions = dict(zip(names, enu))
+
+        # group targets that share the same radar subset, in name order
+        groups = {}
+        detections = {}
         for target in assoc_detections:
-            nDetections = len(assoc_detections[target])
-
+            detections[target] = sorted(
+                assoc_detections[target], key=lambda radar: radar["radar"]
+            )
+            key = tuple(radar["radar"] for radar in detections[target])
+            groups.setdefault(key, []).append(target)
+
+        solutions = {}
+        alternatives = {}
+        metrics = {}
+        for radars, targets in groups.items():
             # matrix of positions of non-constant node
-            S = np.zeros((nDetections, 3))
-
-            # additional vector
-            z_vec = np.zeros((nDetections, 1))
-
-            # bistatic range vector r
-            r = np.zeros((nDetections, 1))
-
-            for index, radar in enumerate(assoc_detections[target]):
-                # convert position to ENU and add to S
-                config = radar_data[radar["radar"]]["config"]
-                x_enu, y_enu, z_enu = Geometry.lla2enu(
-                    config["location"][self.type]["latitude"],
-                    config["location"][self.type]["longitude"],
-                    config["location"][self.type]["altitude"],
-                    reference_lla[0],
-                    reference_lla[1],
-                    reference_lla[2],
-                )
-                S[index, :] = [x_enu, y_enu, z_enu]
-
-                # add to z
-                # Distance from this radar to reference point (already in ENU)
-                distance = Geometry.distance_enu(
-                    [x_enu, y_enu, z_enu],
-                    [0, 0, 0],  # Reference is at origin in ENU
-                )
-                R_i = (radar["delay"] * 1000) + distance
-                z_vec[index, :] = (x_enu**2 + y_enu**2 + z_enu**2 - R_i**2) / 2
-
-                # add to r
-                r[index, :] = R_i
-
-            # now compute matrix math
-            S_star = np.linalg.inv(S.T @ S) @ S.T
-            a = S_star @ z_vec
-            b = S_star @ r
-            R_t = [0, 0]
-            discriminant = 4 * ((a.T @ b) ** 2) - 4 * ((b.T @ b) - 1) * (a.T @ a)
-            if discriminant >= 0:
-                R_t[0] = (-2 * (a.T @ b) - np.sqrt(discriminant)) / (
-                    2 * ((b.T @ b) - 1)
-                )
-                R_t[1] = (-2 * (a.T @ b) + np.sqrt(discriminant)) / (
-                    2 * ((b.T @ b) - 1)
-                )
-            else:
-                R_t[0] = np.real(
-                    (-2 * (a.T @ b) - np.sqrt(discriminant + 0j))
-                    / (2 * ((b.T @ b) - 1)),
-                )
-                R_t[1] = np.real(
-                    (-2 * (a.T @ b) + np.sqrt(discriminant + 0j))
-                    / (2 * ((b.T @ b) - 1)),
-                )
-            x_t = [0, 0]
-            x_t[0] = S_star @ (z_vec + r * R_t[0])
-            x_t[1] = S_star @ (z_vec + r * R_t[1])
+            S = np.array([positions[radar] for radar in radars])
+            distance = np.linalg.norm(S, axis=1)
+
+            # bistatic range matrix r and additional matrix z [targets, radars]
+            delays = np.array(
+                [[radar["delay"] for radar in detections[t]] for t in targets],
+            )
+            r = delays * 1000 + distance
+            z = (distance**2 - r**2) / 2
+
+            # a = S* z and b = S* r for every target in one solve
+            solution, *_ = np.linalg.lstsq(S, np.hstack([z.T, r.T]), rcond=None)
+            a = solution[:, : len(targets)].T
+            b = solution[:, len(targets) :].T
+
+            # roots of the quadratic in target range, real part if complex
+            ab = np.sum(a * b, axis=1)
+            aa = np.sum(a * a, axis=1)
+            bb = np.sum(b * b, axis=1)
+            discriminant = 4 * ab**2 - 4 * (bb - 1) * aa
+            root = np.sqrt(np.maximum(discriminant, 0))
+            R_t = np.stack([-2 * ab - root, -2 * ab + root], axis=1) / (
+                2 * (bb - 1)[:, None]
+            )
+            x_t = a[:, None, :] + b[:, None, :] * R_t[:, :, None]
 
             # use solution with highest altitude
-            output[target] = {}
-            output[target]["points"] = []
-            x_t_list = [np.squeeze(arr).tolist() for arr in x_t]
-
-            # convert points back to LLA
-            for index in range(len(x_t_list)):
-                lat, lon, alt = Geometry.enu2lla(
-                    x_t_list[index][0],
-                    x_t_list[index][1],
-                    x_t_list[index][2],
-                    reference_lla[0],
-                    reference_lla[1],
-                    reference_lla[2],
+            best = np.argmax(x_t[:, :, 2], axis=1)
+            rows = np.arange(len(targets))
+            for index, target in enumerate(targets):
+                solutions[target] = x_t[index, best[index]]
+                alternatives[target] = x_t[index, 1 - best[index]]
+
+            # constant node is the origin, so the node order does not matter
+            if self.quality:
+                nodes = np.broadcast_to(S, (len(targets), *S.shape))
+                quality = BistaticQuality.assess(
+                    frame,
+                    x_t[rows, best],
+                    np.zeros_like(nodes),
+                    nodes,
+                    r,
+                    self.rangeStd,
                 )
-                x_t_list[index] = [lat, lon, alt]
-
-            if x_t[0][2] > x_t[1][2]:
-                output[target]["points"].append(x_t_list[0])
-            else:
-                output[target]["points"].append(x_t_list[1])
+                for index, target in enumerate(targets):
+                    metrics[target] = BistaticQuality.to_output(
+                        *(metric[index] for metric in quality)
+                    )
+
+        # convert points (and alternative roots) back to LLA
+        targets = list(assoc_detections)
+        lla = frame.enu2lla(
+            np.array(
+                [[solutions[target], alternatives[target]] for target in targets]
+            ),
+        )
+        for target, (point, alternative) in zip(targets, lla.tolist()):
+            output[target] = {}
+            output[target]["points"] = [point]
+            if self.quality:
+                output[target].update(metrics[target])
+                output[target]["alternatives"] = [alternative]
 
         return output
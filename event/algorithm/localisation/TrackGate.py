@@ -0,0 +1,59 @@
+"""@file TrackGate.py
+@brief Restrict a parametric surface search to a track's gate.
+"""
+
+import numpy as np
+
+
+class TrackGate:
+    """@class TrackGate
+    @brief A class for the parameter window of a bistatic surface near a track.
+    @details A gate is a sphere about a track's predicted position. The
+    parametric localisers sample only the window of (u, v) that can reach
+    the sphere, at the same spacing as their full grid, so the number of
+    samples scales with the gate instead of the whole surface.
+    """
+
+    @staticmethod
+    def bounds(surface, parameters, scale, centre, radius):
+        """@brief Parameter window of a surface around a gate.
+        @details The window is widened by the distance from the gate centre
+        to the surface point at the given parameters, so it also covers an
+        approximate projection of the centre onto the surface.
+        @param surface (callable): Maps parameter arrays to ENU points [n, 3].
+        @param parameters (list): Surface parameters nearest the gate centre.
+        @param scale (list): Lower bound on metres per radian of each parameter.
+        @param centre (np.ndarray): Gate centre in the surface's ENU frame [3].
+        @param radius (float): Gate radius (m).
+        @return list: (min, max) of each parameter, at most 2 pi wide.
+        """
+        point = surface(*(np.atleast_1d(p) for p in parameters))[0]
+        reach = radius + np.linalg.norm(point - centre)
+        half = np.minimum(reach / np.maximum(scale, 1e-9), np.pi)
+        return [(p - h, p + h) for p, h in zip(parameters, half)]
+
+    @staticmethod
+    def axes(full, bounds=None):
+        """@brief Sample values of each parameter, on the full grid's spacing.
+        @param full (list): (min, max, n) of each parameter on the full grid.
+        @param bounds (list): (min, max) of each parameter, or None for all.
+        @return list: Sample values of each parameter.
+        """
+        if bounds is None:
+            return [np.linspace(lo, hi, n) for lo, hi, n in full]
+        values = []
+        for (lo, hi, n), (start, stop) in zip(full, bounds):
+            step = (hi - lo) / max(n - 1, 1)
+            values.append(np.linspace(start, stop, max(int(np.ceil((stop - start) / step)) + 1, 2)))
+        return values
+
+    @staticmethod
+    def inside(points, centre, radius):
+        """@brief Points within a gate.
+        @param points (list): ENU points [n, 3].
+        @param centre (np.ndarray): Gate centre in the same frame [3].
+        @param radius (float): Gate radius (m).
+        @return list: Points no further than radius from the centre.
+        """
+        points = np.reshape(points, (-1, 3))
+        return points[np.linalg.norm(points - centre, axis=1) <= radius].tolist()
@@ -0,0 +1,182 @@
+import numpy as np
+
+
+class BatchIMM:
+    """Interacting multiple model filter for many ENU tracks at once.
+
+    Each track carries a constant velocity and a constant acceleration model
+    in a shared 9D state [e, n, u, ve, vn, vu, ae, an, au], stacked as
+    (N, 2, 9) means, (N, 2, 9, 9) covariances and (N, 2) model probabilities.
+    Mixing, prediction and update run for all tracks and models in one batch.
+    The combined estimate is returned in the tracker's 6D layout.
+    """
+
+    n_models = 2
+
+    def __init__(
+        self,
+        noise_diff_coeff=0.1,
+        acceleration_noise_coeff=1.0,
+        switch_probability=0.05,
+        initial_probabilities=(0.8, 0.2),
+        initial_acceleration_std=10.0,
+    ):
+        """Create the filter.
+
+        Args:
+            noise_diff_coeff: Noise diffusion coefficient of the constant velocity model
+            acceleration_noise_coeff: Noise diffusion coefficient of the constant acceleration model
+            switch_probability: Probability of changing model between ticks
+            initial_probabilities: Constant velocity and acceleration probabilities of new tracks
+            initial_acceleration_std: Standard deviation of a new track's acceleration (m/s^2)
+        """
+        self.noise_diff_coeff = noise_diff_coeff
+        self.acceleration_noise_coeff = acceleration_noise_coeff
+        self.switch = np.array(
+            [[1 - switch_probability, switch_probability], [switch_probability, 1 - switch_probability]]
+        )
+        self.initial_probabilities = np.asarray(initial_probabilities, dtype=float)
+        self.initial_acceleration_std = initial_acceleration_std
+
+    def initiate(self, means, covars):
+        """Model states for new tracks from their 6D means and covariances.
+
+        Returns:
+            Model means (N, 2, 9), covariances (N, 2, 9, 9) and probabilities (N, 2).
+        """
+        n = len(means)
+        mode_means = np.zeros((n, self.n_models, 9))
+        mode_means[:, :, :6] = np.asarray(means)[:, None]
+        mode_covars = np.zeros((n, self.n_models, 9, 9))
+        mode_covars[:, :, :6, :6] = np.asarray(covars)[:, None]
+        # the velocity model has no acceleration
+        mode_covars[:, 1, 6:, 6:] = np.eye(3) * self.initial_acceleration_std**2
+        probabilities = np.tile(self.initial_probabilities, (n, 1))
+        return mode_means, mode_covars, probabilities
+
+    def transition(self, dt):
+        """Transition matrices and process noise of both models for each track.
+
+        Args:
+            dt: Time step of each track in seconds, shape (N,)
+
+        Returns:
+            F and Q, each of shape (N, 2, 9, 9).
+        """
+        dt = np.asarray(dt, dtype=float).reshape(-1)[:, None, None]
+        eye = np.eye(3)
+        F = np.zeros((len(dt), self.n_models, 9, 9))
+        Q = np.zeros((len(dt), self.n_models, 9, 9))
+
+        # constant velocity, acceleration held at zero
+        F[:, 0, :6, :6] = np.eye(6)
+        F[:, 0, :3, 3:6] = dt * eye
+        Q[:, 0, :3, :3] = dt**3 / 3 * eye
+        Q[:, 0, :3, 3:6] = Q[:, 0, 3:6, :3] = dt**2 / 2 * eye
+        Q[:, 0, 3:6, 3:6] = dt * eye
+        Q[:, 0] *= self.noise_diff_coeff
+
+        # constant acceleration
+        F[:, 1] = np.eye(9)
+        F[:, 1, :3, 3:6] = F[:, 1, 3:6, 6:] = dt * eye
+        F[:, 1, :3, 6:] = dt**2 / 2 * eye
+        blocks = [
+            [dt**5 / 20, dt**4 / 8, dt**3 / 6],
+            [dt**4 / 8, dt**3 / 3, dt**2 / 2],
+            [dt**3 / 6, dt**2 / 2, dt],
+        ]
+        for i in range(3):
+            for j in range(3):
+                Q[:, 1, 3 * i : 3 * i + 3, 3 * j : 3 * j + 3] = blocks[i][j] * eye
+        Q[:, 1] *= self.acceleration_noise_coeff
+        return F, Q
+
+    def combine(self, mode_means, mode_covars, probabilities):
+        """Moment-matched 6D mean and covariance of the model mixture.
+
+        Returns:
+            Means (N, 6) and covariances (N, 6, 6).
+        """
+        means = np.einsum("nm,nmi->ni", probabilities, mode_means[:, :, :6])
+        spread = mode_means[:, :, :6] - means[:, None]
+        covars = np.einsum(
+            "nm,nmij->nij",
+            probabilities,
+            mode_covars[:, :, :6, :6] + spread[..., :, None] * spread[..., None, :],
+        )
+        return means, covars
+
+    def predict(self, mode_means, mode_covars, probabilities, dt):
+        """Mix the models and predict every track forward by its own time step.
+
+        Args:
+            mode_means: Model means, shape (N, 2, 9)
+            mode_covars: Model covariances, shape (N, 2, 9, 9)
+            probabilities: Model probabilities, shape (N, 2)
+            dt: Time step of each track in seconds, shape (N,)
+
+        Returns:
+            Predicted model means, covariances and probabilities as new arrays.
+        """
+        predicted = probabilities @ self.switch
+        # weight of model i in the mixed prior of model j
+        weights = probabilities[:, :, None] * self.switch[None] / np.maximum(predicted[:, None], 1e-300)
+        mixed = np.einsum("nij,nid->njd", weights, mode_means)
+        spread = mode_means[:, :, None] - mixed[:, None]
+        mixed_covars = np.einsum(
+            "nij,nijab->njab",
+            weights,
+            mode_covars[:, :, None] + spread[..., :, None] * spread[..., None, :],
+        )
+
+        F, Q = self.transition(dt)
+        mode_means = np.einsum("nmij,nmj->nmi", F, mixed)
+        mode_covars = F @ mixed_covars @ np.swapaxes(F, -1, -2) + Q
+        return mode_means, mode_covars, predicted
+
+    def update(self, mode_means, mode_covars, probabilities, measurements, noise):
+        """Update each track's models with one ENU position measurement.
+
+        Args:
+            mode_means: Predicted model means, shape (N, 2, 9)
+            mode_covars: Predicted model covariances, shape (N, 2, 9, 9)
+            probabilities: Predicted model probabilities, shape (N, 2)
+            measurements: ENU positions, shape (N, 3)
+            noise: Measurement noise covariances, shape (N, 3, 3)
+
+        Returns:
+            Updated model means, covariances and probabilities as new arrays.
+        """
+        if len(mode_means) == 0:
+            return (
+                np.array(mode_means, dtype=float),
+                np.array(mode_covars, dtype=float),
+                np.array(probabilities, dtype=float),
+            )
+        innovation = measurements[:, None] - mode_means[:, :, :3]
+        S = mode_covars[:, :, :3, :3] + noise[:, None]
+        solved = np.linalg.solve(S, innovation[..., None])[..., 0]
+        gain = np.swapaxes(np.linalg.solve(S, mode_covars[:, :, :3, :]), -1, -2)
+        mode_means = mode_means + np.einsum("nmij,nmj->nmi", gain, innovation)
+        mode_covars = mode_covars - gain @ mode_covars[:, :, :3, :]
+        mode_covars = (mode_covars + np.swapaxes(mode_covars, -1, -2)) / 2
+
+        _, logdet = np.linalg.slogdet(S)
+        log_likelihood = -0.5 * (np.einsum("nmi,nmi->nm", innovation, solved) + logdet)
+        return mode_means, mode_covars, self.reweight(probabilities, log_likelihood)
+
+    @staticmethod
+    def reweight(probabilities, log_likelihood):
+        """Posterior model probabilities from each model's measurement log-likelihood.
+
+        Args:
+            probabilities: Prior model probabilities, shape (N, 2)
+            log_likelihood: Log-likelihood of the measurement under each model, shape (N, 2)
+
+        Returns:
+            Probabilities normalised per track, shape (N, 2).
+        """
+        log_posterior = log_likelihood + np.log(np.maximum(probabilities, 1e-300))
+        log_posterior -= log_posterior.max(axis=1, keepdims=True)
+        probabilities = np.exp(log_posterior)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class BatchKalman:
+    """Kalman predict and update for many ENU tracks at once.
+
+    States are stacked as (N, 6) means laid out [e, n, u, ve, vn, vu] and
+    (N, 6, 6) covariances. The motion model is Stone Soup's ConstantVelocity
+    on each axis and the measurement is ENU position, so results match
+    KalmanPredictor/KalmanUpdater without building a Stone Soup object per track.
+    """
+
+    def __init__(self, noise_diff_coeff=0.1):
+        """Create the filter.
+
+        Args:
+            noise_diff_coeff: Noise diffusion coefficient of the constant velocity model
+        """
+        self.noise_diff_coeff = noise_diff_coeff
+
+    def transition(self, dt):
+        """Transition matrices and process noise for each track.
+
+        Args:
+            dt: Time step of each track in seconds, shape (N,)
+
+        Returns:
+            F and Q, each of shape (N, 6, 6).
+        """
+        dt = np.asarray(dt, dtype=float).reshape(-1)
+        eye = np.eye(3)
+        F = np.broadcast_to(np.eye(6), (len(dt), 6, 6)).copy()
+        F[:, :3, 3:] = dt[:, None, None] * eye
+        Q = np.empty((len(dt), 6, 6))
+        Q[:, :3, :3] = (dt**3 / 3)[:, None, None] * eye
+        Q[:, :3, 3:] = (dt**2 / 2)[:, None, None] * eye
+        Q[:, 3:, :3] = Q[:, :3, 3:]
+        Q[:, 3:, 3:] = dt[:, None, None] * eye
+        return F, self.noise_diff_coeff * Q
+
+    def predict(self, means, covars, dt):
+        """Predict every track forward by its own time step.
+
+        Args:
+            means: State means, shape (N, 6)
+            covars: State covariances, shape (N, 6, 6)
+            dt: Time step of each track in seconds, shape (N,)
+
+        Returns:
+            Predicted means (N, 6) and covariances (N, 6, 6) as new arrays.
+        """
+        F, Q = self.transition(dt)
+        means = np.einsum("nij,nj->ni", F, means)
+        covars = F @ covars @ np.swapaxes(F, 1, 2) + Q
+        return means, covars
+
+    def update(self, means, covars, measurements, noise):
+        """Update each track with one ENU position measurement.
+
+        Args:
+            means: Predicted state means, shape (N, 6)
+            covars: Predicted state covariances, shape (N, 6, 6)
+            measurements: ENU positions, shape (N, 3)
+            noise: Measurement noise covariances, shape (N, 3, 3)
+
+        Returns:
+            Updated means (N, 6) and covariances (N, 6, 6) as new arrays.
+        """
+        if len(means) == 0:
+            return np.array(means, dtype=float), np.array(covars, dtype=float)
+        innovation = measurements - means[:, :3]
+        S = covars[:, :3, :3] + noise
+        # K = P H^T S^-1, with H selecting position and S symmetric
+        gain = np.swapaxes(np.linalg.solve(S, covars[:, :3, :]), 1, 2)
+        means = means + np.einsum("nij,nj->ni", gain, innovation)
+        covars = covars - gain @ covars[:, :3, :]
+        covars = (covars + np.swapaxes(covars, 1, 2)) / 2
+        return means, covars
@@ -0,0 +1,119 @@
+import numpy as np
+
+
+class BistaticEKF:
+    """Extended Kalman update of ENU tracks with bistatic range and range rate.
+
+    Each row is one radar measurement of one track: the bistatic range, i.e.
+    the TX-target-RX path length minus the TX-RX baseline, and optionally
+    the range rate from Doppler. States may have more than 6 components, e.g.
+    IMM model states, as long as position and velocity come first.
+    """
+
+    def __init__(self, range_std=100.0, range_rate_std=5.0):
+        """Create the filter.
+
+        Args:
+            range_std: Bistatic range standard deviation (m)
+            range_rate_std: Bistatic range rate standard deviation (m/s)
+        """
+        self.range_std = range_std
+        self.range_rate_std = range_rate_std
+
+    @staticmethod
+    def measure(means, tx, rx):
+        """Predicted bistatic range and range rate with their Jacobian.
+
+        Args:
+            means: State means, shape (N, D) with D >= 6
+            tx: TX ENU positions, shape (N, 3)
+            rx: RX ENU positions, shape (N, 3)
+
+        Returns:
+            Measurements (N, 2) and Jacobians (N, 2, D).
+        """
+        position, velocity = means[:, :3], means[:, 3:6]
+        d_tx = position - tx
+        d_rx = position - rx
+        n_tx = np.maximum(np.linalg.norm(d_tx, axis=1), 1e-9)[:, None]
+        n_rx = np.maximum(np.linalg.norm(d_rx, axis=1), 1e-9)[:, None]
+        u_tx, u_rx = d_tx / n_tx, d_rx / n_rx
+        gradient = u_tx + u_rx
+
+        z = np.empty((len(means), 2))
+        z[:, 0] = (n_tx + n_rx)[:, 0] - np.linalg.norm(tx - rx, axis=1)
+        z[:, 1] = np.einsum("ni,ni->n", gradient, velocity)
+
+        # derivative of each unit vector along the velocity
+        along_tx = (velocity - u_tx * np.einsum("ni,ni->n", u_tx, velocity)[:, None]) / n_tx
+        along_rx = (velocity - u_rx * np.einsum("ni,ni->n", u_rx, velocity)[:, None]) / n_rx
+        H = np.zeros((len(means), 2, means.shape[1]))
+        H[:, 0, :3] = gradient
+        H[:, 1, :3] = along_tx + along_rx
+        H[:, 1, 3:6] = gradient
+        return z, H
+
+    def update(self, means, covars, tx, rx, ranges, range_rates=None):
+        """Update each row with one radar's measurement.
+
+        Args:
+            means: Predicted state means, shape (N, D)
+            covars: Predicted state covariances, shape (N, D, D)
+            tx: TX ENU positions, shape (N, 3)
+            rx: RX ENU positions, shape (N, 3)
+            ranges: Measured bistatic ranges (m), shape (N,)
+            range_rates: Measured range rates (m/s), shape (N,), NaN where unknown
+
+        Returns:
+            Updated means and covariances as new arrays, and the log-likelihood
+            of each measurement, shape (N,).
+        """
+        if len(means) == 0:
+            return np.array(means, dtype=float), np.array(covars, dtype=float), np.zeros(0)
+        z, H = self.measure(means, tx, rx)
+        measured = np.empty_like(z)
+        measured[:, 0] = ranges
+        measured[:, 1] = np.nan if range_rates is None else range_rates
+        noise = np.zeros((len(means), 2, 2))
+        noise[:, 0, 0] = self.range_std**2
+        noise[:, 1, 1] = self.range_rate_std**2
+
+        # without Doppler, drop the range rate row from H
+        unknown = np.isnan(measured[:, 1])
+        measured[unknown, 1] = z[unknown, 1]
+        H[unknown, 1] = 0
+        innovation = measured - z
+
+        S = H @ covars @ np.swapaxes(H, 1, 2) + noise
+        PHt = covars @ np.swapaxes(H, 1, 2)
+        gain = np.swapaxes(np.linalg.solve(S, np.swapaxes(PHt, 1, 2)), 1, 2)
+        means = means + np.einsum("nij,nj->ni", gain, innovation)
+        covars = covars - gain @ H @ covars
+        covars = (covars + np.swapaxes(covars, 1, 2)) / 2
+
+        _, logdet = np.linalg.slogdet(S)
+        mahalanobis = np.einsum("ni,ni->n", innovation, np.linalg.solve(S, innovation[..., None])[..., 0])
+        return means, covars, -0.5 * (mahalanobis + logdet)
+
+    def costs(self, means, covars, tx, rx, ranges):
+        """Squared Mahalanobis distance of bistatic ranges from every track.
+
+        Args:
+            means: Predicted state means, shape (N, D)
+            covars: Predicted state covariances, shape (N, D, D)
+            tx: TX ENU positions of the measurements, shape (K, 3)
+            rx: RX ENU positions of the measurements, shape (K, 3)
+            ranges: Measured bistatic ranges (m), shape (K,)
+
+        Returns:
+            Distance of each track summed over the K measurements, shape (N,).
+        """
+        n, k = len(means), len(ranges)
+        z, H = self.measure(
+            np.repeat(means, k, axis=0), np.tile(tx, (n, 1)), np.tile(rx, (n, 1))
+        )
+        P = np.repeat(covars[:, :3, :3], k, axis=0)
+        gradient = H[:, 0, :3]
+        variance = np.einsum("ni,nij,nj->n", gradient, P, gradient) + self.range_std**2
+        residual = np.tile(ranges, n) - z[:, 0]
+        return (residual**2 / variance).reshape(n, k).sum(axis=1)
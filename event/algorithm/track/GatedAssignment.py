@@ -0,0 +1,92 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from ..geometry.SpatialIndex import SpatialIndex
+
+
+class GatedAssignment:
+    """Global nearest neighbour assignment of detections to tracks.
+
+    Candidate pairs inside the Euclidean gate come from a KD-tree over the
+    predicted track positions and are scored in one vectorised pass,
+    either by Euclidean distance or by squared Mahalanobis distance against the
+    innovation covariance. A 2D assignment over the gated pairs then gives each
+    track at most one detection and each detection at most one track.
+    """
+
+    def __init__(self, measure="euclidean", euclidean_threshold=5000.0, mahalanobis_threshold=11.345):
+        """Create the associator.
+
+        Args:
+            measure: "euclidean" or "mahalanobis"
+            euclidean_threshold: Outer gate on ENU position distance (m)
+            mahalanobis_threshold: Gate on squared Mahalanobis distance, e.g. chi-squared 3 dof
+        """
+        if measure not in ("euclidean", "mahalanobis"):
+            raise ValueError(f"Unknown association measure: {measure}")
+        self.measure = measure
+        self.euclidean_threshold = euclidean_threshold
+        self.mahalanobis_threshold = mahalanobis_threshold
+
+    def candidates(self, track_positions, positions):
+        """Track and detection index pairs within the Euclidean gate.
+
+        Args:
+            track_positions: Predicted ENU track positions, shape (N, 3)
+            positions: ENU detection positions, shape (M, 3)
+
+        Returns:
+            Row and column index arrays and distances of the candidate pairs.
+        """
+        return SpatialIndex(track_positions).pairs(positions, self.euclidean_threshold)
+
+    def costs(self, means, covars, positions, noise):
+        """Gated pairs with their association cost.
+
+        Args:
+            means: Predicted track means, shape (N, 6)
+            covars: Predicted track covariances, shape (N, 6, 6)
+            positions: ENU detection positions, shape (M, 3)
+            noise: Detection noise covariances, shape (M, 3, 3)
+
+        Returns:
+            Rows, columns and costs of the gated pairs as 1D arrays.
+        """
+        rows, columns, distance = self.candidates(means[:, :3], positions)
+        if self.measure == "euclidean":
+            return rows, columns, distance
+
+        innovation = positions[columns] - means[rows, :3]
+        S = covars[rows, :3, :3] + noise[columns]
+        cost = np.einsum("ni,ni->n", innovation, np.linalg.solve(S, innovation[..., None])[..., 0])
+        gated = cost < self.mahalanobis_threshold
+        return rows[gated], columns[gated], cost[gated]
+
+    def assign(self, means, covars, positions, noise):
+        """Assign detections to tracks.
+
+        Args:
+            means: Predicted track means, shape (N, 6)
+            covars: Predicted track covariances, shape (N, 6, 6)
+            positions: ENU detection positions, shape (M, 3)
+            noise: Detection noise covariances, shape (M, 3, 3)
+
+        Returns:
+            Matched track rows and detection columns as integer arrays.
+        """
+        empty = np.zeros(0, dtype=int)
+        if len(means) == 0 or len(positions) == 0:
+            return empty, empty
+        rows, columns, cost = self.costs(means, covars, positions, noise)
+        if len(rows) == 0:
+            return empty, empty
+
+        # solve only over tracks and detections that have a gated pair
+        track_index, rows = np.unique(rows, return_inverse=True)
+        detection_index, columns = np.unique(columns, return_inverse=True)
+        infeasible = (cost.max() + 1) * (len(track_index) + len(detection_index))
+        matrix = np.full((len(track_index), len(detection_index)), infeasible)
+        matrix[rows, columns] = cost
+        matched_rows, matched_columns = linear_sum_assignment(matrix)
+        valid = matrix[matched_rows, matched_columns] < infeasible
+        return track_index[matched_rows[valid]], detection_index[matched_columns[valid]]
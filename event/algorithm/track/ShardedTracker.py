@@ -0,0 +1,294 @@
+import json
+import multiprocessing
+import traceback
+from collections import defaultdict
+
+import numpy as np
+
+from ..geometry.SpatialIndex import SpatialIndex
+from ..Log import get_logger
+from .StoneSoupTracker import StoneSoupTracker
+from .Track import Track, TrackStatus
+
+logger = get_logger("track")
+
+
+class ShardCells:
+    """Trackers for the ENU cells owned by one worker."""
+
+    def __init__(self, config):
+        self.config = config
+        self.cells = {}
+
+    def run(self, current_timestamp_ms, commands):
+        """Apply handovers and update every cell with its detections.
+
+        Args:
+            current_timestamp_ms: Time of the tick (ms)
+            commands: By cell, a dict with the track ids to drop, a snapshot
+                to adopt and the radar, adsb and bistatic detections
+
+        Returns:
+            Snapshot of every cell that has tracks, by cell.
+        """
+        # the parent's tracks keep the history, a cell only needs the state
+        size, spill = Track.history_size, Track.history_spill
+        Track.configure_history(1)
+        snapshots = {}
+        try:
+            for cell in set(self.cells) | set(commands):
+                command = commands.get(cell, {})
+                tracker = self.cells.get(cell) or StoneSoupTracker(self.config)
+                self.cells[cell] = tracker
+                if command.get("drop"):
+                    tracker._remove_tracks(command["drop"])
+                if command.get("adopt") is not None:
+                    tracker.adopt(command["adopt"])
+                tracker.update_all_tracks(
+                    command.get("radar", []),
+                    current_timestamp_ms,
+                    adsb_detections_lla=command.get("adsb"),
+                    bistatic_detections=command.get("bistatic"),
+                )
+                if tracker.track_ids:
+                    snapshots[cell] = tracker.snapshot()
+                else:
+                    del self.cells[cell]
+        finally:
+            Track.configure_history(size, spill)
+        return snapshots
+
+
+def _serve(connection, config):
+    """Worker process loop, running each tick's commands until sent None.
+
+    A tick that raises sends back a RuntimeError with the traceback instead
+    of its snapshots.
+    """
+    cells = ShardCells(config)
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        try:
+            result = cells.run(*message)
+        except Exception:
+            result = RuntimeError(traceback.format_exc())
+        connection.send(result)
+    connection.close()
+
+
+class ShardedTracker(StoneSoupTracker):
+    """Tracker split over square ENU cells, each updated by a worker process.
+
+    Every track is owned by the cell of its predicted position and is handed
+    over, with its id, when it crosses into another cell. A radar detection
+    goes to its own cell and to the cells of any tracks within the overlap
+    margin, so tracks near a boundary still see it, but only starts a track
+    when no other cell's track is that close. ADS-B detections go to the
+    cell of their aircraft's track and bistatic ones to their track's cell.
+
+    After each tick the cells' snapshots are gathered into this tracker's own
+    arrays and Track objects, so match_bistatic, predict_gates and the
+    checkpoints work as for a single tracker. Cell trackers keep no history.
+    """
+
+    def __init__(self, config=None):
+        """Initialize the tracker, see StoneSoupTracker for the shared config.
+
+        Extra config:
+            shard_cell_m: Side of each square cell (m)
+            shard_overlap_m: Overlap margin, the euclidean gate if None
+            shard_workers: Worker processes, one per core if None, or 0 to
+                run the cells in this process
+        """
+        super().__init__({"shard_cell_m": 50000.0, "shard_overlap_m": None, "shard_workers": None, **(config or {})})
+        if self.config["shard_overlap_m"] is None:
+            self.config["shard_overlap_m"] = self.config.get("gating_euclidean_threshold_m", 5000.0)
+        if self.config["shard_workers"] is None:
+            self.config["shard_workers"] = multiprocessing.cpu_count()
+        self.owner = {}
+        self.workers = None
+
+    def start(self):
+        """Start the workers if they are not running.
+
+        Returns:
+            List of ShardCells, or of (process, connection) per worker process.
+        """
+        if self.workers is None:
+            if self.config["shard_workers"] == 0:
+                self.workers = [ShardCells(self.config)]
+            else:
+                # forkserver avoids forking a parent with numba or BLAS threads
+                context = multiprocessing.get_context("forkserver")
+                self.workers = []
+                for _ in range(self.config["shard_workers"]):
+                    connection, child = context.Pipe()
+                    process = context.Process(target=_serve, args=(child, self.config), daemon=True)
+                    process.start()
+                    self.workers.append((process, connection))
+        return self.workers
+
+    def shutdown(self, timeout=10.0):
+        """Stop the workers and drop their cells, which are handed over again on the next tick.
+
+        Args:
+            timeout: Seconds to wait for each worker before terminating it
+        """
+        if self.workers is not None and self.config["shard_workers"] != 0:
+            for _, connection in self.workers:
+                try:
+                    connection.send(None)
+                except OSError:
+                    # the worker has already gone
+                    pass
+            for process, connection in self.workers:
+                process.join(timeout)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+                connection.close()
+        self.workers = None
+        self.owner = {}
+
+    def restore_checkpoint(self, path, current_timestamp_ms, max_age_s=None):
+        """Restore as StoneSoupTracker, handing every track to its cell on the next tick."""
+        restored = super().restore_checkpoint(path, current_timestamp_ms, max_age_s)
+        if restored:
+            self.shutdown()
+        return restored
+
+    def _cells(self, positions):
+        """Cell (i, j) of each ENU position."""
+        index = np.floor(np.reshape(positions, (-1, 3))[:, :2] / self.config["shard_cell_m"])
+        return [tuple(cell) for cell in index.astype(int).tolist()]
+
+    def _dispatch(self, current_timestamp_ms, commands):
+        """Run the commands on the workers owning each cell and gather their snapshots.
+
+        Returns:
+            Snapshots by cell from each worker, or None if a worker failed, in
+            which case the workers are stopped and the next tick hands this
+            tracker's tracks to new ones.
+        """
+        workers = self.start()
+        batches = [{} for _ in workers]
+        for cell, command in commands.items():
+            batches[hash(cell) % len(workers)][cell] = command
+        if self.config["shard_workers"] == 0:
+            return [workers[0].run(current_timestamp_ms, batches[0])]
+        try:
+            for (_, connection), batch in zip(workers, batches):
+                connection.send((current_timestamp_ms, batch))
+            results = [connection.recv() for _, connection in workers]
+        except (EOFError, OSError) as e:
+            results = [e]
+        failed = [result for result in results if isinstance(result, BaseException)]
+        if failed:
+            logger.error("Shard worker failed, restarting the workers: %s", failed[0])
+            self.shutdown(timeout=1.0)
+            return None
+        return results
+
+    def update_all_tracks(
+        self,
+        all_localised_detections_lla,
+        current_timestamp_ms,
+        adsb_detections_lla=None,
+        bistatic_detections=None,
+    ):
+        """Route the detections to the cells, update them in parallel and gather the tracks."""
+        current_s = current_timestamp_ms / 1000.0
+        commands = defaultdict(dict)
+
+        # hand each track to the cell of its predicted position
+        predicted = self._predicted(np.maximum(current_s - self.times_s, 0))[0][:, :3]
+        homes = self._cells(predicted)
+        moved = defaultdict(list)
+        for row, track_id in enumerate(self.track_ids):
+            owner = self.owner.get(track_id)
+            if owner != homes[row]:
+                if owner is not None:
+                    commands[owner].setdefault("drop", []).append(track_id)
+                moved[homes[row]].append(row)
+        for cell, rows in moved.items():
+            commands[cell]["adopt"] = self.snapshot(rows)
+        if moved:
+            logger.debug("Handing over %d tracks", sum(len(rows) for rows in moved.values()))
+        owner = {track_id: homes[row] for row, track_id in enumerate(self.track_ids)}
+
+        # radar detections reach every cell with a track close enough to take them
+        positions, _, metadata = self._convert_localised_detections(all_localised_detections_lla)
+        cells = self._cells(positions)
+        others = defaultdict(set)
+        rows, columns, _ = SpatialIndex(predicted).pairs(positions, self.config["shard_overlap_m"])
+        for row, column in zip(rows, columns):
+            if homes[row] != cells[column]:
+                others[column].add(homes[row])
+        for column, det_data in enumerate(metadata):
+            commands[cells[column]].setdefault("radar", []).append(
+                {**det_data, "initiate": False} if others[column] else det_data
+            )
+            for cell in others[column]:
+                commands[cell].setdefault("radar", []).append({**det_data, "initiate": False})
+
+        # ADS-B goes to its aircraft's track, bistatic to the matched track
+        positions, _, metadata = self._convert_localised_detections(adsb_detections_lla or [])
+        for det_data, home in zip(metadata, self._cells(positions)):
+            track_id = self.hex_index.get((det_data.get("adsb_info") or {}).get("hex"))
+            commands[owner.get(track_id, home)].setdefault("adsb", []).append(det_data)
+        for det_data in bistatic_detections or []:
+            if det_data["track_id"] in owner:
+                commands[owner[det_data["track_id"]]].setdefault("bistatic", []).append(det_data)
+
+        results = self._dispatch(current_timestamp_ms, dict(commands))
+        if results is None:
+            # the tracks keep their last state until new workers take them
+            return self.active_tracks.copy()
+        snapshots = [(cell, snapshot) for result in results for cell, snapshot in result.items()]
+        self._gather(snapshots, current_timestamp_ms)
+        return self.active_tracks.copy()
+
+    def _gather(self, snapshots, current_timestamp_ms):
+        """Replace the tracker's arrays and tracks with the cells' snapshots."""
+        if not snapshots:
+            snapshots = [(None, self.snapshot([]))]
+        self.track_ids = [
+            track_id for _, snapshot in snapshots for track_id in snapshot["track_ids"].tolist()
+        ]
+        self.rows = {track_id: row for row, track_id in enumerate(self.track_ids)}
+        self.owner = {
+            track_id: cell
+            for cell, snapshot in snapshots
+            if cell is not None
+            for track_id in snapshot["track_ids"].tolist()
+        }
+        for name in ["means", "covars", "times_s", "mode_means", "mode_covars", "mode_probs"]:
+            setattr(self, name, np.concatenate([snapshot[name] for _, snapshot in snapshots]))
+        self.hex_index = {}
+        for _, snapshot in snapshots:
+            self.hex_index.update(json.loads(str(snapshot["hex_index"])))
+        fields = {
+            name: np.concatenate([snapshot[name] for _, snapshot in snapshots])
+            for name in ["status", "hits", "misses", "age_scans", "timestamp_update_ms", "adsb_info"]
+        }
+
+        self.updated_s = fields["timestamp_update_ms"] / 1000.0
+
+        tracks = {}
+        for row, track_id in enumerate(self.track_ids):
+            track = self.active_tracks.get(track_id) or Track(id=track_id)
+            track.status = TrackStatus[fields["status"][row]]
+            track.hits = int(fields["hits"][row])
+            track.misses = int(fields["misses"][row])
+            track.age_scans = int(fields["age_scans"][row])
+            track.adsb_info = json.loads(fields["adsb_info"][row])
+            track.timestamp_update_ms = float(fields["timestamp_update_ms"][row])
+            track.record_state(self.means[row], self.covars[row], current_timestamp_ms)
+            tracks[track_id] = track
+        self.active_tracks = tracks
+        self.last_timestamp_ms = current_timestamp_ms
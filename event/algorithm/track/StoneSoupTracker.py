@@ -1,36 +1,59 @@
-from datetime import datetime
+import json
+import logging
+import os
 
 import numpy as np
-from stonesoup.dataassociator.neighbour import GNNWith2DAssignment
-from stonesoup.gater.distance import DistanceGater
-from stonesoup.hypothesiser.distance import DistanceHypothesiser
-from stonesoup.measures import Mahalanobis
-from stonesoup.predictor.kalman import KalmanPredictor
-from stonesoup.tracker.simple import MultiTargetTracker
-from stonesoup.types.detection import Detection
-from stonesoup.types.state import GaussianState
-from stonesoup.updater.kalman import KalmanUpdater
+from scipy.optimize import linear_sum_assignment
+from scipy.stats import chi2
 
 from ..geometry.Geometry import Geometry
+from ..geometry.LocalFrame import LocalFrame
+from ..geometry.SpatialIndex import SpatialIndex
+from ..Log import Sampler, get_logger
 from ..models.MeasurementModels import create_enu_position_measurement_model
-from ..models.MotionModels import create_enu_constant_velocity_model
+from .BatchIMM import BatchIMM
+from .BatchKalman import BatchKalman
+from .BistaticEKF import BistaticEKF
+from .GatedAssignment import GatedAssignment
 from .Track import Track, TrackStatus
 
+logger = get_logger("track")
+sample = Sampler()
+
 
 class StoneSoupTracker:
-    """Stone Soup MultiTargetTracker wrapper maintaining compatibility with existing Track interface."""
+    """Multi-target tracker on Stone Soup models maintaining compatibility with existing Track interface.
+
+    Track means and covariances live in stacked (N, 6) and (N, 6, 6) arrays, one
+    row per entry of track_ids, so predict and update run for every track in one
+    batch. Track objects are only written at the end of each tick.
+    """
     
     def __init__(self, config=None):
-        """Initialize Stone Soup tracker with 3lips-compatible configuration."""
+        """Initialize tracker with 3lips-compatible configuration."""
         self.config = {
             "max_misses_to_delete": 5,
             "min_hits_to_confirm": 3,
+            "max_misses_to_coast": 3,  # Confirmed tracks coast after more misses
+            "max_tentative_s": 5.0,  # Delete tentative tracks unseen for longer, if set
+            "max_coast_s": 10.0,  # Delete any track unseen for longer, if set
+            "max_position_trace_m2": 1e8,  # Delete tracks with a larger position covariance trace, if set
             "gating_mahalanobis_threshold": 1000.0,  # Very permissive gating
+            "association_measure": "euclidean",  # or "mahalanobis" for radar assignment
             "initial_pos_uncertainty_enu_m": [1000.0, 1000.0, 1000.0],  # Higher uncertainty
             "initial_vel_uncertainty_enu_mps": [100.0, 100.0, 100.0],  # Moderate velocity uncertainty
-            "dt_default_s": 1.0,
             "process_noise_coeff": 0.1,  # Lower process noise 
+            "motion_model": "cv",  # or "imm" to mix constant velocity and acceleration
+            "acceleration_noise_coeff": 1.0,  # Constant acceleration model of the IMM
+            "imm_switch_probability": 0.05,  # Chance of changing IMM model per tick
             "measurement_noise_coeff": 1000.0,  # Higher measurement noise
+            "max_gdop": None,  # Reject detections with worse GDOP, if set
+            "bistatic_range_std_m": 100.0,  # Bistatic range noise for direct updates
+            "bistatic_range_rate_std_mps": 5.0,  # Range rate noise from Doppler
+            "bistatic_gate_probability": 0.999,  # Chi-squared gate on bistatic ranges
+            "bistatic_min_radars": 2,  # Radars needed to match a target to a track
+            "localisation_gate_sigma": 3.0,  # Gate radius in position standard deviations
+            "localisation_gate_min_m": 500.0,  # Smallest gate radius for localisation
             "verbose": False,  # Disable debugging for normal operation
             "ref_lat": -34.9286,  # Adelaide reference latitude
             "ref_lon": 138.5999,  # Adelaide reference longitude  
@@ -39,359 +62,662 @@ class StoneSoupTracker:
         if config:
             self.config.update(config)
 
-        # Initialize Stone Soup components
-        self.transition_model = create_enu_constant_velocity_model(
-            noise_diff_coeff=self.config["process_noise_coeff"]
+        # Exact ENU frame about the reference point, shared with Track
+        self.frame = LocalFrame(
+            self.config["ref_lat"], self.config["ref_lon"], self.config["ref_alt"]
         )
+
+        # Stone Soup measurement model, the batch filters predict on stacked arrays
         self.measurement_model = create_enu_position_measurement_model(
             noise_covariance=np.diag([self.config["measurement_noise_coeff"]**2] * 3)
         )
-        
-        self.predictor = KalmanPredictor(self.transition_model)
-        self.updater = KalmanUpdater(self.measurement_model)
-        
-        # Use Euclidean distance for simpler, more reliable gating
-        from stonesoup.measures import Euclidean
-        self.hypothesiser = DistanceHypothesiser(
-            predictor=self.predictor,
-            updater=self.updater,
-            measure=Euclidean(),
-            missed_distance=self.config.get("gating_euclidean_threshold_m", 5000.0)
+        self.kalman = BatchKalman(self.config["process_noise_coeff"])
+        self.bistatic = BistaticEKF(
+            self.config["bistatic_range_std_m"], self.config["bistatic_range_rate_std_mps"]
         )
-        
-        self.data_associator = GNNWith2DAssignment(self.hypothesiser)
-        
-        # Gater for initial filtering
-        self.gater = DistanceGater(
-            hypothesiser=self.hypothesiser,
-            measure=Euclidean(),
-            gate_threshold=self.config.get("gating_euclidean_threshold_m", 5000.0)
-        )
-        
-        # Initialize multi-target tracker
-        self.tracker = MultiTargetTracker(
-            initiator=None,  # We'll handle initiation manually
-            deleter=None,    # We'll handle deletion manually
-            detector=None,   # We provide detections directly
-            data_associator=self.data_associator,
-            updater=self.updater
+        # TX and RX of each radar in the tracker frame, by their LLA
+        self.nodes = {}
+        if self.config["motion_model"] == "imm":
+            self.imm = BatchIMM(
+                self.config["process_noise_coeff"],
+                self.config["acceleration_noise_coeff"],
+                self.config["imm_switch_probability"],
+            )
+        elif self.config["motion_model"] == "cv":
+            self.imm = None
+        else:
+            raise ValueError(f"Unknown motion model: {self.config['motion_model']}")
+        self.assignment = GatedAssignment(
+            self.config["association_measure"],
+            self.config.get("gating_euclidean_threshold_m", 5000.0),
+            self.config["gating_mahalanobis_threshold"],
         )
-        
+
         # Track management
         self.active_tracks = {}
         self.last_timestamp_ms = None
+
+        # Stacked track states, row i belongs to track_ids[i]
+        self.track_ids = []
+        self.rows = {}
+        self.means = np.zeros((0, 6))
+        self.covars = np.zeros((0, 6, 6))
+        self.times_s = np.zeros(0)
+        # time of each row's last detection, for expiry
+        self.updated_s = np.zeros(0)
+        # IMM model states per row, with no models unless motion_model is "imm"
+        self.mode_means, self.mode_covars, self.mode_probs = self._initiate_modes(
+            self.means, self.covars
+        )
+
+        # ICAO hex of each ADS-B aircraft to the id of the track it updates
+        self.hex_index = {}
         
         if self.config["verbose"]:
-            print(f"StoneSoupTracker initialized with config: {self.config}")
+            logger.setLevel(logging.DEBUG)
+        logger.debug("StoneSoupTracker initialized with config: %s", self.config)
 
-    def _convert_localised_detections_to_stone_soup_detections(self, localised_detections_lla, timestamp_ms):
-        """Convert 3lips detections to Stone Soup Detection objects."""
-        detections = []
-        
+    def _convert_localised_detections(self, localised_detections_lla):
+        """Convert 3lips detections to ENU positions, measurement noise and metadata."""
+        valid = []
+        max_gdop = self.config.get("max_gdop")
         for det_data in localised_detections_lla:
             try:
                 lat, lon, alt = det_data["lla_position"]
-                east, north, up = Geometry.lla2enu(
-                    lat, lon, alt,
-                    self.config["ref_lat"], self.config["ref_lon"], self.config["ref_alt"]
-                )
-                
-                detection = Detection(
-                    state_vector=np.array([east, north, up]),
-                    timestamp=datetime.fromtimestamp(timestamp_ms / 1000.0),
-                    metadata=det_data
-                )
-                detections.append(detection)
-                
+                if max_gdop is not None and det_data.get("gdop", 0) > max_gdop:
+                    logger.debug("Rejected detection with GDOP %s: %s", det_data["gdop"], det_data)
+                    continue
+                valid.append((det_data, [float(lat), float(lon), float(alt)]))
             except Exception as e:
-                if self.config["verbose"]:
-                    print(f"Error converting detection to Stone Soup format: {det_data}, Error: {e}")
+                logger.warning("Error converting detection to tracker format: %s, Error: %s", det_data, e)
                 continue
-                
-        return detections
 
-    def _initiate_new_track(self, detection, status=TrackStatus.TENTATIVE):
-        """Create new track from unassociated detection."""
-        measurement_pos_enu = detection.state_vector.flatten()
-        
-        initial_state_vector = np.concatenate([measurement_pos_enu, np.zeros(3)])
-        
-        pos_uncertainty = np.array(self.config["initial_pos_uncertainty_enu_m"])
-        vel_uncertainty = np.array(self.config["initial_vel_uncertainty_enu_mps"])
-        
-        initial_covariance = np.block([
-            [np.diag(pos_uncertainty**2), np.zeros((3, 3))],
-            [np.zeros((3, 3)), np.diag(vel_uncertainty**2)]
-        ])
-        
-        initial_state = GaussianState(
-            state_vector=initial_state_vector,
-            covar=initial_covariance,
-            timestamp=detection.timestamp
+        if not valid:
+            return np.zeros((0, 3)), np.zeros((0, 3, 3)), []
+
+        lla = np.array([lla for _, lla in valid])
+        positions_enu = self.frame.lla2enu(lla)
+        noise = np.repeat(
+            np.asarray(self.measurement_model.covar(), dtype=float)[None], len(valid), axis=0
         )
-        
-        metadata = detection.metadata if hasattr(detection, 'metadata') else {}
-        adsb_info = metadata.get("adsb_info", None)
-        
-        new_track = Track(
-            initial_detection=metadata,
-            timestamp_ms=int(detection.timestamp.timestamp() * 1000),
-            status=status,
-            adsb_info=adsb_info
+        # covariance is given in ENU at the detection, rotate to tracker frame
+        rotations = self.frame.rotation @ np.swapaxes(Geometry.enu_rotation(lla), 1, 2)
+        for index, ((det_data, _), rotation) in enumerate(zip(valid, rotations)):
+            if det_data.get("covariance") is not None:
+                noise[index] = rotation @ np.asarray(det_data["covariance"]) @ rotation.T
+
+        return positions_enu, noise, [det_data for det_data, _ in valid]
+
+    def _initiate_new_tracks(self, positions, noise, metadata, timestamp_ms, status=TrackStatus.TENTATIVE):
+        """Create new tracks from unassociated detections."""
+        if not metadata:
+            return
+
+        means = np.hstack([positions, np.zeros_like(positions)])
+        covars = np.zeros((len(metadata), 6, 6))
+        covars[:, :3, :3] = np.diag(np.array(self.config["initial_pos_uncertainty_enu_m"]) ** 2)
+        covars[:, 3:, 3:] = np.diag(np.array(self.config["initial_vel_uncertainty_enu_mps"]) ** 2)
+
+        for index, det_data in enumerate(metadata):
+            # use the localiser's covariance for position when it provides one
+            if det_data.get("covariance") is not None:
+                covars[index, :3, :3] = noise[index]
+
+            new_track = Track(
+                initial_detection=det_data,
+                timestamp_ms=timestamp_ms,
+                status=status,
+                adsb_info=det_data.get("adsb_info", None)
+            )
+            new_track.record_state(means[index], covars[index], timestamp_ms)
+            self.active_tracks[new_track.id] = new_track
+            self.rows[new_track.id] = len(self.track_ids)
+            self.track_ids.append(new_track.id)
+            self._bind_hex(det_data, new_track.id)
+
+            if logger.isEnabledFor(logging.DEBUG) and sample():
+                track_type = "ADS-B confirmed" if status == TrackStatus.CONFIRMED else "radar tentative"
+                logger.debug("Initiated new %s track: %s at ENU %s", track_type, new_track.id, positions[index])
+
+        self.means = np.concatenate([self.means, means])
+        self.covars = np.concatenate([self.covars, covars])
+        self.times_s = np.concatenate([self.times_s, np.full(len(metadata), timestamp_ms / 1000.0)])
+        self.updated_s = np.concatenate([self.updated_s, np.full(len(metadata), timestamp_ms / 1000.0)])
+        mode_means, mode_covars, mode_probs = self._initiate_modes(means, covars)
+        self.mode_means = np.concatenate([self.mode_means, mode_means])
+        self.mode_covars = np.concatenate([self.mode_covars, mode_covars])
+        self.mode_probs = np.concatenate([self.mode_probs, mode_probs])
+
+    def _initiate_modes(self, means, covars):
+        """IMM model states for new rows, empty along the model axis without IMM."""
+        if self.imm is not None:
+            return self.imm.initiate(means, covars)
+        n = len(means)
+        return np.zeros((n, 0, 9)), np.zeros((n, 0, 9, 9)), np.zeros((n, 0))
+
+    def _predicted(self, dt):
+        """Means and covariances of every row predicted by dt, leaving the tracker unchanged."""
+        if self.imm is None:
+            return self.kalman.predict(self.means, self.covars, dt)
+        return self.imm.combine(
+            *self.imm.predict(self.mode_means, self.mode_covars, self.mode_probs, dt)
         )
-        
-        new_track.append(initial_state)
-        new_track.state_vector = initial_state_vector
-        new_track.covariance_matrix = initial_covariance
-        
-        self.active_tracks[new_track.id] = new_track
-        
-        if self.config["verbose"]:
-            track_type = "ADS-B confirmed" if status == TrackStatus.CONFIRMED else "radar tentative"
-            print(f"Initiated new {track_type} track: {new_track.id} at ENU {measurement_pos_enu}")
-        
-        return new_track
 
-    def _manage_track_lifecycle(self):
-        """Update track statuses and delete old tracks."""
-        tracks_to_delete = []
-        
-        for track_id, track in self.active_tracks.items():
-            # Promote tentative to confirmed
-            if (track.status == TrackStatus.TENTATIVE and 
-                track.hits >= self.config["min_hits_to_confirm"]):
-                track.status = TrackStatus.CONFIRMED
-                if self.config["verbose"]:
-                    print(f"Track {track_id} confirmed.")
-            
-            # Delete tracks with too many misses
-            if track.misses > self.config["max_misses_to_delete"]:
-                tracks_to_delete.append(track_id)
-                if self.config["verbose"]:
-                    print(f"Track {track_id} marked for deletion (misses: {track.misses}).")
-        
-        for track_id in tracks_to_delete:
-            if track_id in self.active_tracks:
-                del self.active_tracks[track_id]
-                if self.config["verbose"]:
-                    print(f"Deleted Track {track_id}.")
-
-    def update_all_tracks(self, all_localised_detections_lla, current_timestamp_ms, adsb_detections_lla=None):
-        """Main entry point compatible with existing Tracker interface."""
-        if self.config["verbose"]:
-            print(f"[STONE_SOUP] update_all_tracks called with {len(all_localised_detections_lla)} detections, {len(self.active_tracks)} existing tracks")
-            
-        if self.last_timestamp_ms is None:
-            self.last_timestamp_ms = current_timestamp_ms - (self.config["dt_default_s"] * 1000)
+    def _predict(self, dt):
+        """Predict every row forward by its own time step in one batch."""
+        if self.imm is None:
+            self.means, self.covars = self.kalman.predict(self.means, self.covars, dt)
+            return
+        self.mode_means, self.mode_covars, self.mode_probs = self.imm.predict(
+            self.mode_means, self.mode_covars, self.mode_probs, dt
+        )
+        self.means, self.covars = self.imm.combine(self.mode_means, self.mode_covars, self.mode_probs)
 
-        dt_seconds = (current_timestamp_ms - self.last_timestamp_ms) / 1000.0
-        if dt_seconds <= 0:
-            if self.config["verbose"]:
-                print(f"Warning: dt_seconds is not positive ({dt_seconds}). Using default: {self.config['dt_default_s']}s")
-            dt_seconds = self.config["dt_default_s"]
+    def _update_rows(self, rows, positions, noise, metadata, updated):
+        """Kalman update the given rows in one batch, one detection per row."""
+        if len(rows) == 0:
+            return
+        rows = np.asarray(rows)
+        if self.imm is None:
+            self.means[rows], self.covars[rows] = self.kalman.update(
+                self.means[rows], self.covars[rows], positions, noise
+            )
+        else:
+            mode_means, mode_covars, mode_probs = self.imm.update(
+                self.mode_means[rows], self.mode_covars[rows], self.mode_probs[rows], positions, noise
+            )
+            self.mode_means[rows], self.mode_covars[rows], self.mode_probs[rows] = (
+                mode_means, mode_covars, mode_probs
+            )
+            self.means[rows], self.covars[rows] = self.imm.combine(mode_means, mode_covars, mode_probs)
+        updated[rows] = True
+        for row, det_data in zip(rows, metadata):
+            self.active_tracks[self.track_ids[row]].update_custom(
+                det_data, adsb_info=det_data.get("adsb_info")
+            )
+            self._bind_hex(det_data, self.track_ids[row])
 
-        self.last_timestamp_ms = current_timestamp_ms
-        current_time = datetime.fromtimestamp(current_timestamp_ms / 1000.0)
+    def _bistatic_arrays(self, measurements):
+        """TX and RX positions, bistatic ranges and range rates of radar measurements."""
+        nodes = []
+        for measurement in measurements:
+            key = (tuple(measurement["tx_lla"]), tuple(measurement["rx_lla"]))
+            if key not in self.nodes:
+                self.nodes[key] = self.frame.lla2enu([measurement["tx_lla"], measurement["rx_lla"]])
+            nodes.append(self.nodes[key])
+        nodes = np.array(nodes, dtype=float).reshape(-1, 2, 3)
+        ranges = np.array([measurement["range_m"] for measurement in measurements], dtype=float)
+        range_rates = np.array(
+            [
+                np.nan if measurement.get("range_rate_mps") is None else measurement["range_rate_mps"]
+                for measurement in measurements
+            ],
+            dtype=float,
+        )
+        return nodes[:, 0], nodes[:, 1], ranges, range_rates
+
+    def match_bistatic(self, targets, current_timestamp_ms):
+        """Match associated targets to confirmed tracks by their bistatic ranges.
 
-        # Convert detections to Stone Soup format
-        radar_detections = self._convert_localised_detections_to_stone_soup_detections(
-            all_localised_detections_lla, current_timestamp_ms
+        Args:
+            targets: Radar measurements by target id, each a list of dicts with
+                tx_lla, rx_lla, range_m and optionally range_rate_mps
+            current_timestamp_ms: Time to predict the tracks to (ms)
+
+        Returns:
+            Track id by target id, for targets inside a confirmed track's gate.
+        """
+        keys = [key for key, measurements in targets.items() if len(measurements) >= self.config["bistatic_min_radars"]]
+        confirmed = np.array(
+            [
+                row
+                for row, track_id in enumerate(self.track_ids)
+                if self.active_tracks[track_id].status == TrackStatus.CONFIRMED
+            ],
+            dtype=int,
         )
-        
-        adsb_detections = []
-        if adsb_detections_lla:
-            adsb_detections = self._convert_localised_detections_to_stone_soup_detections(
-                adsb_detections_lla, current_timestamp_ms
+        if not keys or len(confirmed) == 0:
+            return {}
+
+        means, covars = self._predicted(np.maximum(current_timestamp_ms / 1000.0 - self.times_s, 0))
+        means, covars = means[confirmed], covars[confirmed]
+        cost = np.full((len(keys), len(confirmed)), np.inf)
+        for index, key in enumerate(keys):
+            tx, rx, ranges, _ = self._bistatic_arrays(targets[key])
+            distance = self.bistatic.costs(means, covars, tx, rx, ranges)
+            gated = distance < chi2.ppf(self.config["bistatic_gate_probability"], len(ranges))
+            cost[index, gated] = distance[gated]
+        if not np.isfinite(cost).any():
+            return {}
+
+        infeasible = (cost[np.isfinite(cost)].max() + 1) * sum(cost.shape)
+        cost[~np.isfinite(cost)] = infeasible
+        matched_keys, matched_rows = linear_sum_assignment(cost)
+        return {
+            keys[i]: self.track_ids[confirmed[j]]
+            for i, j in zip(matched_keys, matched_rows)
+            if cost[i, j] < infeasible
+        }
+
+    def predict_gates(self, targets, current_timestamp_ms):
+        """Gates about the predicted positions of tracks, for localisation.
+
+        Args:
+            targets: Track id by target id
+            current_timestamp_ms: Time to predict the tracks to (ms)
+
+        Returns:
+            ([lat, lon, alt], radius in m) by target id. The radius is
+            localisation_gate_sigma standard deviations along the track's
+            least certain axis, and at least localisation_gate_min_m.
+        """
+        targets = {key: track_id for key, track_id in targets.items() if track_id in self.rows}
+        if not targets:
+            return {}
+        rows = np.array([self.rows[track_id] for track_id in targets.values()], dtype=int)
+        means, covars = self._predicted(np.maximum(current_timestamp_ms / 1000.0 - self.times_s, 0))
+        spread = np.sqrt(np.linalg.eigvalsh(covars[rows, :3, :3])[:, -1])
+        radius = np.maximum(
+            self.config["localisation_gate_sigma"] * spread, self.config["localisation_gate_min_m"]
+        )
+        lla = self.frame.enu2lla(means[rows, :3]).reshape(-1, 3)
+        return {
+            key: (position, float(r))
+            for key, position, r in zip(targets, lla.tolist(), radius)
+        }
+
+    def _update_bistatic(self, detections, updated):
+        """Update matched tracks from their bistatic measurements, one radar at a time."""
+        detections = [det_data for det_data in detections if det_data["track_id"] in self.rows]
+        if not detections:
+            return
+        rows, slots, measurements = [], [], []
+        count = {}
+        for det_data in detections:
+            row = self.rows[det_data["track_id"]]
+            for measurement in det_data["measurements"]:
+                rows.append(row)
+                slots.append(count.get(row, 0))
+                count[row] = slots[-1] + 1
+                measurements.append(measurement)
+        rows, slots = np.array(rows, dtype=int), np.array(slots, dtype=int)
+        tx, rx, ranges, range_rates = self._bistatic_arrays(measurements)
+
+        # each pass updates every track with its next radar
+        for slot in range(slots.max() + 1):
+            selected = slots == slot
+            self._update_bistatic_rows(
+                rows[selected], tx[selected], rx[selected], ranges[selected], range_rates[selected]
             )
 
-        for detection in adsb_detections:
-            associated = False
-            
-            for track_id, track in self.active_tracks.items():
-                if track.states and len(track.states) > 0:
-                    last_state = track.states[-1]
-                    
-                    predicted_state = self.predictor.predict(last_state, timestamp=current_time)
-                    
-                    try:
-                        gated_detections = self.gater.gate_state([detection], predicted_state)
-                        if gated_detections:
-                            updated_state = self.updater.update(
-                                prediction=predicted_state,
-                                detection=detection
-                            )
-                            
-                            track.append(updated_state)
-                            track.state_vector = updated_state.state_vector
-                            track.covariance_matrix = updated_state.covar
-                            track.update_custom(detection.metadata if hasattr(detection, 'metadata') else {})
-                            track.increment_age()
-                            
-                            associated = True
-                            if self.config["verbose"]:
-                                adsb_hex = detection.metadata.get("adsb_info", {}).get("hex", "unknown") if hasattr(detection, 'metadata') else "unknown"
-                                print(f"Updated track {track_id} with ADS-B detection from aircraft {adsb_hex}")
-                            break
-                    except Exception as e:
-                        if self.config["verbose"]:
-                            print(f"Error in ADS-B association for track {track_id}: {e}")
-                        continue
-            
-            if not associated:
-                self._initiate_new_track(detection, status=TrackStatus.CONFIRMED)
+        for det_data in detections:
+            row = self.rows[det_data["track_id"]]
+            updated[row] = True
+            self.active_tracks[det_data["track_id"]].update_custom(det_data)
 
-        if radar_detections:
-            track_states = []
-            track_ids = []
-            
-            for track_id, track in self.active_tracks.items():
-                if hasattr(track, 'states') and track.states and len(track.states) > 0:
-                    last_state = track.states[-1]
-                    try:
-                        from stonesoup.types.state import GaussianState
-                        dt = (current_time - last_state.timestamp).total_seconds()
-                        
-                        state_vec = last_state.state_vector.copy()
-                        state_vec[0] += state_vec[3] * dt
-                        state_vec[1] += state_vec[4] * dt
-                        state_vec[2] += state_vec[5] * dt
-                        
-                        covar = last_state.covar.copy()
-                        process_noise = self.config["process_noise_coeff"] * dt
-                        covar[0, 0] += process_noise**2
-                        covar[1, 1] += process_noise**2
-                        covar[2, 2] += process_noise**2
-                        
-                        predicted_state = GaussianState(
-                            state_vector=state_vec,
-                            covar=covar,
-                            timestamp=current_time
-                        )
-                        
-                        track_states.append(predicted_state)
-                        track_ids.append(track_id)
-                    except Exception as e:
-                        if self.config["verbose"]:
-                            print(f"Error predicting track {track_id}: {e}")
-                        continue
-
-            if track_states:
-                if self.config["verbose"]:
-                    print(f"[STONE_SOUP] Starting data association with {len(track_states)} tracks and {len(radar_detections)} detections")
-                
-                associated_pairs = []
-                unassociated_tracks = list(track_states)
-                unassociated_detections = list(radar_detections)
-                
-                gating_threshold = self.config.get("gating_euclidean_threshold_m", 5000.0)
-                
-                for i, track_state in enumerate(track_states):
-                    track_id = track_ids[i]
-                    track_pos = track_state.state_vector[:3].flatten()
-                    
-                    best_detection = None
-                    best_distance = float('inf')
-                    
-                    for detection in radar_detections:
-                        detection_pos = detection.state_vector.flatten()
-                        distance = np.linalg.norm(track_pos - detection_pos)
-                        
-                        if distance < gating_threshold and distance < best_distance:
-                            best_detection = detection
-                            best_distance = distance
-                    
-                    if best_detection is not None:
-                        associated_pairs.append((track_state, best_detection))
-                        if track_state in unassociated_tracks:
-                            unassociated_tracks.remove(track_state)
-                        if best_detection in unassociated_detections:
-                            unassociated_detections.remove(best_detection)
-                        
-                        if self.config["verbose"]:
-                            print(f"Associated track {track_id} with detection at distance {best_distance:.2f}m")
-                
-                for track_state, detection in associated_pairs:
-                    track_idx = track_states.index(track_state)
-                    track_id = track_ids[track_idx]
-                    track = self.active_tracks[track_id]
-                    
-                    if self.config["verbose"]:
-                        print(f"Associating detection to track {track_id}")
-                    
-                    try:
-                        updated_state = self.updater.update(track_state, detection)
-                    except TypeError:
-                        from stonesoup.types.state import GaussianState
-                        detection_pos = detection.state_vector.flatten()
-                        current_vel = track_state.state_vector[3:6].flatten()
-                        
-                        updated_state_vector = np.concatenate([detection_pos, current_vel])
-                        
-                        updated_state = GaussianState(
-                            state_vector=updated_state_vector.reshape(-1, 1),
-                            covar=track_state.covar.copy(),
-                            timestamp=current_time
-                        )
-                    
-                    track.append(updated_state)
-                    track.state_vector = updated_state.state_vector
-                    track.covariance_matrix = updated_state.covar
-                    track.update_custom(detection.metadata if hasattr(detection, 'metadata') else {})
-                    track.increment_age()
-                
-                for track_state in unassociated_tracks:
-                    if track_state in track_states:
-                        track_idx = track_states.index(track_state)
-                        track_id = track_ids[track_idx]
-                        track = self.active_tracks[track_id]
-                        
-                        if self.config["verbose"]:
-                            print(f"Track {track_id} unassociated, predicting...")
-                        
-                        predicted_state = self.predictor.predict(track.states[-1], timestamp=current_time)
-                        track.append(predicted_state)
-                        track.state_vector = predicted_state.state_vector
-                        track.covariance_matrix = predicted_state.covar
-                        track.increment_misses()
-                        track.increment_age()
-                
-                for detection in unassociated_detections:
-                    if self.config["verbose"]:
-                        print(f"Creating new track for unassociated detection")
-                    self._initiate_new_track(detection, status=TrackStatus.TENTATIVE)
+    def _update_bistatic_rows(self, rows, tx, rx, ranges, range_rates):
+        """EKF update of the given rows, one bistatic measurement per row."""
+        if self.imm is None:
+            self.means[rows], self.covars[rows], _ = self.bistatic.update(
+                self.means[rows], self.covars[rows], tx, rx, ranges, range_rates
+            )
+            return
+        models = self.imm.n_models
+        mode_means, mode_covars, log_likelihood = self.bistatic.update(
+            self.mode_means[rows].reshape(-1, 9),
+            self.mode_covars[rows].reshape(-1, 9, 9),
+            np.repeat(tx, models, axis=0),
+            np.repeat(rx, models, axis=0),
+            np.repeat(ranges, models),
+            np.repeat(range_rates, models),
+        )
+        self.mode_means[rows] = mode_means.reshape(-1, models, 9)
+        self.mode_covars[rows] = mode_covars.reshape(-1, models, 9, 9)
+        self.mode_probs[rows] = self.imm.reweight(
+            self.mode_probs[rows], log_likelihood.reshape(-1, models)
+        )
+        self.means[rows], self.covars[rows] = self.imm.combine(
+            self.mode_means[rows], self.mode_covars[rows], self.mode_probs[rows]
+        )
+
+    def _bind_hex(self, det_data, track_id):
+        """Index the track by the ICAO hex of an ADS-B detection, if it has one."""
+        hex_code = (det_data.get("adsb_info") or {}).get("hex")
+        if hex_code is not None:
+            self.hex_index[hex_code] = track_id
+
+    def _remove_tracks(self, track_ids):
+        """Drop tracks and their rows from the stacked state."""
+        removed = set(track_ids)
+        keep = np.array([track_id not in removed for track_id in self.track_ids], dtype=bool)
+        self.track_ids = [track_id for track_id in self.track_ids if track_id not in removed]
+        self.means = self.means[keep]
+        self.covars = self.covars[keep]
+        self.times_s = self.times_s[keep]
+        self.updated_s = self.updated_s[keep]
+        self.mode_means = self.mode_means[keep]
+        self.mode_covars = self.mode_covars[keep]
+        self.mode_probs = self.mode_probs[keep]
+        self.rows = {track_id: row for row, track_id in enumerate(self.track_ids)}
+        for track_id in removed:
+            track = self.active_tracks.pop(track_id, None)
+            hex_code = (track.adsb_info or {}).get("hex") if track is not None else None
+            if self.hex_index.get(hex_code) == track_id:
+                del self.hex_index[hex_code]
+
+    def _manage_track_lifecycle(self, current_s):
+        """Update track statuses and delete dead tracks in one pass over the rows.
+
+        Tentative tracks are confirmed after min_hits_to_confirm hits, and
+        confirmed tracks coast after more than max_misses_to_coast misses until
+        their next detection. A track is deleted after more than
+        max_misses_to_delete misses, when unseen for longer than max_coast_s,
+        or max_tentative_s while tentative, or when it misses a detection with
+        a position covariance trace above max_position_trace_m2. Limits that
+        are None are not applied.
+
+        Args:
+            current_s: Time of the tick (s)
+        """
+        if not self.track_ids:
+            return
+        tracks = [self.active_tracks[track_id] for track_id in self.track_ids]
+        status = np.array([track.status.value for track in tracks])
+        hits = np.array([track.hits for track in tracks])
+        misses = np.array([track.misses for track in tracks])
+
+        tentative = status == TrackStatus.TENTATIVE.value
+        confirm = tentative & (hits >= self.config["min_hits_to_confirm"])
+        confirm |= (status == TrackStatus.COASTING.value) & (misses == 0)
+        coast = (status == TrackStatus.CONFIRMED.value) & (misses > self.config["max_misses_to_coast"])
+        for rows, new_status in ((confirm, TrackStatus.CONFIRMED), (coast, TrackStatus.COASTING)):
+            for row in np.flatnonzero(rows):
+                logger.debug(
+                    "Track %s status changed: %s -> %s (hits: %d, misses: %d)",
+                    self.track_ids[row],
+                    tracks[row].status.name,
+                    new_status.name,
+                    hits[row],
+                    misses[row],
+                )
+                tracks[row].status = new_status
+        tentative &= ~confirm
+
+        unseen = current_s - self.updated_s
+        delete = misses > self.config["max_misses_to_delete"]
+        if self.config["max_tentative_s"] is not None:
+            delete |= tentative & (unseen > self.config["max_tentative_s"])
+        if self.config["max_coast_s"] is not None:
+            delete |= unseen > self.config["max_coast_s"]
+        if self.config["max_position_trace_m2"] is not None:
+            trace = np.trace(self.covars[:, :3, :3], axis1=1, axis2=2)
+            delete |= (misses > 0) & (trace > self.config["max_position_trace_m2"])
+        if not delete.any():
+            return
+
+        tracks_to_delete = [self.track_ids[row] for row in np.flatnonzero(delete)]
+        for row in np.flatnonzero(delete):
+            tracks[row].status = TrackStatus.DELETED
+        self._remove_tracks(tracks_to_delete)
+        logger.debug("Deleted tracks: %s", tracks_to_delete)
+
+    def update_all_tracks(
+        self,
+        all_localised_detections_lla,
+        current_timestamp_ms,
+        adsb_detections_lla=None,
+        bistatic_detections=None,
+    ):
+        """Main entry point compatible with existing Tracker interface.
+
+        bistatic_detections are targets matched by match_bistatic, each a dict
+        with track_id, source_target_id and its radar measurements, which
+        update their track directly instead of through a localised point.
+        """
+        logger.debug(
+            "update_all_tracks called with %d detections, %d existing tracks",
+            len(all_localised_detections_lla),
+            len(self.active_tracks),
+        )
+
+        if self.last_timestamp_ms is not None and current_timestamp_ms <= self.last_timestamp_ms:
+            logger.warning(
+                "Timestamp %s is not after %s, tracks are not predicted.",
+                current_timestamp_ms,
+                self.last_timestamp_ms,
+            )
+        self.last_timestamp_ms = current_timestamp_ms
+        current_s = current_timestamp_ms / 1000.0
+
+        # Predict every track to this tick in one batch
+        self._predict(np.maximum(current_s - self.times_s, 0))
+        self.times_s[:] = current_s
+        existing = len(self.track_ids)
+        updated = np.zeros(existing, dtype=bool)
+        gating_threshold = self.config.get("gating_euclidean_threshold_m", 5000.0)
+
+        # ADS-B: known aircraft update their own track by hex
+        positions, noise, metadata = self._convert_localised_detections(adsb_detections_lla or [])
+        rows, columns, unbound = [], [], []
+        seen = set()
+        for column, det_data in enumerate(metadata):
+            hex_code = (det_data.get("adsb_info") or {}).get("hex")
+            if hex_code is not None and hex_code in seen:
+                continue
+            seen.add(hex_code)
+            if hex_code in self.hex_index:
+                rows.append(self.rows[self.hex_index[hex_code]])
+                columns.append(column)
             else:
-                for detection in radar_detections:
-                    self._initiate_new_track(detection, status=TrackStatus.TENTATIVE)
-        else:
-            for track_id, track in self.active_tracks.items():
-                if track.states and len(track.states) > 0:
-                    try:
-                        predicted_state = self.predictor.predict(track.states[-1], timestamp=current_time)
-                        track.append(predicted_state)
-                        track.state_vector = predicted_state.state_vector
-                        track.covariance_matrix = predicted_state.covar
-                        track.increment_misses()
-                        track.increment_age()
-                    except Exception as e:
-                        if self.config["verbose"]:
-                            print(f"Error predicting track {track_id}: {e}")
-
-        self._manage_track_lifecycle()
+                unbound.append(column)
 
-        if self.config["verbose"]:
+        # other aircraft take the nearest gated track not bound to an aircraft
+        free = np.ones(existing, dtype=bool)
+        free[np.array([self.rows[track_id] for track_id in self.hex_index.values()], dtype=int)] = False
+        index = SpatialIndex(self.means[:, :3]) if unbound else None
+        for column in unbound:
+            nearby = index.within(positions[column], gating_threshold)
+            nearby = nearby[free[nearby]]
+            if len(nearby):
+                distance = np.linalg.norm(self.means[nearby, :3] - positions[column], axis=1)
+                rows.append(int(nearby[distance.argmin()]))
+                columns.append(column)
+                free[rows[-1]] = False
+        self._update_rows(rows, positions[columns], noise[columns], [metadata[c] for c in columns], updated)
+        new = np.setdiff1d(np.array(unbound, dtype=int), columns)
+        self._initiate_new_tracks(
+            positions[new], noise[new], [metadata[c] for c in new], current_timestamp_ms, TrackStatus.CONFIRMED
+        )
+        updated = np.concatenate([updated, np.zeros(len(self.track_ids) - len(updated), dtype=bool)])
+
+        # Bistatic: tracked targets update from range and Doppler, no localisation
+        self._update_bistatic(bistatic_detections or [], updated)
+
+        # Radar: gated global assignment, at most one detection per track
+        positions, noise, metadata = self._convert_localised_detections(all_localised_detections_lla)
+        rows, columns = self.assignment.assign(self.means, self.covars, positions, noise)
+        if logger.isEnabledFor(logging.DEBUG):
+            for row, column in zip(rows, columns):
+                if sample():
+                    distance = np.linalg.norm(self.means[row, :3] - positions[column])
+                    logger.debug("Associated track %s with detection at distance %.2fm", self.track_ids[row], distance)
+        self._update_rows(rows, positions[columns], noise[columns], [metadata[c] for c in columns], updated)
+        new = np.setdiff1d(np.arange(len(metadata)), columns)
+        # detections marked by a sharded tracker may update but not start tracks
+        new = np.array([c for c in new if metadata[c].get("initiate", True)], dtype=int)
+        radar_rows = len(self.track_ids)
+        self._initiate_new_tracks(positions[new], noise[new], [metadata[c] for c in new], current_timestamp_ms)
+
+        # Write states back to Track objects, only rows that changed this tick
+        self.updated_s[: len(updated)][updated] = current_s
+        for row in range(radar_rows):
+            track = self.active_tracks[self.track_ids[row]]
+            if row < existing or updated[row]:
+                track.record_state(self.means[row], self.covars[row], current_timestamp_ms)
+            if updated[row]:
+                track.timestamp_update_ms = current_timestamp_ms
+            if row < existing:
+                if not updated[row]:
+                    track.increment_misses()
+                track.increment_age()
+
+        self._manage_track_lifecycle(current_s)
+
+        if logger.isEnabledFor(logging.DEBUG):
             self._log_all_track_states(current_timestamp_ms)
 
         return self.active_tracks.copy()
 
+    def snapshot(self, rows=None):
+        """Track arrays, counters and hex index as plain arrays.
+
+        The snapshot holds each track's current state only, not its history.
+
+        Args:
+            rows: Rows to include, all if None
+
+        Returns:
+            Dict of numpy arrays, as read by adopt and written by save_checkpoint.
+        """
+        rows = np.arange(len(self.track_ids)) if rows is None else np.asarray(rows, dtype=int)
+        track_ids = [self.track_ids[row] for row in rows]
+        tracks = [self.active_tracks[track_id] for track_id in track_ids]
+        included = set(track_ids)
+        return {
+            "track_ids": np.array(track_ids, dtype=str),
+            "means": self.means[rows],
+            "covars": self.covars[rows],
+            "times_s": self.times_s[rows],
+            "mode_means": self.mode_means[rows],
+            "mode_covars": self.mode_covars[rows],
+            "mode_probs": self.mode_probs[rows],
+            "status": np.array([track.status.name for track in tracks], dtype=str),
+            "hits": np.array([track.hits for track in tracks], dtype=int),
+            "misses": np.array([track.misses for track in tracks], dtype=int),
+            "age_scans": np.array([track.age_scans for track in tracks], dtype=int),
+            "timestamp_update_ms": self.updated_s[rows] * 1000.0,
+            "adsb_info": np.array([json.dumps(track.adsb_info) for track in tracks], dtype=str),
+            "hex_index": np.array(
+                json.dumps(
+                    {
+                        hex_code: track_id
+                        for hex_code, track_id in self.hex_index.items()
+                        if track_id in included
+                    }
+                )
+            ),
+            "last_timestamp_ms": np.array(
+                np.nan if self.last_timestamp_ms is None else self.last_timestamp_ms
+            ),
+        }
+
+    def adopt(self, snapshot, current_timestamp_ms=None):
+        """Add the tracks of a snapshot, e.g. a checkpoint or a handover from another tracker.
+
+        Args:
+            snapshot: Arrays as from snapshot
+            current_timestamp_ms: Time to predict the tracks to (ms), or None
+                to keep each track's own time. The time predicted over does
+                not count towards the tracks' expiry.
+
+        Returns:
+            Number of tracks added.
+        """
+        track_ids = snapshot["track_ids"].tolist()
+        if not track_ids:
+            return 0
+        means, covars, times_s = snapshot["means"], snapshot["covars"], snapshot["times_s"]
+        updated_s = snapshot["timestamp_update_ms"] / 1000.0
+        updated_s = np.where(np.isnan(updated_s), times_s, updated_s)
+        if snapshot["mode_probs"].shape[1] == self.mode_probs.shape[1]:
+            modes = snapshot["mode_means"], snapshot["mode_covars"], snapshot["mode_probs"]
+        else:
+            # saved with another motion model
+            modes = self._initiate_modes(means, covars)
+        if current_timestamp_ms is not None:
+            current_s = current_timestamp_ms / 1000.0
+            dt = np.maximum(current_s - times_s, 0)
+            if self.imm is None:
+                means, covars = self.kalman.predict(means, covars, dt)
+            else:
+                modes = self.imm.predict(*modes, dt)
+                means, covars = self.imm.combine(*modes)
+            updated_s = updated_s + dt
+            times_s = np.full(len(track_ids), current_s)
+
+        for row, track_id in enumerate(track_ids):
+            track = Track(
+                id=track_id,
+                status=TrackStatus[snapshot["status"][row]],
+                adsb_info=json.loads(snapshot["adsb_info"][row]),
+            )
+            track.hits = int(snapshot["hits"][row])
+            track.misses = int(snapshot["misses"][row])
+            track.age_scans = int(snapshot["age_scans"][row])
+            track.timestamp_update_ms = updated_s[row] * 1000.0
+            track.record_state(means[row], covars[row], times_s[row] * 1000.0)
+            self.active_tracks[track_id] = track
+            self.rows[track_id] = len(self.track_ids)
+            self.track_ids.append(track_id)
+
+        self.means = np.concatenate([self.means, means])
+        self.covars = np.concatenate([self.covars, covars])
+        self.times_s = np.concatenate([self.times_s, times_s])
+        self.updated_s = np.concatenate([self.updated_s, updated_s])
+        self.mode_means = np.concatenate([self.mode_means, modes[0]])
+        self.mode_covars = np.concatenate([self.mode_covars, modes[1]])
+        self.mode_probs = np.concatenate([self.mode_probs, modes[2]])
+        self.hex_index.update(json.loads(str(snapshot["hex_index"])))
+        return len(track_ids)
+
+    def save_checkpoint(self, path):
+        """Write the snapshot of every track to path, replacing it atomically."""
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as file:
+            np.savez(file, **self.snapshot())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, path)
+
+    def restore_checkpoint(self, path, current_timestamp_ms, max_age_s=None):
+        """Replace the tracks with a checkpoint, predicted forward to the current time.
+
+        Args:
+            path: Checkpoint written by save_checkpoint
+            current_timestamp_ms: Time to predict the restored tracks to (ms)
+            max_age_s: Ignore checkpoints older than this (s), if set
+
+        Returns:
+            Number of tracks restored, 0 if the checkpoint is missing or too old.
+        """
+        if not os.path.exists(path):
+            return 0
+        with np.load(path, allow_pickle=False) as snapshot:
+            snapshot = dict(snapshot)
+        last_timestamp_ms = float(snapshot["last_timestamp_ms"])
+        if np.isnan(last_timestamp_ms):
+            return 0
+        if max_age_s is not None and current_timestamp_ms - last_timestamp_ms > max_age_s * 1000:
+            logger.info("Ignoring tracker checkpoint %s older than %ss", path, max_age_s)
+            return 0
+
+        self._remove_tracks(list(self.track_ids))
+        restored = self.adopt(snapshot, current_timestamp_ms)
+        self.last_timestamp_ms = last_timestamp_ms
+        logger.info("Restored %d tracks from %s", restored, path)
+        return restored
+
     def _log_all_track_states(self, timestamp_ms):
-        """Log detailed state information for all active tracks."""
+        """Log detailed state information for active tracks, sampled per track."""
         if not self.active_tracks:
-            print(f"[STONE_SOUP_TRACKER {timestamp_ms}] No active tracks")
+            logger.debug("[%s] No active tracks", timestamp_ms)
             return
 
-        print(f"[STONE_SOUP_TRACKER {timestamp_ms}] === TRACK SUMMARY ({len(self.active_tracks)} active) ===")
+        logger.debug("[%s] === TRACK SUMMARY (%d active) ===", timestamp_ms, len(self.active_tracks))
 
         for track_id, track in self.active_tracks.items():
+            if not sample():
+                continue
             pos_str = "N/A"
             vel_str = "N/A"
             
@@ -406,6 +732,17 @@ class StoneSoupTracker:
                 flight_info = track.adsb_info.get("flight", track.adsb_info.get("hex", "adsb"))
                 status_icon = "✈️"
             
-            print(f"  {status_icon}  {track_id} ({flight_info}) - {track.status.name} - Pos: {pos_str} - Vel: {vel_str} - H:{track.hits} M:{track.misses} A:{track.age_scans}")
+            logger.debug(
+                "  %s  %s (%s) - %s - Pos: %s - Vel: %s - H:%d M:%d A:%d",
+                status_icon,
+                track_id,
+                flight_info,
+                track.status.name,
+                pos_str,
+                vel_str,
+                track.hits,
+                track.misses,
+                track.age_scans,
+            )
 
-        print(f"[STONE_SOUP_TRACKER {timestamp_ms}] === END TRACK SUMMARY ===")
\ No newline at end of file
+        logger.debug("[%s] === END TRACK SUMMARY ===", timestamp_ms)
\ No newline at end of file
@@ -1,8 +1,20 @@
+import json
+import logging
+import uuid
+from collections import deque
+from datetime import datetime
 from enum import Enum, auto
 
 import numpy as np
+from stonesoup.types.state import GaussianState
 from stonesoup.types.track import Track as StoneSoupTrack
-from ..geometry.Geometry import Geometry
+from ..geometry.LocalFrame import LocalFrame
+from ..Log import Sampler, get_logger
+from .TrackHistory import TrackHistory
+
+
+logger = get_logger("track")
+sample = Sampler()
 
 
 # Define track status as an Enum
@@ -13,48 +25,76 @@ class TrackStatus(Enum):
     DELETED = auto()
 
 
-class Track(StoneSoupTrack):
-    """Extension of Stone-Soup's Track to add custom fields and logic for 3lips."""
+class Track:
+    """Compact track record for 3lips.
+
+    Holds the id, status, counters and current state in slots with a bounded
+    history. Use to_stone_soup for a Stone Soup Track, e.g. for export or plotting.
+    """
     
     # Class-level reference point for ENU to LLA conversion
     ref_lat = -34.9286  # Adelaide reference latitude
     ref_lon = 138.5999  # Adelaide reference longitude  
     ref_alt = 0.0       # Reference altitude
+    frame = LocalFrame(ref_lat, ref_lon, ref_alt)
+
+    # Class-level history bound and optional sink for evicted history
+    history_size = 50
+    history_spill = None
     
     @classmethod
     def set_reference_point(cls, lat, lon, alt):
         """Set the reference point for ENU to LLA conversion."""
-        cls.ref_lat = lat
-        cls.ref_lon = lon
-        cls.ref_alt = alt
+        cls.set_frame(LocalFrame(lat, lon, alt))
+
+    @classmethod
+    def set_frame(cls, frame):
+        """Share an existing LocalFrame, e.g. the tracker's, for ENU to LLA conversion."""
+        cls.frame = frame
+        cls.ref_lat, cls.ref_lon, cls.ref_alt = frame.ref_lla
+
+    @classmethod
+    def configure_history(cls, size, spill=None):
+        """Set the per-track history bound and an optional callable for evicted entries."""
+        cls.history_size = size
+        cls.history_spill = spill
+
+    __slots__ = (
+        "id",
+        "_status",
+        "filter",
+        "adsb_info",
+        "last_chi_squared",
+        "hits",
+        "misses",
+        "age_scans",
+        "associated_detections_history",
+        "history",
+        "state_vector",
+        "covariance_matrix",
+        "timestamp_update_ms",
+        "dirty",
+        "cached_dict",
+        "cached_json",
+    )
 
     def __init__(
         self,
-        *args,
         status=TrackStatus.TENTATIVE,
         filter_obj=None,
         adsb_info=None,
         last_chi_squared=None,
-        **kwargs,
+        id=None,
+        initial_detection=None,
+        timestamp_ms=None,
     ):
-        print(
-            f"[TRACK] __init__ called with status: {status}, adsb_info: {adsb_info is not None}",
-        )
-        # Remove custom fields before calling super().__init__
-        custom_fields = [
-            "initial_detection",
-            "status",
-            "filter_obj",
-            "adsb_info",
-            "last_chi_squared",
-            "timestamp_ms",
-            "initial_state",
-            "initial_covariance",
-        ]
-        for field in custom_fields:
-            kwargs.pop(field, None)
-        super().__init__(*args, **kwargs)
-        # Custom fields
+        # The tracker sets the state via record_state; initial_detection and
+        # timestamp_ms are the detection and time (ms) that started the track
+        self.id = id if id is not None else str(uuid.uuid4())
+        # Serialised form, rebuilt by to_dict or serialise_all once dirty
+        self.dirty = True
+        self.cached_dict = None
+        self.cached_json = None
         self.status = status
         self.filter = (
             filter_obj  # Placeholder for a filter object (e.g., KalmanFilter instance)
@@ -68,46 +108,48 @@ class Track(StoneSoupTrack):
             0  # Number of consecutive times this track was not updated with a detection
         )
         self.age_scans = 1  # Number of scans this track has existed for
-        self.associated_detections_history = []  # Detections that formed/updated this track
+        # Detections that formed/updated this track, bounded like the state history
+        self.associated_detections_history = deque(maxlen=self.history_size)
+        if initial_detection is not None:
+            self.associated_detections_history.append(initial_detection)
+        self.history = TrackHistory(self.history_size, self.history_spill, key=self.id)
 
         # Initialize state tracking properties
         self.state_vector = None
         self.covariance_matrix = None
-        self.timestamp_update_ms = None
+        self.timestamp_update_ms = timestamp_ms
 
-        if adsb_info:
-            print(
-                f"[TRACK] Created {status.name} track {self.id} for ADS-B aircraft {adsb_info.get('hex', 'unknown')}",
-            )
-        else:
-            print(f"[TRACK] Created {status.name} track {self.id} for radar detection")
+    @property
+    def status(self):
+        return self._status
+
+    @status.setter
+    def status(self, status):
+        self._status = status
+        self.dirty = True
+
+    def record_state(self, state_vector, covariance, timestamp_ms):
+        """Set the current state and covariance and append them to the history."""
+        self.dirty = True
+        self.state_vector = np.array(state_vector, dtype=float)
+        self.covariance_matrix = np.array(covariance, dtype=float)
+        self.history.append(self.state_vector, self.covariance_matrix, timestamp_ms)
 
     def update(self, detection, timestamp_ms, new_state, new_covariance):
         """Update the track's state, covariance, and history. Compatible with Tracker's update call."""
-        from stonesoup.types.state import State
-        from datetime import datetime
-        
-        old_pos = self.state_vector[:3] if self.state_vector is not None else None
-        new_pos = new_state[:3] if new_state is not None else None
-
-        print(
-            f"[TRACK] Track {self.id} updated: Old pos: {old_pos}, New pos: {new_pos}, Status: {self.status.name}",
-        )
+        if logger.isEnabledFor(logging.DEBUG) and sample():
+            logger.debug(
+                "Track %s updated: old pos %s, new pos %s, status %s",
+                self.id,
+                self.state_vector[:3] if self.state_vector is not None else None,
+                new_state[:3] if new_state is not None else None,
+                self.status.name,
+            )
 
-        # Update state vector and covariance
-        self.state_vector = new_state
-        self.covariance_matrix = new_covariance
+        # Update state vector, covariance and history
+        self.record_state(new_state, new_covariance, timestamp_ms)
         self.timestamp_update_ms = timestamp_ms
         
-        # Create a new State object and append to states list for to_dict() compatibility
-        new_state_obj = State(
-            state_vector=new_state,
-            timestamp=datetime.fromtimestamp(timestamp_ms / 1000.0)
-        )
-        if hasattr(new_state_obj, 'covar'):
-            new_state_obj.covar = new_covariance
-        self.append(new_state_obj)
-        
         # Update custom fields/history
         self.update_custom(detection)
 
@@ -120,6 +162,7 @@ class Track(StoneSoupTrack):
     ):
         """Update custom fields after a new detection is associated."""
         self.associated_detections_history.append(detection)
+        self.dirty = True
         self.hits += 1
         self.misses = 0
 
@@ -127,8 +170,8 @@ class Track(StoneSoupTrack):
             old_status = self.status
             self.status = status
             if old_status != status:
-                print(
-                    f"[TRACK] Track {self.id} status changed: {old_status.name} -> {status.name}",
+                logger.debug(
+                    "Track %s status changed: %s -> %s", self.id, old_status.name, status.name
                 )
 
         if adsb_info is not None:
@@ -136,71 +179,60 @@ class Track(StoneSoupTrack):
         if last_chi_squared is not None:
             self.last_chi_squared = last_chi_squared
 
-        # Check for status promotion
-        if self.status == TrackStatus.TENTATIVE and self.hits > 3:
-            old_status = self.status
-            self.status = TrackStatus.CONFIRMED
-            print(
-                f"[TRACK] Track {self.id} promoted: {old_status.name} -> {self.status.name} (hits: {self.hits})",
-            )
-
     def increment_misses(self):
-        """Increments the miss counter and updates status if needed."""
+        """Increments the miss counter, the tracker decides any status change."""
         self.misses += 1
-        print(
-            f"[TRACK] Track {self.id} missed detection (misses: {self.misses}, status: {self.status.name})",
-        )
-
-        if self.status == TrackStatus.CONFIRMED and self.misses > 3:
-            old_status = self.status
-            self.status = TrackStatus.COASTING
-            print(
-                f"[TRACK] Track {self.id} status changed: {old_status.name} -> {self.status.name} (misses: {self.misses})",
+        self.dirty = True
+        if logger.isEnabledFor(logging.DEBUG) and sample():
+            logger.debug(
+                "Track %s missed detection (misses: %d, status: %s)",
+                self.id,
+                self.misses,
+                self.status.name,
             )
 
     def increment_age(self):
         """Increments the age of the track (in terms of scans/updates)."""
         self.age_scans += 1
+        self.dirty = True
 
     def get_position_lla(self):
         """Returns the track's current position in LLA (Latitude, Longitude, Altitude).
         Assumes the state vector stores position in a way that can be converted or is already LLA.
         """
-        if self.states and len(self.states[-1].state_vector) >= 3:
-            sv = self.states[-1].state_vector
+        if self.state_vector is not None and len(self.state_vector) >= 3:
+            sv = self.state_vector
             return (sv[0], sv[1], sv[2])
         return None
 
     def to_dict(self):
-        """Returns a dictionary representation of the track, suitable for JSON serialization."""
-        # Get the most recent state vector and convert ENU to LLA for frontend
+        """Returns a dictionary representation of the track, suitable for JSON serialization.
+
+        The dict is cached and only rebuilt after the track changes.
+        """
+        if self.dirty:
+            position_lla = None
+            if self.state_vector is not None and len(self.state_vector) >= 3:
+                position_lla = self.frame.enu2lla(self.state_vector[:3])
+            self.refresh(position_lla)
+        return self.cached_dict
+
+    def refresh(self, position_lla):
+        """Rebuild the cached dict and JSON from the current state.
+
+        Args:
+            position_lla: LLA of the ENU position in the state vector, or None
+        """
         current_state_lla = None
-        if self.states:
-            state_vector = self.states[-1].state_vector
-            # Flatten nested arrays to a simple list
-            if hasattr(state_vector, 'flatten'):
-                state_enu = state_vector.flatten()
-            else:
-                state_enu = np.array(state_vector)
-            
-            if len(state_enu) >= 3:
-                # Convert ENU position to LLA for frontend
-                east, north, up = state_enu[0], state_enu[1], state_enu[2]
-                lat, lon, alt = Geometry.enu2lla(
-                    east, north, up,
-                    self.ref_lat, self.ref_lon, self.ref_alt
-                )
-                
-                # Create LLA state vector (position + velocity in LLA frame)
-                if len(state_enu) >= 6:
-                    # For velocity, we can keep ENU values as they represent rates
-                    current_state_lla = [lat, lon, alt, state_enu[3], state_enu[4], state_enu[5]]
-                else:
-                    current_state_lla = [lat, lon, alt]
+        if self.state_vector is not None:
+            state_enu = np.ravel(self.state_vector)
+            if position_lla is not None:
+                # Velocity stays in ENU, the rates need no conversion
+                current_state_lla = np.ravel(position_lla).tolist() + state_enu[3:6].tolist()
             else:
                 current_state_lla = state_enu.tolist()
-        
-        return {
+
+        self.cached_dict = {
             "track_id": self.id,
             "status": self.status.name
             if hasattr(self.status, "name")
@@ -210,72 +242,62 @@ class Track(StoneSoupTrack):
             "misses": self.misses,
             "age_scans": self.age_scans,
             "adsb_info": self.adsb_info,
-            "history_len": len(self.states),
+            "history_len": len(self.history),
         }
+        self.cached_json = json.dumps(self.cached_dict)
+        self.dirty = False
 
-    def __repr__(self):
-        pos = self.states[-1].state_vector[:3] if self.states else None
-        return f"Track(ID: {self.id}, Status: {self.status}, Pos: {pos}, Hits: {self.hits}, Misses: {self.misses})"
+    @classmethod
+    def serialise_all(cls, tracks):
+        """Dicts for many tracks, converting the positions of changed tracks to LLA in one pass.
 
-    def predict(self, dt_seconds):
-        """Predict the track's state forward in time using a simple constant velocity model."""
-        # Get current state from either states list or direct state_vector
-        if self.states and len(self.states) > 0:
-            current_state = self.states[-1].state_vector
-            current_cov = getattr(self.states[-1], "covar", np.eye(6) * 100)
-        elif self.state_vector is not None:
-            current_state = self.state_vector
-            current_cov = (
-                self.covariance_matrix
-                if self.covariance_matrix is not None
-                else np.eye(6) * 100
-            )
-        else:
-            # No state to predict from
-            return
-
-        if len(current_state) >= 6:  # Position and velocity
-            # Simple constant velocity prediction
-            F = np.array(
-                [
-                    [1, 0, 0, dt_seconds, 0, 0],
-                    [0, 1, 0, 0, dt_seconds, 0],
-                    [0, 0, 1, 0, 0, dt_seconds],
-                    [0, 0, 0, 1, 0, 0],
-                    [0, 0, 0, 0, 1, 0],
-                    [0, 0, 0, 0, 0, 1],
-                ],
-            )
+        Args:
+            tracks: Sequence of Track
 
-            # Predict state
-            predicted_state = F @ current_state
-
-            # Simple process noise (Q matrix)
-            q = 0.1  # Process noise variance
-            Q = (
-                np.array(
-                    [
-                        [dt_seconds**4 / 4, 0, 0, dt_seconds**3 / 2, 0, 0],
-                        [0, dt_seconds**4 / 4, 0, 0, dt_seconds**3 / 2, 0],
-                        [0, 0, dt_seconds**4 / 4, 0, 0, dt_seconds**3 / 2],
-                        [dt_seconds**3 / 2, 0, 0, dt_seconds**2, 0, 0],
-                        [0, dt_seconds**3 / 2, 0, 0, dt_seconds**2, 0],
-                        [0, 0, dt_seconds**3 / 2, 0, 0, dt_seconds**2],
-                    ],
-                )
-                * q
+        Returns:
+            List of the tracks' dicts, as from to_dict.
+        """
+        dirty = [track for track in tracks if track.dirty]
+        located = [
+            track
+            for track in dirty
+            if track.state_vector is not None and len(track.state_vector) >= 3
+        ]
+        if located:
+            positions = cls.frame.enu2lla(
+                np.array([np.ravel(track.state_vector)[:3] for track in located])
             )
+            for track, position_lla in zip(located, positions):
+                track.refresh(position_lla)
+        for track in dirty:
+            if track.dirty:
+                track.refresh(None)
+        return [track.cached_dict for track in tracks]
 
-            # Predict covariance
-            predicted_cov = F @ current_cov @ F.T + Q
+    @staticmethod
+    def encode_all(tracks):
+        """JSON array of the tracks' cached encodings, after serialise_all."""
+        return "[" + ", ".join(track.cached_json for track in tracks) + "]"
 
-        elif len(current_state) == 3:
-            predicted_state = np.concatenate([current_state, np.zeros(3)])
-            predicted_cov = np.eye(6) * 100  # Default uncertainty
-        else:
-            predicted_state = current_state.copy()
-            predicted_cov = current_cov * 1.1  # Increase uncertainty slightly
+    def to_stone_soup(self):
+        """Build a Stone Soup Track from the stored history.
 
-        # Update internal state
-        self.state_vector = predicted_state
-        self.covariance_matrix = predicted_cov
+        Returns:
+            StoneSoupTrack with the same id and one GaussianState per history entry
+        """
+        states, covars, timestamps_ms = self.history.arrays()
+        return StoneSoupTrack(
+            [
+                GaussianState(
+                    state_vector=state,
+                    covar=covar,
+                    timestamp=datetime.fromtimestamp(timestamp_ms / 1000.0),
+                )
+                for state, covar, timestamp_ms in zip(states, covars, timestamps_ms)
+            ],
+            id=self.id,
+        )
+
+    def __repr__(self):
+        pos = self.state_vector[:3] if self.state_vector is not None else None
+        return f"Track(ID: {self.id}, Status: {self.status}, Pos: {pos}, Hits: {self.hits}, Misses: {self.misses})"
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class TrackHistory:
+    """Fixed-capacity ring buffer of a track's states, covariances and timestamps.
+
+    Storage grows by doubling up to the capacity and is then reused, so a
+    track's memory stays constant however long it lives while short-lived
+    tracks stay small. Once full, each append overwrites the oldest entry,
+    which is first handed to the optional spill callback.
+    """
+
+    initial_size = 4
+
+    def __init__(self, capacity=50, spill=None, key=None):
+        """Create an empty history.
+
+        Args:
+            capacity: Maximum number of entries kept
+            spill: Optional callable(key, state_vector, covariance, timestamp_ms)
+                given each entry as it is evicted
+            key: Identifier passed to spill, e.g. the track id
+        """
+        if capacity < 1:
+            raise ValueError(f"History capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self.spill = spill
+        self.key = key
+        size = min(capacity, self.initial_size)
+        self.states = np.empty((size, 6))
+        self.covars = np.empty((size, 6, 6))
+        self.timestamps_ms = np.empty(size)
+        self.head = 0  # next slot to write
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, state_vector, covariance, timestamp_ms):
+        """Add an entry, evicting the oldest if the buffer is full."""
+        if self.count == len(self.states) < self.capacity:
+            self._grow()
+        if self.count == self.capacity and self.spill is not None:
+            self.spill(
+                self.key,
+                self.states[self.head].copy(),
+                self.covars[self.head].copy(),
+                float(self.timestamps_ms[self.head]),
+            )
+        self.states[self.head] = np.ravel(state_vector)
+        self.covars[self.head] = covariance
+        self.timestamps_ms[self.head] = timestamp_ms
+        self.head = (self.head + 1) % len(self.states)
+        self.count = min(self.count + 1, self.capacity)
+
+    def _grow(self):
+        """Double the storage; entries are in order until the capacity is reached."""
+        size = min(2 * len(self.states), self.capacity)
+        self.states = np.resize(self.states, (size, 6))
+        self.covars = np.resize(self.covars, (size, 6, 6))
+        self.timestamps_ms = np.resize(self.timestamps_ms, size)
+        self.head = self.count
+
+    def latest(self):
+        """The most recent state, covariance and timestamp, or None if empty."""
+        if self.count == 0:
+            return None
+        last = (self.head - 1) % len(self.states)
+        return self.states[last], self.covars[last], float(self.timestamps_ms[last])
+
+    def arrays(self):
+        """Stored states, covariances and timestamps, oldest first.
+
+        Returns:
+            Arrays of shape (count, 6), (count, 6, 6) and (count,).
+        """
+        order = (self.head - self.count + np.arange(self.count)) % len(self.states)
+        return self.states[order], self.covars[order], self.timestamps_ms[order]
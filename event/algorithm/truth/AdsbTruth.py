@@ -3,8 +3,13 @@
 """
 
 import ipaddress
+import logging
 
 import requests
+from algorithm.Log import Sampler, get_logger
+
+logger = get_logger("truth")
+sample = Sampler()
 
 
 def is_localhost(server):
@@ -54,7 +59,7 @@ class AdsbTruth:
         else:
             url = "https://" + translated_server + "/data/aircraft.json"
 
-        print(f"Getting truth from {url}")
+        logger.debug("Getting truth from %s", url)
 
         # get ADSB detections
         try:
@@ -63,17 +68,24 @@ class AdsbTruth:
             data = response.json()
             adsb = data
         except requests.exceptions.RequestException as e:
-            print(f"Error fetching data from {url}: {e}")
+            logger.warning("Error fetching data from %s: %s", url, e)
             adsb = None
 
         # store relevant data
         if adsb:
-            print(f"DEBUG: Processing {len(adsb['aircraft'])} aircraft from ADS-B data")
+            logger.debug("Processing %d aircraft from ADS-B data", len(adsb["aircraft"]))
+            debug = logger.isEnabledFor(logging.DEBUG)
             # loop over aircraft
             for aircraft in adsb["aircraft"]:
-                print(
-                    f"DEBUG: Aircraft hex={aircraft.get('hex')}, seen_pos={aircraft.get('seen_pos')}, alt_geom={aircraft.get('alt_geom')}, flight={aircraft.get('flight')}, limit={self.seen_pos_limit}",
-                )
+                if debug and sample():
+                    logger.debug(
+                        "Aircraft hex=%s, seen_pos=%s, alt_geom=%s, flight=%s, limit=%s",
+                        aircraft.get("hex"),
+                        aircraft.get("seen_pos"),
+                        aircraft.get("alt_geom"),
+                        aircraft.get("flight"),
+                        self.seen_pos_limit,
+                    )
 
                 if (
                     aircraft.get("seen_pos") is not None
@@ -81,7 +93,6 @@ class AdsbTruth:
                     and aircraft.get("flight")
                     and aircraft.get("seen_pos") < self.seen_pos_limit
                 ):
-                    print(f"DEBUG: Adding aircraft {aircraft['hex']} to output")
                     output[aircraft["hex"]] = {}
                     output[aircraft["hex"]]["lat"] = aircraft["lat"]
                     output[aircraft["hex"]]["lon"] = aircraft["lon"]
@@ -90,9 +101,7 @@ class AdsbTruth:
                     output[aircraft["hex"]]["timestamp"] = (
                         adsb["now"] - aircraft["seen_pos"]
                     )
-                else:
-                    print(
-                        f"DEBUG: Rejecting aircraft {aircraft.get('hex')} - conditions not met",
-                    )
-            print(f"DEBUG: Final output contains {len(output)} aircraft")
+            logger.debug(
+                "Kept %d of %d aircraft", len(output), len(adsb["aircraft"])
+            )
         return output
@@ -0,0 +1,62 @@
+"""@file DisplayCache.py
+@brief Cache of decimated ellipse/ellipsoid surfaces in LLA for display.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+
+class DisplayCache:
+    """@class DisplayCache
+    @brief A class to generate and cache display surfaces for each radar.
+    @details Surfaces are keyed by radar geometry, localiser and bistatic
+    range quantised to the resolution, so a target that moves less than the
+    resolution between ticks reuses the previous surface. Surfaces are
+    decimated to at most maxPoints and the least recently used entry is
+    evicted once maxEntries is reached.
+    """
+
+    def __init__(self, maxPoints=500, resolution=100, maxEntries=256):
+        """@brief Constructor for the DisplayCache class.
+        @param maxPoints (int): Maximum points per displayed surface.
+        @param resolution (float): Bistatic range quantisation (m).
+        @param maxEntries (int): Maximum number of cached surfaces.
+        """
+        self.maxPoints = maxPoints
+        self.resolution = resolution
+        self.maxEntries = maxEntries
+        self.entries = OrderedDict()
+
+    def get(self, localiser, geometry, bistatic_range, n, flat=False):
+        """@brief Get a display surface, generating it if not cached.
+        @param localiser (object): Parametric localiser providing sample_array.
+        @param geometry (RadarGeometry): The radar geometry to use.
+        @param bistatic_range (float): Bistatic range of the surface (m).
+        @param n (int): Number of samples along each parameter.
+        @param flat (bool): Report altitude as 0, e.g. for the 2D ellipse.
+        @return list: Points [lat, lon, alt] with lat/lon to 3 decimal places.
+        """
+        step = round(bistatic_range / self.resolution)
+        key = (geometry, type(localiser).__name__, n, flat, step)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        points = localiser.sample_array(geometry, step * self.resolution, n)
+        if len(points) > self.maxPoints:
+            points = points[:: -(-len(points) // self.maxPoints)]
+
+        # convert ENU points to LLA using ellipsoid midpoint as reference
+        lla = geometry.frame.enu2lla(points)
+        latlon = np.round(lla[:, :2], 3).tolist()
+        if flat:
+            alts = [0] * len(latlon)
+        else:
+            alts = np.round(lla[:, 2]).astype(int).tolist()
+        output = [[lat, lon, alt] for (lat, lon), alt in zip(latlon, alts)]
+
+        self.entries[key] = output
+        if len(self.entries) > self.maxEntries:
+            self.entries.popitem(last=False)
+        return output
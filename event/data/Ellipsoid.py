@@ -4,13 +4,16 @@
 
 import math
 
+import numpy as np
 from algorithm.geometry.Geometry import Geometry
+from algorithm.geometry.LocalFrame import LocalFrame
 
 
 class Ellipsoid:
     """@class Ellipsoid
     @brief A class to store ellipsoid parameters for bistatic radar.
-    @details Stores foci, midpoint, pitch, yaw and distance.
+    @details Stores foci, midpoint, pitch, yaw and distance. The ENU frame
+    about the midpoint is exact and stored for reuse.
     """
 
     def __init__(self, f1_lla, f2_lla, name):
@@ -31,11 +34,10 @@ class Ellipsoid:
             (f1_lla[2] + f2_lla[2]) / 2
         ]
         
+        self.frame = LocalFrame(*self.midpoint_lla)
+
         # Convert f1 to ENU relative to midpoint to calculate angles
-        e1, n1, u1 = Geometry.lla2enu(
-            f1_lla[0], f1_lla[1], f1_lla[2],
-            self.midpoint_lla[0], self.midpoint_lla[1], self.midpoint_lla[2]
-        )
+        e1, n1, u1 = self.frame.lla2enu(f1_lla)
         
         # Calculate yaw and pitch from ENU vector
         self.yaw = -math.atan2(n1, e1)
@@ -44,5 +46,6 @@ class Ellipsoid:
             math.sqrt(e1 ** 2 + n1 ** 2),
         )
         
-        # Calculate distance between foci
-        self.distance = Geometry.distance_lla(f1_lla, f2_lla)
+        # Calculate straight line distance between foci
+        f1_ecef, f2_ecef = Geometry.lla2ecef_array([f1_lla, f2_lla])
+        self.distance = float(np.linalg.norm(f1_ecef - f2_ecef))
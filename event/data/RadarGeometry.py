@@ -0,0 +1,130 @@
+"""@file RadarGeometry.py
+@brief Precomputed geometry for a single bistatic radar.
+"""
+
+import os
+
+import numpy as np
+from algorithm.geometry.LocalFrame import LocalFrame
+from data.Ellipsoid import Ellipsoid
+
+
+class RadarGeometry:
+    """@class RadarGeometry
+    @brief A class to store the fixed geometry of one radar node.
+    @details Built once per radar config and shared by the localisers, the
+    associator and the display code. ENU coordinates are relative to the
+    ellipsoid midpoint, with exact frames also kept about each node.
+    """
+
+    def __init__(self, name, config):
+        """@brief Constructor for the RadarGeometry class.
+        @param name (str): Name of the radar.
+        @param config (dict): blah2 config for the radar.
+        """
+        self.name = name
+        self.tx_lla = [
+            config["location"]["tx"]["latitude"],
+            config["location"]["tx"]["longitude"],
+            config["location"]["tx"]["altitude"],
+        ]
+        self.rx_lla = [
+            config["location"]["rx"]["latitude"],
+            config["location"]["rx"]["longitude"],
+            config["location"]["rx"]["altitude"],
+        ]
+        self.fc = config.get("capture", {}).get("fc")
+
+        self.ellipsoid = Ellipsoid(self.tx_lla, self.rx_lla, name)
+        self.frame = self.ellipsoid.frame
+        self.tx_frame = LocalFrame(*self.tx_lla)
+        self.rx_frame = LocalFrame(*self.rx_lla)
+        self.tx_enu, self.rx_enu = self.frame.lla2enu([self.tx_lla, self.rx_lla])
+
+        # rotation matrices from the ellipse/ellipsoid frame to ENU
+        theta = self.ellipsoid.yaw
+        phi = self.ellipsoid.pitch
+        self.rotation_ellipse = np.array(
+            [[np.cos(theta), -np.sin(theta)], [np.sin(theta), np.cos(theta)]],
+        )
+        self.rotation_ellipsoid = np.array(
+            [
+                [
+                    np.cos(theta),
+                    -np.sin(theta) * np.cos(phi),
+                    np.sin(theta) * np.sin(phi),
+                ],
+                [
+                    np.sin(theta),
+                    np.cos(theta) * np.cos(phi),
+                    -np.cos(theta) * np.sin(phi),
+                ],
+                [0, np.sin(phi), np.cos(phi)],
+            ],
+        )
+
+        try:
+            self.adsb2dd_url = RadarGeometry.generate_adsb2dd_url(config)
+        except (KeyError, TypeError):
+            self.adsb2dd_url = None
+
+    @staticmethod
+    def fingerprint(config):
+        """@brief Values of a config that the geometry depends on.
+        @param config (dict): blah2 config for the radar.
+        @return tuple: Hashable fingerprint, equal if the geometry is unchanged.
+        """
+        location = config["location"]
+        return (
+            location["tx"]["latitude"],
+            location["tx"]["longitude"],
+            location["tx"]["altitude"],
+            location["rx"]["latitude"],
+            location["rx"]["longitude"],
+            location["rx"]["altitude"],
+            config.get("capture", {}).get("fc"),
+            str(config.get("truth", {}).get("adsb", {}).get("tar1090")),
+        )
+
+    @staticmethod
+    def generate_adsb2dd_url(config):
+        """@brief Generate an adsb2dd API endpoint for a radar.
+        @see adsb2dd at https://github.com/30hours/adsb2dd.
+        @param config (dict): blah2 config for the radar.
+        @return str: adsb2dd API for radar.
+        """
+        rx_lat = config["location"]["rx"]["latitude"]
+        rx_lon = config["location"]["rx"]["longitude"]
+        rx_alt = config["location"]["rx"]["altitude"]
+        tx_lat = config["location"]["tx"]["latitude"]
+        tx_lon = config["location"]["tx"]["longitude"]
+        tx_alt = config["location"]["tx"]["altitude"]
+        fc = config["capture"]["fc"]
+
+        adsb = config["truth"]["adsb"]["tar1090"]
+
+        api_url = os.environ.get("ADSB2DD_API_URL", "http://adsb2dd.30hours.dev/api/dd")
+        if not api_url.startswith("http://") and not api_url.startswith("https://"):
+            api_url = "http://" + api_url
+
+        api_query = (
+            api_url
+            + "?rx="
+            + str(rx_lat)
+            + ","
+            + str(rx_lon)
+            + ","
+            + str(rx_alt)
+            + "&tx="
+            + str(tx_lat)
+            + ","
+            + str(tx_lon)
+            + ","
+            + str(tx_alt)
+            + "&fc="
+            + str(fc / 1000000)
+            + "&server="
+            + (str(adsb) if str(adsb).startswith("http") else "http://" + str(adsb))
+        )
+
+        return api_query
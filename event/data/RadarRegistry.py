@@ -0,0 +1,55 @@
+"""@file RadarRegistry.py
+@brief Registry of precomputed radar geometry keyed by radar name.
+"""
+
+from data.RadarGeometry import RadarGeometry
+
+
+class RadarRegistry:
+    """@class RadarRegistry
+    @brief A class to share RadarGeometry between pipeline stages.
+    @details An entry is rebuilt only when the radar config it was built
+    from changes, so lookups are a dict access on every other tick.
+    """
+
+    def __init__(self):
+        """@brief Constructor for the RadarRegistry class."""
+        self.radars = {}
+        self.fingerprints = {}
+
+    def update(self, radar_data):
+        """@brief Refresh entries for all radars with a config.
+        @param radar_data (dict): Radar data by name, each with a "config".
+        """
+        for name, data in radar_data.items():
+            if data and data.get("config") is not None:
+                self.get(name, data["config"])
+
+    def get(self, name, config=None):
+        """@brief Get the geometry for a radar, rebuilding it if stale.
+        @param name (str): Name of the radar.
+        @param config (dict): Current blah2 config, or None to skip the check.
+        @return RadarGeometry: Geometry for the radar, or None if unknown.
+        """
+        if config is None:
+            return self.radars.get(name)
+        fingerprint = RadarGeometry.fingerprint(config)
+        if self.fingerprints.get(name) != fingerprint:
+            self.radars[name] = RadarGeometry(name, config)
+            self.fingerprints[name] = fingerprint
+        return self.radars[name]
+
+    def invalidate(self, name=None):
+        """@brief Drop one radar, or all radars if name is None."""
+        if name is None:
+            self.radars.clear()
+            self.fingerprints.clear()
+        else:
+            self.radars.pop(name, None)
+            self.fingerprints.pop(name, None)
+
+    def __getitem__(self, name):
+        return self.radars[name]
+
+    def __contains__(self, name):
+        return name in self.radars
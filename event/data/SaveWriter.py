@@ -0,0 +1,182 @@
+"""@file SaveWriter.py
+@brief Background writer appending lines to ndjson save files.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+from algorithm.Log import get_logger
+
+logger = get_logger("save")
+
+
+class SaveWriter:
+    """@class SaveWriter
+    @brief A class to append lines to save files on a background thread.
+    @details Lines are handed over through a bounded queue, so the event
+    loop never waits on the disk. The thread drains up to maxBatch lines at
+    a time, writes each file's lines with one call, flushes them and fsyncs
+    the files at most every fsyncInterval seconds. When the queue is full a
+    line waits up to maxWait seconds for space and is otherwise dropped; the
+    lines written, dropped and made to wait are counted and drops logged.
+    """
+
+    def __init__(self, maxQueue=1000, maxBatch=100, fsyncInterval=5.0, maxWait=0.0):
+        """@brief Constructor for the SaveWriter class.
+        @param maxQueue (int): Maximum lines waiting to be written.
+        @param maxBatch (int): Maximum lines written per batch.
+        @param fsyncInterval (float): Seconds between fsyncs, 0 to fsync every batch.
+        @param maxWait (float): Seconds a line waits for queue space before it is dropped.
+        """
+        self.maxBatch = maxBatch
+        self.fsyncInterval = fsyncInterval
+        self.maxWait = maxWait
+        self.queue = queue.Queue(maxQueue)
+        self.files = {}
+        self.unsynced = set()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.waited = 0
+        self.reported = 0
+
+    def start(self):
+        """@brief Start the writer thread if it is not running.
+        @return threading.Thread: The writer thread.
+        """
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="save-writer", daemon=True)
+            self.thread.start()
+        return self.thread
+
+    def put(self, filename, line):
+        """@brief Queue a line to append to a file.
+        @param filename (str): Path of the file, created if missing.
+        @param line (str|object): Encoded JSON line, or an object the writer
+        thread encodes. Objects must not be changed after they are queued.
+        @return bool: True if queued, False if dropped.
+        """
+        self.start()
+        try:
+            self.queue.put_nowait((filename, line))
+            return True
+        except queue.Full:
+            pass
+        if self.maxWait > 0:
+            with self.lock:
+                self.waited += 1
+            try:
+                self.queue.put((filename, line), timeout=self.maxWait)
+                return True
+            except queue.Full:
+                pass
+        with self.lock:
+            self.dropped += 1
+        return False
+
+    def stats(self):
+        """@brief Counts of lines queued, written, dropped and made to wait.
+        @return dict: Counts by name.
+        """
+        with self.lock:
+            return {
+                "queued": self.queue.qsize(),
+                "written": self.written,
+                "dropped": self.dropped,
+                "waited": self.waited,
+            }
+
+    def run(self):
+        """@brief Writer thread loop, until stop queues None."""
+        lastSync = time.monotonic()
+        running = True
+        while running:
+            try:
+                batch = [self.queue.get(timeout=max(self.fsyncInterval, 0.1))]
+            except queue.Empty:
+                batch = []
+            while len(batch) < self.maxBatch:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [item for item in batch if item is not None]
+            self.write(batch)
+            if not running or time.monotonic() - lastSync >= self.fsyncInterval:
+                self.sync()
+                lastSync = time.monotonic()
+        self.close()
+        logger.info(
+            "Save writer stopped: %d lines written, %d dropped, %d waited",
+            self.written,
+            self.dropped,
+            self.waited,
+        )
+
+    def write(self, batch):
+        """@brief Append a batch of lines, grouped into one write per file.
+        @param batch (list): (filename, line) pairs in queue order.
+        """
+        lines = {}
+        for filename, line in batch:
+            if not isinstance(line, str):
+                try:
+                    line = json.dumps(line)
+                except (TypeError, ValueError) as e:
+                    logger.warning("Could not encode a line for %s: %s", filename, e)
+                    with self.lock:
+                        self.dropped += 1
+                    continue
+            lines.setdefault(filename, []).append(line + "\n")
+        for filename, group in lines.items():
+            try:
+                if filename not in self.files:
+                    self.files[filename] = open(filename, "a")
+                self.files[filename].write("".join(group))
+                self.files[filename].flush()
+                self.unsynced.add(filename)
+                written, dropped = len(group), 0
+            except OSError as e:
+                logger.warning("Could not write %d lines to %s: %s", len(group), filename, e)
+                written, dropped = 0, len(group)
+            with self.lock:
+                self.written += written
+                self.dropped += dropped
+
+    def sync(self):
+        """@brief fsync the files written since the last sync and log new drops."""
+        for filename in self.unsynced:
+            try:
+                os.fsync(self.files[filename].fileno())
+            except OSError as e:
+                logger.warning("Could not fsync %s: %s", filename, e)
+        self.unsynced.clear()
+        with self.lock:
+            dropped, self.reported = self.dropped - self.reported, self.dropped
+        if dropped:
+            logger.warning("Save writer dropped %d lines, %d in total", dropped, self.reported)
+
+    def close(self):
+        """@brief Close every open file."""
+        for file in self.files.values():
+            try:
+                file.close()
+            except OSError as e:
+                logger.warning("Could not close %s: %s", file.name, e)
+        self.files = {}
+
+    def stop(self, timeout=None):
+        """@brief Write the queued lines, fsync and close the files and stop the thread.
+        @param timeout (float): Seconds to wait for the thread, None to wait until done.
+        """
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join(timeout)
+        self.thread = None
@@ -3,20 +3,29 @@
 import asyncio
 import hashlib
 import importlib
+import inspect
 import json
+import logging
 import os
 import threading
 import time
 
+import numpy as np
 import requests
 from algorithm.associator.AdsbAssociator import AdsbAssociator
-from algorithm.geometry.Geometry import Geometry
 from algorithm.localisation.EllipseParametric import EllipseParametric
 from algorithm.localisation.EllipsoidParametric import EllipsoidParametric
+from algorithm.localisation.Ensemble import Ensemble
+from algorithm.localisation.IntersectionKernel import IntersectionKernel
+from algorithm.localisation.LeastSquares import LeastSquares
 from algorithm.localisation.SphericalIntersection import SphericalIntersection
+from algorithm.Log import configure_logging, get_logger
+from algorithm.track.ShardedTracker import ShardedTracker
 from algorithm.track.Tracker import Tracker
 from algorithm.truth.AdsbTruth import AdsbTruth
-from data.Ellipsoid import Ellipsoid
+from data.DisplayCache import DisplayCache
+from data.RadarRegistry import RadarRegistry
+from data.SaveWriter import SaveWriter
 from dotenv import load_dotenv
 
 from common.Message import Message
@@ -44,20 +53,66 @@ nDisplayEllipse = int(os.getenv("ELLIPSE_N_DISPLAY"))
 nSamplesEllipsoid = int(os.getenv("ELLIPSOID_N_SAMPLES"))
 thresholdEllipsoid = int(os.getenv("ELLIPSOID_THRESHOLD"))
 nDisplayEllipsoid = int(os.getenv("ELLIPSOID_N_DISPLAY"))
+adaptiveEllipse = os.getenv("ELLIPSE_ADAPTIVE", "false").lower() == "true"
+nCoarseEllipse = int(os.getenv("ELLIPSE_N_COARSE", 50))
+toleranceEllipse = float(os.getenv("ELLIPSE_TOLERANCE", 50))
+upStdEllipse = float(os.getenv("ELLIPSE_UP_STD", 1000))
+adaptiveEllipsoid = os.getenv("ELLIPSOID_ADAPTIVE", "false").lower() == "true"
+nCoarseEllipsoid = int(os.getenv("ELLIPSOID_N_COARSE", 24))
+toleranceEllipsoid = float(os.getenv("ELLIPSOID_TOLERANCE", 50))
+maxPointsDisplay = int(os.getenv("DISPLAY_MAX_POINTS", 500))
+resolutionDisplay = float(os.getenv("DISPLAY_RESOLUTION", 100))
+rangeStdLeastSquares = float(os.getenv("LEAST_SQUARES_RANGE_STD", 100))
+dopplerLeastSquares = os.getenv("LEAST_SQUARES_DOPPLER", "false").lower() == "true"
+backendLocalisation = os.getenv("LOCALISATION_BACKEND", "auto").lower()
+qualityLocalisation = os.getenv("LOCALISATION_QUALITY", "false").lower() == "true"
+rangeStdLocalisation = float(os.getenv("LOCALISATION_RANGE_STD", 100))
+methodsEnsemble = os.getenv(
+    "ENSEMBLE_METHODS",
+    "ellipsoid-parametric-mean,ellipsoid-parametric-min,"
+    "spherical-intersection,least-squares",
+).split(",")
+workersEnsemble = int(os.getenv("ENSEMBLE_WORKERS", 0)) or None
+processesEnsemble = os.getenv("ENSEMBLE_PROCESSES", "false").lower() == "true"
 tDeleteAdsb = int(os.getenv("ADSB_T_DELETE"))
 save = os.getenv("THREE_LIPS_SAVE").lower() == "true"
 tDelete = int(os.getenv("THREE_LIPS_T_DELETE"))
+queueSave = int(os.getenv("SAVE_QUEUE_SIZE", 1000))
+batchSave = int(os.getenv("SAVE_BATCH_SIZE", 100))
+fsyncIntervalSave = float(os.getenv("SAVE_FSYNC_INTERVAL_S", 5))
+maxWaitSave = float(os.getenv("SAVE_MAX_WAIT_S", 0))
+maxHistoryTracker = int(os.getenv("TRACKER_MAX_HISTORY", 50))
+spillHistoryTracker = os.getenv("TRACKER_SPILL_HISTORY", "false").lower() == "true"
+checkpointTracker = os.getenv("TRACKER_CHECKPOINT_PATH", "")
+intervalCheckpointTracker = float(os.getenv("TRACKER_CHECKPOINT_INTERVAL_S", 10))
+maxAgeCheckpointTracker = float(os.getenv("TRACKER_CHECKPOINT_MAX_AGE_S", 300))
+bistaticTracker = os.getenv("TRACKER_BISTATIC_UPDATE", "false").lower() == "true"
+gatedLocalisation = os.getenv("LOCALISATION_TRACK_GATES", "false").lower() == "true"
+
+
+def optional_float(name, default):
+    """Float environment variable, the default when unset and None when empty."""
+    value = os.environ.get(name, str(default))
+    return float(value) if value else None
+
 
 tracker_config_params = {
     "verbose": os.environ.get("TRACKER_VERBOSE", "False").lower() == "true",
     "max_misses_to_delete": int(os.environ.get("TRACKER_MAX_MISSES_TO_DELETE", 5)),
     "min_hits_to_confirm": int(os.environ.get("TRACKER_MIN_HITS_TO_CONFIRM", 3)),
+    "max_misses_to_coast": int(os.environ.get("TRACKER_MAX_MISSES_TO_COAST", 3)),
+    "max_tentative_s": optional_float("TRACKER_MAX_TENTATIVE_S", 5.0),
+    "max_coast_s": optional_float("TRACKER_MAX_COAST_S", 10.0),
+    "max_position_trace_m2": optional_float("TRACKER_MAX_POSITION_TRACE_M2", 1e8),
     "gating_euclidean_threshold_m": float(
         os.environ.get("TRACKER_GATING_EUCLIDEAN_THRESHOLD_M", 10000.0),
     ),
     "gating_mahalanobis_threshold": float(
         os.environ.get("TRACKER_GATING_MAHALANOBIS_THRESHOLD", 11.345),
     ),
+    "association_measure": os.environ.get(
+        "TRACKER_ASSOCIATION_MEASURE", "euclidean"
+    ).lower(),
     "initial_pos_uncertainty_enu_m": [
         float(x)
         for x in os.environ.get(
@@ -72,64 +127,205 @@ tracker_config_params = {
             "100.0,100.0,100.0",
         ).split(",")
     ],
-    "dt_default_s": float(os.environ.get("TRACKER_DT_DEFAULT_S", 1.0)),
     "process_noise_coeff": float(os.environ.get("TRACKER_PROCESS_NOISE_COEFF", 0.1)),
+    "motion_model": os.environ.get("TRACKER_MOTION_MODEL", "cv").lower(),
+    "acceleration_noise_coeff": float(
+        os.environ.get("TRACKER_ACCELERATION_NOISE_COEFF", 1.0),
+    ),
+    "imm_switch_probability": float(
+        os.environ.get("TRACKER_IMM_SWITCH_PROBABILITY", 0.05),
+    ),
     "measurement_noise_coeff": float(os.environ.get("TRACKER_MEASUREMENT_NOISE_COEFF", 500.0)),
     "ref_lat": float(os.environ.get("MAP_LATITUDE", -34.9286)),
     "ref_lon": float(os.environ.get("MAP_LONGITUDE", 138.5999)),
     "ref_alt": float(os.environ.get("MAP_ALTITUDE", 0.0)),
+    "max_gdop": (
+        float(os.environ["TRACKER_MAX_GDOP"])
+        if os.environ.get("TRACKER_MAX_GDOP")
+        else None
+    ),
+    "bistatic_range_std_m": float(os.environ.get("TRACKER_BISTATIC_RANGE_STD_M", 100.0)),
+    "bistatic_range_rate_std_mps": float(
+        os.environ.get("TRACKER_BISTATIC_RANGE_RATE_STD_MPS", 5.0),
+    ),
+    "bistatic_min_radars": int(os.environ.get("TRACKER_BISTATIC_MIN_RADARS", 2)),
+    "localisation_gate_sigma": float(os.environ.get("LOCALISATION_GATE_SIGMA", 3.0)),
+    "localisation_gate_min_m": float(os.environ.get("LOCALISATION_GATE_MIN_M", 500.0)),
+    "shard_cell_m": float(os.environ.get("TRACKER_SHARD_CELL_M") or 0),
+    "shard_overlap_m": (
+        float(os.environ["TRACKER_SHARD_OVERLAP_M"])
+        if os.environ.get("TRACKER_SHARD_OVERLAP_M")
+        else None
+    ),
+    "shard_workers": (
+        int(os.environ["TRACKER_SHARD_WORKERS"])
+        if os.environ.get("TRACKER_SHARD_WORKERS")
+        else None
+    ),
 }
 verbose_tracker = tracker_config_params["verbose"]
 
+logListener = configure_logging(
+    os.getenv("LOG_LEVEL") or ("DEBUG" if verbose_tracker else "INFO"),
+    os.getenv("LOG_QUEUE", "false").lower() == "true",
+    int(os.getenv("LOG_SAMPLE_EVERY", 1)),
+)
+logger = get_logger("event")
+
 api = []
 
+# radar geometry shared by the associator, localisers and display
+radarRegistry = RadarRegistry()
+
 associator_type = os.getenv("ASSOCIATOR_TYPE", "AdsbAssociator")
 try:
     associator_module = importlib.import_module(
         f"algorithm.associator.{associator_type}",
     )
     associator_class = getattr(associator_module, associator_type)
-    associator = associator_class()
+    if "registry" in inspect.signature(associator_class).parameters:
+        associator = associator_class(registry=radarRegistry)
+    else:
+        associator = associator_class()
 except (ModuleNotFoundError, AttributeError) as e:
-    print(f"Warning: Could not load associator '{associator_type}', defaulting to AdsbAssociator. Error: {e}")
+    logger.warning("Could not load associator '%s', defaulting to AdsbAssociator. Error: %s", associator_type, e)
     from algorithm.associator.AdsbAssociator import AdsbAssociator
 
-    associator = AdsbAssociator()
+    associator = AdsbAssociator(registry=radarRegistry)
+
+# compiled or numpy distance kernels for the parametric methods
+intersectionKernel = IntersectionKernel(backendLocalisation)
 
-ellipseParametricMean = EllipseParametric("mean", nSamplesEllipse, thresholdEllipse)
-ellipseParametricMin = EllipseParametric("min", nSamplesEllipse, thresholdEllipse)
+ellipseParametricMean = EllipseParametric(
+    "mean",
+    nSamplesEllipse,
+    thresholdEllipse,
+    adaptiveEllipse,
+    nCoarseEllipse,
+    toleranceEllipse,
+    radarRegistry,
+    qualityLocalisation,
+    rangeStdLocalisation,
+    intersectionKernel,
+    upStdEllipse,
+)
+ellipseParametricMin = EllipseParametric(
+    "minimum",
+    nSamplesEllipse,
+    thresholdEllipse,
+    adaptiveEllipse,
+    nCoarseEllipse,
+    toleranceEllipse,
+    radarRegistry,
+    qualityLocalisation,
+    rangeStdLocalisation,
+    intersectionKernel,
+    upStdEllipse,
+)
 ellipsoidParametricMean = EllipsoidParametric(
     "mean",
     nSamplesEllipsoid,
     thresholdEllipsoid,
+    adaptiveEllipsoid,
+    nCoarseEllipsoid,
+    toleranceEllipsoid,
+    radarRegistry,
+    qualityLocalisation,
+    rangeStdLocalisation,
+    intersectionKernel,
 )
 ellipsoidParametricMin = EllipsoidParametric(
-    "min",
+    "minimum",
     nSamplesEllipsoid,
     thresholdEllipsoid,
+    adaptiveEllipsoid,
+    nCoarseEllipsoid,
+    toleranceEllipsoid,
+    radarRegistry,
+    qualityLocalisation,
+    rangeStdLocalisation,
+    intersectionKernel,
+)
+sphericalIntersection = SphericalIntersection(
+    radarRegistry,
+    qualityLocalisation,
+    rangeStdLocalisation,
+)
+leastSquares = LeastSquares(
+    rangeStdLeastSquares,
+    doppler=dopplerLeastSquares,
+    registry=radarRegistry,
+)
+localisers = {
+    "ellipse-parametric-mean": ellipseParametricMean,
+    "ellipse-parametric-min": ellipseParametricMin,
+    "ellipsoid-parametric-mean": ellipsoidParametricMean,
+    "ellipsoid-parametric-min": ellipsoidParametricMin,
+    "spherical-intersection": sphericalIntersection,
+    "least-squares": leastSquares,
+}
+ensemble = Ensemble(
+    {
+        method.strip(): localisers[method.strip()]
+        for method in methodsEnsemble
+        if method.strip() in localisers
+    },
+    radarRegistry,
+    workersEnsemble,
+    processesEnsemble,
 )
-sphericalIntersection = SphericalIntersection()
+displayCache = DisplayCache(maxPointsDisplay, resolutionDisplay)
 adsbTruth = AdsbTruth(tDeleteAdsb)
 saveFile = "/app/save/" + str(int(time.time())) + ".ndjson"
+historyFile = saveFile.replace(".ndjson", "_history.ndjson")
+saveWriter = SaveWriter(queueSave, batchSave, fsyncIntervalSave, maxWaitSave)
+spilledHistory = []
+# this tick's track dicts and their JSON encoding, shared by every API item
+systemTracks = ([], "[]")
+
+# one tracker, or one per ENU cell on worker processes
+if tracker_config_params["shard_cell_m"]:
+    global_tracker = ShardedTracker(config=tracker_config_params)
+else:
+    global_tracker = Tracker(config=tracker_config_params)
+
+# Share the tracker's ENU frame for ENU to LLA conversion in Track class
+from algorithm.track.Track import Track
+Track.set_frame(global_tracker.frame)
 
-global_tracker = Tracker(config=tracker_config_params)
 
-# Set the reference point for ENU to LLA conversion in Track class
-from algorithm.track.Track import Track
-Track.set_reference_point(
-    tracker_config_params["ref_lat"], 
-    tracker_config_params["ref_lon"], 
-    tracker_config_params["ref_alt"]
+def spill_track_history(track_id, state_vector, covariance, timestamp_ms):
+    """Collect a track history entry evicted from the ring buffer for saving."""
+    spilledHistory.append(
+        {
+            "track_id": track_id,
+            "timestamp_ms": int(timestamp_ms),
+            "state_vector": state_vector.tolist(),
+            "covariance": covariance.tolist(),
+        }
+    )
+
+
+Track.configure_history(
+    maxHistoryTracker,
+    spill_track_history if save and spillHistoryTracker else None,
 )
 
+# warm restart from the last checkpoint, predicted to now
+lastCheckpoint = time.time()
+if checkpointTracker:
+    global_tracker.restore_checkpoint(
+        checkpointTracker, int(lastCheckpoint * 1000), maxAgeCheckpointTracker
+    )
+
 
 async def event():
-    global api, save, global_tracker
+    global api, save, global_tracker, systemTracks
     timestamp = int(time.time() * 1000)
+    save_tracker_checkpoint(timestamp)
 
     if not api:
-        if verbose_tracker:
-            print(f"{timestamp}: No active API requests. Tracker will predict only.")
+        logger.debug("%s: No active API requests. Tracker will predict only.", timestamp)
         if global_tracker:
             _ = global_tracker.update_all_tracks([], timestamp)
         return
@@ -138,9 +334,16 @@ async def event():
     api_event_configs_this_cycle = [
         c for c in api if (timestamp - c.get("timestamp", 0) <= tDelete * 1000)
     ]
-    print(f"DEBUG: Found {len(api_event_configs_this_cycle)} API configs for processing")
-    for i, config in enumerate(api_event_configs_this_cycle):
-        print(f"DEBUG: Config {i}: hash={config.get('hash')}, adsb={config.get('adsb')}, timestamp={config.get('timestamp')}")
+    logger.debug("Found %d API configs for processing", len(api_event_configs_this_cycle))
+    if logger.isEnabledFor(logging.DEBUG):
+        for i, config in enumerate(api_event_configs_this_cycle):
+            logger.debug(
+                "Config %d: hash=%s, adsb=%s, timestamp=%s",
+                i,
+                config.get("hash"),
+                config.get("adsb"),
+                config.get("timestamp"),
+            )
 
     def translate_localhost_to_container(server):
         """Translate localhost URLs to container names for inter-container communication."""
@@ -166,7 +369,7 @@ async def event():
             data = response.json()
             radar_detections.append(data)
         except requests.exceptions.RequestException as e:
-            print(f"Error fetching data from {url}: {e}")
+            logger.warning("Error fetching data from %s: %s", url, e)
             radar_detections.append(None)
 
     radar_config_url = [f"http://{radar_name}/api/config" for radar_name in radar_names]
@@ -178,7 +381,7 @@ async def event():
             data = response.json()
             radar_config.append(data)
         except requests.exceptions.RequestException as e:
-            print(f"Error fetching data from {url}: {e}")
+            logger.warning("Error fetching data from %s: %s", url, e)
             radar_config.append(None)
 
     for i in range(len(radar_names)):
@@ -186,20 +389,37 @@ async def event():
             "detection": radar_detections[i],
             "config": radar_config[i],
         }
+    radarRegistry.update(radar_dict)
 
     truth_adsb = {}
     adsb_urls = []
     for item in api_event_configs_this_cycle:
         adsb_urls.append(item["adsb"])
     adsb_urls = list(set(adsb_urls))
-    print(f"DEBUG: Processing {len(adsb_urls)} unique ADS-B URLs: {adsb_urls}")
+    logger.debug("Processing %d unique ADS-B URLs: %s", len(adsb_urls), adsb_urls)
     for url in adsb_urls:
-        print(f"DEBUG: Calling adsbTruth.process({url})")
-        result = adsbTruth.process(url)
-        print(f"DEBUG: adsbTruth.process returned: {type(result)}, content: {result}")
-        truth_adsb[url] = result
+        truth_adsb[url] = adsbTruth.process(url)
+        logger.debug("ADS-B truth from %s has %d aircraft", url, len(truth_adsb[url]))
+
+    # seed least-squares with ADS-B track positions, keyed by hex like targets
+    track_priors = {}
+    if global_tracker:
+        adsb_tracks = [
+            track
+            for track in global_tracker.active_tracks.values()
+            if track.adsb_info and track.state_vector is not None
+        ]
+        if adsb_tracks:
+            lla = global_tracker.frame.enu2lla(
+                [np.asarray(track.state_vector).flatten()[:3] for track in adsb_tracks],
+            )
+            for track, point in zip(adsb_tracks, lla.tolist()):
+                track_priors[track.adsb_info.get("hex")] = point
+    leastSquares.set_priors(track_priors)
 
     all_localised_points_for_tracker_input_this_scan = []
+    all_bistatic_detections_for_tracker = []
+    bistatic_track_ids = set()
     processed_api_request_outputs = []
     unique_lla_points_for_tracker_keys = set()
     for item_config in api_event_configs_this_cycle:
@@ -220,7 +440,7 @@ async def event():
             radar_dict_item.get(r) and radar_dict_item[r].get("config")
             for r in item_radars_translated
         ):
-            print(f"Skipping item {item_config.get('hash')} due to missing radar data/config for its servers.")
+            logger.warning("Skipping item %s due to missing radar data/config for its servers.", item_config.get("hash"))
             temp_output = item_config.copy()
             temp_output["timestamp_event"] = timestamp
             temp_output["error"] = "Missing radar data/config for configured servers."
@@ -244,8 +464,12 @@ async def event():
             localisation_algorithm = ellipsoidParametricMin
         elif localisation_id == "spherical-intersection":
             localisation_algorithm = sphericalIntersection
+        elif localisation_id == "least-squares":
+            localisation_algorithm = leastSquares
+        elif localisation_id == "ensemble":
+            localisation_algorithm = ensemble
         else:
-            print(f"Error: Localisation algorithm '{localisation_id}' invalid for item {item_config.get('hash')}.")
+            logger.error("Localisation algorithm '%s' invalid for item %s.", localisation_id, item_config.get("hash"))
             error_output = item_config.copy()
             error_output.update(
                 {
@@ -262,6 +486,29 @@ async def event():
             continue
         # Perform item-specific association
         associated_dets = associator.process(item_radars_translated, radar_dict_item, timestamp)
+        # Targets already tracked update their track from range and Doppler
+        bistatic_matches = {}
+        if global_tracker and (bistaticTracker or gatedLocalisation):
+            bistatic_targets = {
+                key: convert_associated_to_bistatic_format(value)
+                for key, value in associated_dets.items()
+                if isinstance(value, list)
+            }
+            bistatic_matches = global_tracker.match_bistatic(bistatic_targets, timestamp)
+        if bistaticTracker:
+            for key, track_id in bistatic_matches.items():
+                if track_id in bistatic_track_ids:
+                    continue
+                bistatic_track_ids.add(track_id)
+                all_bistatic_detections_for_tracker.append(
+                    {
+                        "track_id": track_id,
+                        "timestamp_ms": timestamp,
+                        "source_api_hash": item_config.get("hash", "unknown_item"),
+                        "source_target_id": key,
+                        "measurements": bistatic_targets[key],
+                    },
+                )
         # Prepare for localisation
         associated_dets_3_radars = {
             key: value
@@ -282,9 +529,32 @@ async def event():
                 "ellipsoid-parametric-mean",
                 "ellipsoid-parametric-min",
                 "spherical-intersection",
+                "least-squares",
+                "ensemble",
             ]
             else associated_dets
         )
+        if bistaticTracker and bistatic_matches:
+            input_for_localisation = {
+                key: value
+                for key, value in input_for_localisation.items()
+                if key not in bistatic_matches
+            }
+        # Tracked targets are only searched for near their predicted track
+        if global_tracker and gatedLocalisation and hasattr(localisation_algorithm, "set_gates"):
+            gate_tracks = {
+                key: global_tracker.hex_index[key]
+                for key in input_for_localisation
+                if key in global_tracker.hex_index
+            }
+            gate_tracks.update(
+                {
+                    key: track_id
+                    for key, track_id in bistatic_matches.items()
+                    if key in input_for_localisation
+                },
+            )
+            localisation_algorithm.set_gates(global_tracker.predict_gates(gate_tracks, timestamp))
         localised_dets_for_item = localisation_algorithm.process(
             input_for_localisation,
             radar_dict_item,
@@ -301,19 +571,24 @@ async def event():
                         )
                         if point_key_tuple not in unique_lla_points_for_tracker_keys:
                             unique_lla_points_for_tracker_keys.add(point_key_tuple)
+                            tracker_input = {
+                                "lla_position": point_lla,
+                                "timestamp_ms": timestamp,
+                                "source_api_hash": item_config.get(
+                                    "hash",
+                                    "unknown_item",
+                                ),
+                                "source_target_id": target_id,
+                            }
+                            # quality metrics let the tracker weight and gate
+                            for field in ["covariance", "gdop"]:
+                                if field in data_dict:
+                                    tracker_input[field] = data_dict[field]
                             all_localised_points_for_tracker_input_this_scan.append(
-                                {
-                                    "lla_position": point_lla,
-                                    "timestamp_ms": timestamp,
-                                    "source_api_hash": item_config.get(
-                                        "hash",
-                                        "unknown_item",
-                                    ),
-                                    "source_target_id": target_id,
-                                },
+                                tracker_input,
                             )
-                    elif verbose_tracker:
-                        print(f"Skipping malformed point for tracker input: {point_lla}")
+                    else:
+                        logger.debug("Skipping malformed point for tracker input: %s", point_lla)
         # Calculate ellipsoids for display
         ellipsoids_for_item = {}
         if localisation_id in [
@@ -325,58 +600,23 @@ async def event():
             if associated_dets_2_radars:
                 key = next(iter(associated_dets_2_radars))
                 ellipsoid_radars = []
+                flat = localisation_id in [
+                    "ellipse-parametric-mean",
+                    "ellipse-parametric-min",
+                ]
                 for radar in associated_dets_2_radars[key]:
                     ellipsoid_radars.append(radar["radar"])
-                    tx_lla = [
-                        radar_dict_item[radar["radar"]]["config"]["location"]["tx"][
-                            "latitude"
-                        ],
-                        radar_dict_item[radar["radar"]]["config"]["location"]["tx"][
-                            "longitude"
-                        ],
-                        radar_dict_item[radar["radar"]]["config"]["location"]["tx"][
-                            "altitude"
-                        ],
-                    ]
-                    rx_lla = [
-                        radar_dict_item[radar["radar"]]["config"]["location"]["rx"][
-                            "latitude"
-                        ],
-                        radar_dict_item[radar["radar"]]["config"]["location"]["rx"][
-                            "longitude"
-                        ],
-                        radar_dict_item[radar["radar"]]["config"]["location"]["rx"][
-                            "altitude"
-                        ],
-                    ]
-                    ellipsoid = Ellipsoid(tx_lla, rx_lla, radar["radar"])
-                    points = localisation_algorithm.sample(
-                        ellipsoid,
+                    geometry = radarRegistry.get(
+                        radar["radar"],
+                        radar_dict_item[radar["radar"]]["config"],
+                    )
+                    ellipsoids_for_item[radar["radar"]] = displayCache.get(
+                        localisation_algorithm,
+                        geometry,
                         radar["delay"] * 1000,
-                        nDisplayEllipse,
+                        nDisplayEllipse if flat else nDisplayEllipsoid,
+                        flat,
                     )
-                    # Convert ENU points to LLA using ellipsoid midpoint as reference
-                    for i in range(len(points)):
-                        lat, lon, alt = Geometry.enu2lla(
-                            points[i][0],
-                            points[i][1],
-                            points[i][2],
-                            ellipsoid.midpoint_lla[0],
-                            ellipsoid.midpoint_lla[1],
-                            ellipsoid.midpoint_lla[2],
-                        )
-                        if localisation_id in [
-                            "ellipsoid-parametric-mean",
-                            "ellipsoid-parametric-min",
-                        ]:
-                            alt = round(alt)
-                        if localisation_id in [
-                            "ellipse-parametric-mean",
-                            "ellipse-parametric-min",
-                        ]:
-                            alt = 0
-                        points[i] = [round(lat, 3), round(lon, 3), alt]
-                    ellipsoids_for_item[radar["radar"]] = points
         item_processing_stop_time = time.time()
         output_for_this_item = item_config.copy()
         output_for_this_item["timestamp_event"] = timestamp
@@ -387,8 +627,13 @@ async def event():
         output_for_this_item["time"] = (
             item_processing_stop_time - item_processing_start_time
         )
-        if verbose_tracker:
-            print(f"{timestamp}: Item {item_config.get('hash')} Method: {localisation_id}, Time: {output_for_this_item['time']:.4f}s", flush=True)
+        logger.debug(
+            "%s: Item %s Method: %s, Time: %.4fs",
+            timestamp,
+            item_config.get("hash"),
+            localisation_id,
+            output_for_this_item["time"],
+        )
         processed_api_request_outputs.append(output_for_this_item)
 
     # --- Pass 2: Update Global Tracker with all unique localised points from this scan ---
@@ -400,19 +645,25 @@ async def event():
             timestamp,
         )
 
-        if verbose_tracker:
-            print(f"{timestamp}: Updating global_tracker with {len(all_localised_points_for_tracker_input_this_scan)} unique radar points and {len(all_adsb_detections_for_tracker)} ADS-B detections.")
+        logger.debug(
+            "%s: Updating global_tracker with %d unique radar points, %d bistatic targets and %d ADS-B detections.",
+            timestamp,
+            len(all_localised_points_for_tracker_input_this_scan),
+            len(all_bistatic_detections_for_tracker),
+            len(all_adsb_detections_for_tracker),
+        )
 
         current_system_tracks_map = global_tracker.update_all_tracks(
             all_localised_points_for_tracker_input_this_scan,
             timestamp,
             adsb_detections_lla=all_adsb_detections_for_tracker,
+            bistatic_detections=all_bistatic_detections_for_tracker,
         )
-    serializable_system_tracks = [
-        track.to_dict() for track in current_system_tracks_map.values()
-    ]
-    if verbose_tracker and serializable_system_tracks:
-        print(f"{timestamp}: Global System Tracks ({len(serializable_system_tracks)} generated): {[t['track_id'] for t in serializable_system_tracks]}", flush=True)
+    # only tracks changed since the last tick are converted and encoded again
+    system_tracks = list(current_system_tracks_map.values())
+    serializable_system_tracks = Track.serialise_all(system_tracks)
+    systemTracks = (serializable_system_tracks, Track.encode_all(system_tracks))
+    logger.debug("%s: %d global system tracks", timestamp, len(serializable_system_tracks))
 
     # --- Pass 3: Augment each API request's output with the global system tracks & Manage API list ---
     final_api_list_for_this_cycle = []
@@ -431,17 +682,50 @@ async def event():
         ):
             processed_item_output["system_tracks"] = serializable_system_tracks
             final_api_list_for_this_cycle.append(processed_item_output)
-        elif verbose_tracker and original_config:
-            print(
-                f"{timestamp}: API Config {item_hash} (orig_ts: {original_config.get('timestamp', 'N/A')}) timed out. Not including in final output.",
+        elif original_config:
+            logger.debug(
+                "%s: API Config %s (orig_ts: %s) timed out. Not including in final output.",
+                timestamp,
+                item_hash,
+                original_config.get("timestamp", "N/A"),
             )
-        elif verbose_tracker and not original_config:
-            print(f"{timestamp}: Warning - Processed item {item_hash} not found in original configs for timeout check.")
+        else:
+            logger.warning("%s: Processed item %s not found in original configs for timeout check.", timestamp, item_hash)
     api = final_api_list_for_this_cycle
     if save and api:
-        append_api_to_file(api)
-    elif save and not api and verbose_tracker:
-        print(f"{timestamp}: Save is true, but 'api' list is empty. Nothing to save.")
+        saveWriter.put(saveFile, "[" + ", ".join(encode_api_item(item) for item in api) + "]")
+    elif save and not api:
+        logger.debug("%s: Save is true, but 'api' list is empty. Nothing to save.", timestamp)
+    if spilledHistory:
+        # the writer encodes the entries, so hand it a copy
+        saveWriter.put(historyFile, spilledHistory.copy())
+        spilledHistory.clear()
+
+
+def convert_associated_to_bistatic_format(radars):
+    """Bistatic range and range rate of one associated target for the tracker.
+
+    Range rate is -doppler * c / fc, and None when a radar has no carrier
+    frequency or Doppler.
+    """
+    measurements = []
+    for radar in radars:
+        geometry = radarRegistry.get(radar["radar"])
+        if geometry is None or radar.get("delay") is None:
+            continue
+        range_rate = None
+        if radar.get("doppler") is not None and geometry.fc:
+            range_rate = -radar["doppler"] * 299792458 / geometry.fc
+        measurements.append(
+            {
+                "radar": radar["radar"],
+                "tx_lla": geometry.tx_lla,
+                "rx_lla": geometry.rx_lla,
+                "range_m": radar["delay"] * 1000,
+                "range_rate_mps": range_rate,
+            },
+        )
+    return measurements
 
 
 def convert_adsb_truth_to_tracker_format(truth_adsb, timestamp_ms):
@@ -481,12 +765,11 @@ def convert_adsb_truth_to_tracker_format(truth_adsb, timestamp_ms):
                     adsb_detections.append(adsb_detection)
 
             except Exception as e:
-                if verbose_tracker:
-                    print(f"Error converting ADS-B aircraft {hex_code} to tracker format: {e}")
+                logger.debug("Error converting ADS-B aircraft %s to tracker format: %s", hex_code, e)
                 continue
 
-    if verbose_tracker and adsb_detections:
-        print(f"{timestamp_ms}: Converted {len(adsb_detections)} ADS-B aircraft to tracker format")
+    if adsb_detections:
+        logger.debug("%s: Converted %d ADS-B aircraft to tracker format", timestamp_ms, len(adsb_detections))
 
     return adsb_detections
 
@@ -497,14 +780,28 @@ async def main():
         await asyncio.sleep(1)
 
 
-def append_api_to_file(api_object, filename=saveFile):
-    if not os.path.exists(filename):
-        with open(filename, "w"):
-            pass
+def save_tracker_checkpoint(timestamp_ms, force=False):
+    """Checkpoint the tracker when enabled and the interval has passed."""
+    global lastCheckpoint
+    if not checkpointTracker:
+        return
+    if not force and timestamp_ms / 1000.0 - lastCheckpoint < intervalCheckpointTracker:
+        return
+    lastCheckpoint = timestamp_ms / 1000.0
+    try:
+        global_tracker.save_checkpoint(checkpointTracker)
+    except OSError as e:
+        logger.warning("Could not write tracker checkpoint %s: %s", checkpointTracker, e)
+
 
-    with open(filename, "a") as json_file:
-        json.dump(api_object, json_file)
-        json_file.write("\n")
+def encode_api_item(item):
+    """JSON for an API item, splicing in the pre-encoded system tracks when current."""
+    tracks, tracks_json = systemTracks
+    if item.get("system_tracks") is not tracks:
+        return json.dumps(item)
+    rest = {key: value for key, value in item.items() if key != "system_tracks"}
+    head = json.dumps(rest)[:-1] + (", " if rest else "")
+    return head + '"system_tracks": ' + tracks_json + "}"
 
 
 def short_hash(input_string, length=10):
@@ -514,7 +811,7 @@ def short_hash(input_string, length=10):
 
 
 async def callback_message_received(msg):
-    global api, verbose_tracker
+    global api
     timestamp_receipt = int(time.time() * 1000)
     msg_hash = short_hash(msg)
     output_for_client = {}
@@ -523,9 +820,8 @@ async def callback_message_received(msg):
 
     if existing_item:
         existing_item["timestamp"] = timestamp_receipt
-        output_for_client = json.dumps(existing_item)
-        if verbose_tracker:
-            print(f"{timestamp_receipt}: Updated timestamp for existing API config: {msg_hash}")
+        output_for_client = encode_api_item(existing_item)
+        logger.debug("%s: Updated timestamp for existing API config: %s", timestamp_receipt, msg_hash)
     else:
         new_api_item = {"hash": msg_hash, "timestamp": timestamp_receipt}
         try:
@@ -542,10 +838,9 @@ async def callback_message_received(msg):
                 new_api_item["server"] = [new_api_item["server"]]
             api.append(new_api_item)
             output_for_client = json.dumps(new_api_item)
-            if verbose_tracker:
-                print(f"{timestamp_receipt}: Added new API config: {msg_hash} - {new_api_item}")
+            logger.debug("%s: Added new API config: %s - %s", timestamp_receipt, msg_hash, new_api_item)
         except ValueError as e:
-            print(f"Error parsing API request message '{msg}': {e}")
+            logger.warning("Error parsing API request message '%s': %s", msg, e)
             output_for_client = json.dumps({"error": "Invalid API request format", "request": msg})
     return output_for_client
 
@@ -555,4 +850,13 @@ message_api_request.set_callback_message_received(callback_message_received)
 
 if __name__ == "__main__":
     threading.Thread(target=message_api_request.start_listener).start()
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    finally:
+        save_tracker_checkpoint(int(time.time() * 1000), force=True)
+        ensemble.shutdown()
+        if isinstance(global_tracker, ShardedTracker):
+            global_tracker.shutdown()
+        saveWriter.stop()
+        if logListener is not None:
+            logListener.stop()
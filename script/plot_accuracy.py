@@ -3,7 +3,7 @@ import json
 
 import matplotlib.pyplot as plt
 import numpy as np
-from geometry.Geometry import Geometry
+from geometry.LocalFrame import LocalFrame
 
 
 def parse_posix_time(value):
@@ -80,6 +80,7 @@ def main():
 
     # get LLA coords from first radar or Adelaide CBD
     radar4_lla = [-34.9286, 138.5999, 50]
+    frame = LocalFrame(*radar4_lla)
 
     # extract data of interest
     server = json_data[0][0]["server"]
@@ -113,19 +114,9 @@ def main():
                     method["detections_localised"][args.target_name]["points"][0],
                 )
                 # covert to ENU
-                x, y, z = Geometry.lla2ecef(
-                    position[method_localisation]["detections"][-1][0],
-                    position[method_localisation]["detections"][-1][1],
-                    position[method_localisation]["detections"][-1][2],
-                )
-                x, y, z = Geometry.ecef2enu(
-                    x,
-                    y,
-                    z,
-                    radar4_lla[0],
-                    radar4_lla[1],
-                    radar4_lla[2],
-                )
+                x, y, z = frame.lla2enu(
+                    position[method_localisation]["detections"][-1],
+                ).tolist()
                 if "detections_enu" not in position[method_localisation]:
                     position[method_localisation]["detections_enu"] = []
                 position[method_localisation]["detections_enu"].append([x, y, z])
@@ -167,12 +158,9 @@ def main():
     )
 
     # convert truth to ENU
-    truth_position_resampled_enu = []
-    for pos in truth_position_resampled:
-        x, y, z = Geometry.lla2ecef(pos[0], pos[1], pos[2])
-        truth_position_resampled_enu.append(
-            Geometry.ecef2enu(x, y, z, radar4_lla[0], radar4_lla[1], radar4_lla[2]),
-        )
+    truth_position_resampled_enu = frame.lla2enu(
+        np.reshape(truth_position_resampled, (-1, 3)),
+    ).tolist()
 
     # plot x, y, z
     mark = ["x", "o", "s"]
@@ -152,3 +152,47 @@ class TestAdsbIntegration:
         assert len(tracks) == 1
         assert track_id in tracks
         assert tracks[track_id].misses > initial_misses
+
+    def test_crossing_aircraft_keep_their_tracks(self):
+        """Test that bound aircraft update their own track even when closer to another"""
+
+        def adsb(offsets):
+            lla = self.tracker.frame.enu2lla(
+                [[offsets[0], 0, 2000], [offsets[1], 0, 2000]]
+            ).tolist()
+            return [
+                {"lla_position": lla[0], "adsb_info": {"hex": "AAA111"}},
+                {"lla_position": lla[1], "adsb_info": {"hex": "BBB222"}},
+            ]
+
+        self.tracker.update_all_tracks([], 1000, adsb_detections_lla=adsb([0, 400]))
+        track_ids = dict(self.tracker.hex_index)
+        assert len(track_ids) == 2
+
+        # the aircraft swap sides, so each is nearest the other's track
+        tracks = self.tracker.update_all_tracks(
+            [], 2000, adsb_detections_lla=adsb([400, 0])
+        )
+
+        assert len(tracks) == 2
+        assert self.tracker.hex_index == track_ids
+        for hex_code, track_id in track_ids.items():
+            assert tracks[track_id].adsb_info["hex"] == hex_code
+            assert tracks[track_id].hits == 2
+
+    def test_hex_index_cleared_on_deletion(self):
+        """Test that a deleted track releases its aircraft"""
+        adsb_detections = [
+            {
+                "lla_position": [-34.9286, 138.5999, 2000],
+                "adsb_info": {"hex": "ABC123", "flight": "TEST01"},
+            }
+        ]
+        self.tracker.update_all_tracks([], 1000, adsb_detections_lla=adsb_detections)
+        assert "ABC123" in self.tracker.hex_index
+
+        for i in range(7):
+            self.tracker.update_all_tracks([], 2000 + i * 1000, adsb_detections_lla=[])
+
+        assert self.tracker.active_tracks == {}
+        assert self.tracker.hex_index == {}
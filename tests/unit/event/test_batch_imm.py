@@ -0,0 +1,102 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
+
+from datetime import datetime, timedelta
+
+import numpy as np
+from algorithm.models.MotionModels import create_enu_constant_acceleration_model
+from algorithm.track.BatchIMM import BatchIMM
+from algorithm.track.BatchKalman import BatchKalman
+from algorithm.track.Tracker import Tracker
+from stonesoup.predictor.kalman import KalmanPredictor
+from stonesoup.types.state import GaussianState
+
+# Stone Soup orders the combined model [e, ve, ae, n, vn, an, u, vu, au]
+ORDER = [0, 3, 6, 1, 4, 7, 2, 5, 8]
+
+
+def random_states(n, seed=0):
+    rng = np.random.default_rng(seed)
+    means = rng.normal(0, 1000, (n, 6))
+    factors = rng.normal(0, 10, (n, 6, 6))
+    covars = factors @ np.swapaxes(factors, 1, 2) + np.eye(6)
+    return means, covars
+
+
+def track_error(config, seed=0):
+    """Final position error on a target that starts turning hard after 10 ticks."""
+    tracker = Tracker({"gating_euclidean_threshold_m": 5000.0, "measurement_noise_coeff": 20.0, **config})
+    rng = np.random.default_rng(seed)
+    position = np.array([0.0, 0.0, 5000.0])
+    velocity = np.array([200.0, 0.0, 0.0])
+    for tick in range(25):
+        if tick >= 10:
+            velocity = velocity + np.array([0.0, 30.0, 0.0])
+        position = position + velocity
+        measured = position + rng.normal(0, 20, 3)
+        tracker.update_all_tracks(
+            [{"lla_position": tracker.frame.enu2lla(measured).tolist()}], 1000 * (tick + 1)
+        )
+    assert len(tracker.track_ids) == 1
+    return np.linalg.norm(tracker.means[0, :3] - position), tracker
+
+
+class TestBatchIMM:
+    def test_acceleration_model_matches_stone_soup(self):
+        imm = BatchIMM(acceleration_noise_coeff=0.5, switch_probability=0.0)
+        means, covars = random_states(3)
+        mode_means, mode_covars, _ = imm.initiate(means, covars)
+        mode_means[:, 1, 6:] = [1.0, -2.0, 0.5]
+        probabilities = np.tile([0.0, 1.0], (3, 1))
+        dt = np.array([0.5, 1.0, 3.0])
+
+        predicted, predicted_covars, predicted_probs = imm.predict(
+            mode_means, mode_covars, probabilities, dt
+        )
+
+        np.testing.assert_allclose(predicted_probs, probabilities)
+        predictor = KalmanPredictor(create_enu_constant_acceleration_model(0.5))
+        start = datetime(2024, 1, 1)
+        for i in range(3):
+            prior = GaussianState(
+                mode_means[i, 1][ORDER], mode_covars[i, 1][np.ix_(ORDER, ORDER)], timestamp=start
+            )
+            expected = predictor.predict(prior, timestamp=start + timedelta(seconds=dt[i]))
+            np.testing.assert_allclose(predicted[i, 1][ORDER], np.ravel(expected.state_vector))
+            np.testing.assert_allclose(
+                predicted_covars[i, 1][np.ix_(ORDER, ORDER)], expected.covar, rtol=1e-9
+            )
+
+    def test_velocity_model_matches_batch_kalman(self):
+        imm = BatchIMM(noise_diff_coeff=0.2, switch_probability=0.0, initial_probabilities=(1.0, 0.0))
+        means, covars = random_states(4, seed=1)
+        dt = np.array([0.5, 1.0, 2.0, 4.0])
+
+        modes = imm.predict(*imm.initiate(means, covars), dt)
+        combined_means, combined_covars = imm.combine(*modes)
+
+        expected_means, expected_covars = BatchKalman(0.2).predict(means, covars, dt)
+        np.testing.assert_allclose(combined_means, expected_means)
+        np.testing.assert_allclose(combined_covars, expected_covars, rtol=1e-9)
+
+    def test_tracker_imm_follows_manoeuvre(self):
+        cv_error, _ = track_error({"motion_model": "cv"})
+        imm_error, tracker = track_error({"motion_model": "imm"})
+
+        assert imm_error < cv_error
+        # the acceleration model dominates once the target turns
+        assert tracker.mode_probs[0, 1] > 0.5
+
+    def test_tracker_imm_prefers_velocity_model_in_straight_flight(self):
+        tracker = Tracker(
+            {"motion_model": "imm", "gating_euclidean_threshold_m": 5000.0, "measurement_noise_coeff": 20.0}
+        )
+        rng = np.random.default_rng(1)
+        for tick in range(15):
+            position = np.array([200.0 * tick, 0.0, 5000.0]) + rng.normal(0, 20, 3)
+            tracker.update_all_tracks(
+                [{"lla_position": tracker.frame.enu2lla(position).tolist()}], 1000 * (tick + 1)
+            )
+        assert tracker.mode_probs[0, 0] > 0.5
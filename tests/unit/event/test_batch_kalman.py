@@ -0,0 +1,99 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
+
+from datetime import datetime, timedelta
+
+import numpy as np
+from algorithm.models.MeasurementModels import create_enu_position_measurement_model
+from algorithm.models.MotionModels import create_enu_constant_velocity_model
+from algorithm.track.BatchKalman import BatchKalman
+from algorithm.track.Tracker import Tracker
+from stonesoup.predictor.kalman import KalmanPredictor
+from stonesoup.types.detection import Detection
+from stonesoup.types.hypothesis import SingleHypothesis
+from stonesoup.types.state import GaussianState
+from stonesoup.updater.kalman import KalmanUpdater
+
+# Stone Soup orders the combined model [e, ve, n, vn, u, vu]
+ORDER = [0, 3, 1, 4, 2, 5]
+
+
+def random_states(n, seed=0):
+    rng = np.random.default_rng(seed)
+    means = rng.normal(0, 1000, (n, 6))
+    factors = rng.normal(0, 10, (n, 6, 6))
+    covars = factors @ np.swapaxes(factors, 1, 2) + np.eye(6)
+    return means, covars
+
+
+class TestBatchKalman:
+    def test_predict_matches_stone_soup(self):
+        means, covars = random_states(4)
+        dt = np.array([0.5, 1.0, 2.0, 7.5])
+        predicted_means, predicted_covars = BatchKalman(0.1).predict(means, covars, dt)
+
+        predictor = KalmanPredictor(create_enu_constant_velocity_model(0.1))
+        start = datetime(2024, 1, 1)
+        for i in range(len(dt)):
+            prior = GaussianState(
+                means[i][ORDER], covars[i][np.ix_(ORDER, ORDER)], timestamp=start
+            )
+            expected = predictor.predict(prior, timestamp=start + timedelta(seconds=dt[i]))
+            np.testing.assert_allclose(
+                predicted_means[i][ORDER], np.ravel(expected.state_vector)
+            )
+            np.testing.assert_allclose(
+                predicted_covars[i][np.ix_(ORDER, ORDER)], expected.covar, rtol=1e-9
+            )
+
+    def test_update_matches_stone_soup(self):
+        means, covars = random_states(3, seed=1)
+        measurements = means[:, :3] + 50
+        noise = np.array([np.diag([100.0, 400.0, 900.0])] * 3)
+        updated_means, updated_covars = BatchKalman().update(
+            means, covars, measurements, noise
+        )
+
+        timestamp = datetime(2024, 1, 1)
+        for i in range(len(means)):
+            model = create_enu_position_measurement_model(noise_covariance=noise[i])
+            updater = KalmanUpdater(model)
+            prediction = GaussianState(means[i], covars[i], timestamp=timestamp)
+            detection = Detection(
+                measurements[i], timestamp=timestamp, measurement_model=model
+            )
+            expected = updater.update(SingleHypothesis(prediction, detection))
+            np.testing.assert_allclose(updated_means[i], np.ravel(expected.state_vector))
+            np.testing.assert_allclose(updated_covars[i], expected.covar, atol=1e-6)
+
+    def test_empty_batch(self):
+        kalman = BatchKalman()
+        means, covars = kalman.predict(np.zeros((0, 6)), np.zeros((0, 6, 6)), [])
+        assert means.shape == (0, 6)
+        assert covars.shape == (0, 6, 6)
+        means, covars = kalman.update(means, covars, np.zeros((0, 3)), np.zeros((0, 3, 3)))
+        assert means.shape == (0, 6)
+
+    def test_tracker_keeps_many_targets(self):
+        tracker = Tracker(
+            {"gating_euclidean_threshold_m": 1000.0, "measurement_noise_coeff": 10.0}
+        )
+        rng = np.random.default_rng(2)
+        # well separated targets on a grid around the reference point
+        grid = np.stack(np.meshgrid(np.arange(20), np.arange(25)), -1).reshape(-1, 2)
+        start = np.hstack([grid * 5000.0, rng.uniform(1000, 10000, (len(grid), 1))])
+        velocity = rng.normal(0, 100, start.shape)
+
+        for tick in range(3):
+            enu = start + velocity * tick
+            detections = [
+                {"lla_position": lla} for lla in tracker.frame.enu2lla(enu).tolist()
+            ]
+            tracks = tracker.update_all_tracks(detections, 1000 * (tick + 1))
+
+        assert len(tracks) == len(grid)
+        assert all(track.hits == 3 for track in tracks.values())
+        assert tracker.means.shape == (len(grid), 6)
+        np.testing.assert_allclose(tracker.means[:, :3], enu, atol=20)
@@ -0,0 +1,111 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
+
+import numpy as np
+from algorithm.track.BistaticEKF import BistaticEKF
+from algorithm.track.Track import TrackStatus
+from algorithm.track.Tracker import Tracker
+
+CONFIG = {"gating_euclidean_threshold_m": 2000.0, "measurement_noise_coeff": 20.0}
+# TX and RX of two radars in the tracker's ENU frame
+RADARS = [
+    (np.array([-20000.0, 0.0, 100.0]), np.array([0.0, -15000.0, 50.0])),
+    (np.array([-20000.0, 0.0, 100.0]), np.array([25000.0, 5000.0, 80.0])),
+]
+
+
+def measurements(tracker, position, velocity, doppler=True):
+    """Noise-free bistatic range and range rate of the target from each radar."""
+    means = np.tile(np.concatenate([position, velocity]), (len(RADARS), 1))
+    tx = np.array([radar[0] for radar in RADARS])
+    rx = np.array([radar[1] for radar in RADARS])
+    z, _ = BistaticEKF.measure(means, tx, rx)
+    return [
+        {
+            "radar": f"radar{i}",
+            "tx_lla": tracker.frame.enu2lla(tx[i]).tolist(),
+            "rx_lla": tracker.frame.enu2lla(rx[i]).tolist(),
+            "range_m": z[i, 0],
+            "range_rate_mps": z[i, 1] if doppler else None,
+        }
+        for i in range(len(RADARS))
+    ]
+
+
+def confirmed_tracker(config=None):
+    """Tracker with one confirmed track on a target flying east at 150 m/s."""
+    tracker = Tracker({**CONFIG, **(config or {})})
+    for tick in range(5):
+        position = np.array([150.0 * tick, 0.0, 5000.0])
+        tracker.update_all_tracks(
+            [{"lla_position": tracker.frame.enu2lla(position).tolist()}], 1000 * (tick + 1)
+        )
+    track = tracker.active_tracks[tracker.track_ids[0]]
+    assert track.status == TrackStatus.CONFIRMED
+    return tracker
+
+
+class TestBistaticEKF:
+    def test_jacobian_matches_finite_differences(self):
+        rng = np.random.default_rng(0)
+        means = np.hstack([rng.normal(0, 10000, (4, 3)), rng.normal(0, 200, (4, 3)), np.zeros((4, 3))])
+        tx = rng.normal(0, 20000, (4, 3))
+        rx = rng.normal(0, 20000, (4, 3))
+        z, H = BistaticEKF.measure(means, tx, rx)
+
+        step = 1e-3
+        for i in range(6):
+            shifted = means.copy()
+            shifted[:, i] += step
+            numeric = (BistaticEKF.measure(shifted, tx, rx)[0] - z) / step
+            np.testing.assert_allclose(H[:, :, i], numeric, rtol=1e-4, atol=1e-6)
+        assert not H[:, :, 6:].any()
+
+    def test_bistatic_updates_maintain_track(self):
+        for model in ("cv", "imm"):
+            tracker = confirmed_tracker({"motion_model": model})
+            track_id = tracker.track_ids[0]
+            velocity = np.array([150.0, 0.0, 0.0])
+            for tick in range(5, 20):
+                position = np.array([150.0 * tick, 0.0, 5000.0])
+                detection = {
+                    "track_id": track_id,
+                    "source_target_id": "target",
+                    "measurements": measurements(tracker, position, velocity, doppler=tick % 2 == 0),
+                }
+                tracker.update_all_tracks([], 1000 * (tick + 1), bistatic_detections=[detection])
+
+            track = tracker.active_tracks[track_id]
+            assert track.misses == 0
+            assert track.hits == 20
+            assert np.linalg.norm(tracker.means[0, :3] - position) < 200
+            assert np.linalg.norm(tracker.means[0, 3:] - velocity) < 20
+
+    def test_match_bistatic_gates_targets(self):
+        tracker = confirmed_tracker()
+        position = np.array([900.0, 0.0, 5000.0])
+        far = np.array([15000.0, 12000.0, 8000.0])
+        velocity = np.array([150.0, 0.0, 0.0])
+        targets = {
+            "near": measurements(tracker, position, velocity),
+            "far": measurements(tracker, far, velocity),
+            "single": measurements(tracker, position, velocity)[:1],
+        }
+
+        matched = tracker.match_bistatic(targets, 6000)
+        assert matched == {"near": tracker.track_ids[0]}
+        # matching predicts a copy, the tracker itself is untouched
+        assert tracker.last_timestamp_ms == 5000
+
+    def test_predict_gates_follow_track(self):
+        tracker = confirmed_tracker({"localisation_gate_min_m": 50.0})
+        gates = tracker.predict_gates({"target": tracker.track_ids[0], "stale": "unknown"}, 6000)
+
+        assert list(gates) == ["target"]
+        position, radius = gates["target"]
+        predicted = tracker.frame.lla2enu(position)
+        np.testing.assert_allclose(predicted, [750.0, 0.0, 5000.0], atol=50)
+        spread = np.sqrt(np.linalg.eigvalsh(tracker.covars[0, :3, :3])[-1])
+        assert radius > 3 * spread
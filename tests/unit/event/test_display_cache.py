@@ -0,0 +1,50 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
+
+from algorithm.localisation.EllipseParametric import EllipseParametric
+from algorithm.localisation.EllipsoidParametric import EllipsoidParametric
+from data.DisplayCache import DisplayCache
+from data.RadarGeometry import RadarGeometry
+
+CONFIG = {
+    "location": {
+        "tx": {"latitude": -34.80, "longitude": 138.50, "altitude": 100},
+        "rx": {"latitude": -34.95, "longitude": 138.60, "altitude": 50},
+    },
+}
+
+
+class TestDisplayCache:
+    def test_reuses_surface_within_resolution(self):
+        cache = DisplayCache(resolution=100)
+        geometry = RadarGeometry("radar1", CONFIG)
+        localiser = EllipsoidParametric()
+
+        first = cache.get(localiser, geometry, 20010, 50)
+        assert cache.get(localiser, geometry, 20040, 50) is first
+        assert cache.get(localiser, geometry, 20200, 50) is not first
+
+    def test_decimates_to_point_budget(self):
+        cache = DisplayCache(maxPoints=200)
+        geometry = RadarGeometry("radar1", CONFIG)
+        points = cache.get(EllipsoidParametric(), geometry, 20000, 100)
+
+        assert 0 < len(points) <= 200
+        assert all(alt > 0 for _, _, alt in points)
+        assert all(isinstance(alt, int) for _, _, alt in points)
+
+    def test_flat_ellipse_and_eviction(self):
+        cache = DisplayCache(maxEntries=2)
+        geometry = RadarGeometry("radar1", CONFIG)
+        localiser = EllipseParametric()
+
+        points = cache.get(localiser, geometry, 10000, 50, flat=True)
+        assert len(points) == 50
+        assert all(alt == 0 for _, _, alt in points)
+
+        cache.get(localiser, geometry, 20000, 50, flat=True)
+        cache.get(localiser, geometry, 30000, 50, flat=True)
+        assert len(cache.entries) == 2
+        assert cache.get(localiser, geometry, 10000, 50, flat=True) is not points
@@ -0,0 +1,84 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
+
+from itertools import permutations
+
+import numpy as np
+from algorithm.track.GatedAssignment import GatedAssignment
+from algorithm.track.Tracker import Tracker
+
+
+def make_tracks(positions, variance=100.0):
+    positions = np.asarray(positions, dtype=float)
+    means = np.hstack([positions, np.zeros_like(positions)])
+    covars = np.repeat(np.eye(6)[None] * variance, len(positions), axis=0)
+    return means, covars
+
+
+def noise(n, variance=100.0):
+    return np.repeat(np.eye(3)[None] * variance, n, axis=0)
+
+
+class TestGatedAssignment:
+    def test_detection_is_not_shared(self):
+        # both tracks are nearest to detection 0, greedy would give it to both
+        means, covars = make_tracks([[0, 0, 0], [300, 0, 0]])
+        positions = np.array([[100.0, 0, 0], [500.0, 0, 0]])
+        rows, columns = GatedAssignment(euclidean_threshold=1000).assign(
+            means, covars, positions, noise(2)
+        )
+        assert sorted(zip(rows, columns)) == [(0, 0), (1, 1)]
+
+    def test_gate_leaves_far_detection_unassigned(self):
+        means, covars = make_tracks([[0, 0, 0]])
+        positions = np.array([[5000.0, 0, 0]])
+        rows, columns = GatedAssignment(euclidean_threshold=1000).assign(
+            means, covars, positions, noise(1)
+        )
+        assert len(rows) == 0
+        assert len(columns) == 0
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        assignment = GatedAssignment(euclidean_threshold=400)
+        for _ in range(20):
+            means, covars = make_tracks(rng.uniform(0, 1000, (4, 3)))
+            positions = rng.uniform(0, 1000, (5, 3))
+            rows, columns = assignment.assign(means, covars, positions, noise(5))
+
+            distance = np.linalg.norm(means[:, None, :3] - positions[None], axis=2)
+            gated = distance < 400
+            # most pairs first, then least total distance
+            best = max(
+                (
+                    sum(gated[i, j] for i, j in enumerate(perm)),
+                    -sum(distance[i, j] for i, j in enumerate(perm) if gated[i, j]),
+                )
+                for perm in permutations(range(5), 4)
+            )
+            assert len(rows) == best[0]
+            np.testing.assert_allclose(-distance[rows, columns].sum(), best[1])
+
+    def test_mahalanobis_uses_covariance(self):
+        means, covars = make_tracks([[0, 0, 0]])
+        # uncertain east, precise north
+        covars[0, :3, :3] = np.diag([1e6, 1.0, 1.0])
+        assignment = GatedAssignment("mahalanobis", euclidean_threshold=5000)
+
+        rows, _ = assignment.assign(means, covars, np.array([[2000.0, 0, 0]]), noise(1, 1.0))
+        assert len(rows) == 1
+        rows, _ = assignment.assign(means, covars, np.array([[0, 50.0, 0]]), noise(1, 1.0))
+        assert len(rows) == 0
+
+    def test_tracker_assigns_each_detection_once(self):
+        tracker = Tracker({"gating_euclidean_threshold_m": 1000.0})
+        first = tracker.frame.enu2lla([[0, 0, 1000], [300, 0, 1000]]).tolist()
+        tracker.update_all_tracks([{"lla_position": lla} for lla in first], 1000)
+
+        second = tracker.frame.enu2lla([[100, 0, 1000], [500, 0, 1000]]).tolist()
+        tracks = tracker.update_all_tracks([{"lla_position": lla} for lla in second], 2000)
+
+        assert len(tracks) == 2
+        assert all(track.hits == 2 for track in tracks.values())
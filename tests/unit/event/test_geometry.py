@@ -3,6 +3,7 @@ import sys
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
 
+import numpy as np
 from algorithm.geometry.Geometry import Geometry
 
 
@@ -72,4 +73,34 @@ class TestGeometry:
 
         # Test case 3: Average of three points
         result = Geometry.average_points([(1, 1, 1), (2, 2, 2), (3, 3, 3)])
-        assert result == [2, 2, 2]
\ No newline at end of file
+        assert result == [2, 2, 2]
+
+    def test_lla2enu_array_matches_scalar(self):
+        lla = np.array([[-34.9286, 139.0, 50], [-35.0, 138.5, 1000], [-34.8, 138.7, 0]])
+        ref = [-34.9286, 138.5999, 50]
+        result = Geometry.lla2enu_array(lla, ref)
+        assert result.shape == (3, 3)
+        for row, point in zip(result, lla):
+            np.testing.assert_allclose(row, Geometry.lla2enu(*point, *ref))
+
+        # Broadcast over one reference per point
+        refs = np.array([ref, [-35.0, 138.5, 1000], ref])
+        result = Geometry.lla2enu_array(lla, refs)
+        np.testing.assert_allclose(result[1], [0, 0, 0], atol=1e-9)
+
+    def test_enu2lla_array_round_trip(self):
+        enu = np.array([[1000, 0, 0], [0, -5000, 300], [25000, 12000, 10000]])
+        ref = [-34.9286, 138.5999, 50]
+        lla = Geometry.enu2lla_array(enu, ref)
+        np.testing.assert_allclose(Geometry.lla2enu_array(lla, ref), enu, atol=1e-6)
+        for row, point in zip(lla, enu):
+            np.testing.assert_allclose(row, Geometry.enu2lla(*point, *ref))
+
+    def test_distance_arrays(self):
+        result = Geometry.distance_enu_array([[0, 0, 0], [1, 1, 1]], [3, 4, 0])
+        np.testing.assert_allclose(result, [5, np.sqrt(4 + 9 + 1)])
+
+        points = np.array([[-34.9286, 138.5999, 50], [-34.9286, 138.6099, 50]])
+        result = Geometry.distance_lla_array(points[0], points)
+        assert abs(result[0]) < 0.001
+        assert abs(result[1] - Geometry.distance_lla(points[0], points[1])) < 1e-6
@@ -0,0 +1,73 @@
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
+
+import numpy as np
+import pytest
+from algorithm.localisation.IntersectionKernel import IntersectionKernel
+
+
+def loop_mean(master, others, threshold):
+    # reference nested loops from the original implementation
+    output = []
+    for point1 in master:
+        if all(
+            any(math.dist(point1, point2) < threshold for point2 in other)
+            for other in others
+        ):
+            output.append(list(point1))
+    return output
+
+
+def loop_minimum(master, others, threshold):
+    best, best_point = threshold, None
+    for point1 in master:
+        distances = [
+            min([threshold] + [math.dist(point1, point2) for point2 in other])
+            for other in others
+        ]
+        norm = math.sqrt(sum(d**2 for d in distances))
+        if norm < best:
+            best, best_point = norm, list(point1)
+    return best_point
+
+
+def make_points(seed=0):
+    rng = np.random.default_rng(seed)
+    master = rng.uniform(0, 5000, (300, 3))
+    others = [rng.uniform(0, 5000, (n, 3)) for n in (250, 200)]
+    return master, others
+
+
+class TestIntersectionKernel:
+    def test_numpy_matches_loops(self):
+        master, others = make_points()
+        kernel = IntersectionKernel("numpy", chunk=64)
+
+        np.testing.assert_allclose(
+            kernel.mean(master, others, 400), loop_mean(master, others, 400)
+        )
+        np.testing.assert_allclose(
+            kernel.minimum(master, others, 400), loop_minimum(master, others, 400)
+        )
+        assert kernel.minimum(master, others, 1) is None
+
+    def test_empty_surface(self):
+        master, others = make_points()
+        kernel = IntersectionKernel("numpy")
+
+        assert len(kernel.mean(master, [others[0], np.empty((0, 3))], 400)) == 0
+        assert kernel.minimum(np.empty((0, 3)), others, 400) is None
+
+    def test_numba_matches_numpy(self):
+        pytest.importorskip("numba")
+        master, others = make_points(1)
+        compiled = IntersectionKernel("numba")
+        assert compiled.backend == "numba"
+
+        np.testing.assert_allclose(
+            compiled.min_distance(master, others[0], 400),
+            IntersectionKernel("numpy").min_distance(master, others[0], 400),
+        )
@@ -0,0 +1,70 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
+
+import numpy as np
+from algorithm.geometry.Geometry import Geometry
+from algorithm.geometry.LocalFrame import LocalFrame
+
+REFERENCE = [-34.9286, 138.5999, 50]
+
+
+class TestLocalFrame:
+    def test_lla2ecef_known_values(self):
+        np.testing.assert_allclose(Geometry.lla2ecef(0, 0, 0), [6378137, 0, 0])
+        np.testing.assert_allclose(
+            Geometry.lla2ecef(90, 0, 0), [0, 0, 6356752.314245], atol=1e-6
+        )
+        np.testing.assert_allclose(
+            Geometry.lla2ecef(0, 90, 1000), [0, 6379137, 0], atol=1e-6
+        )
+
+    def test_ecef2lla_round_trip(self):
+        lla = np.array(
+            [
+                [-34.9, 138.6, 3000],
+                [89.999, 10, 100],
+                [-89.999, -170, 100000],
+                [0, 180, -50],
+            ],
+        )
+        result = Geometry.ecef2lla_array(Geometry.lla2ecef_array(lla))
+        np.testing.assert_allclose(result[:, :2], lla[:, :2], atol=1e-9)
+        np.testing.assert_allclose(result[:, 2], lla[:, 2], atol=1e-3)
+
+    def test_origin_and_axes(self):
+        frame = LocalFrame(*REFERENCE)
+        np.testing.assert_allclose(frame.lla2enu(REFERENCE), [0, 0, 0], atol=1e-6)
+        np.testing.assert_allclose(
+            frame.rotation @ frame.rotation.T, np.eye(3), atol=1e-12
+        )
+
+        # straight up from the reference point
+        up = frame.lla2enu([REFERENCE[0], REFERENCE[1], REFERENCE[2] + 1000])
+        np.testing.assert_allclose(up, [0, 0, 1000], atol=1e-6)
+
+        # east along a parallel drops below the tangent plane
+        east = frame.lla2enu([REFERENCE[0], REFERENCE[1] + 1, REFERENCE[2]])
+        assert east[0] > 90000
+        assert east[2] < -500
+
+    def test_enu_round_trip_matches_geometry(self):
+        frame = LocalFrame(*REFERENCE)
+        enu = np.array([[1000, 0, 0], [0, -5000, 300], [150000, 120000, 10000]])
+        lla = frame.enu2lla(enu)
+        np.testing.assert_allclose(frame.lla2enu(lla), enu, atol=1e-6)
+        for row, point in zip(frame.enu2ecef(enu), enu):
+            np.testing.assert_allclose(row, Geometry.enu2ecef(*point, *REFERENCE))
+            np.testing.assert_allclose(
+                Geometry.ecef2enu(*row, *REFERENCE), point, atol=1e-6
+            )
+
+    def test_preserves_distances(self):
+        frame = LocalFrame(*REFERENCE)
+        lla = np.array([[-34.0, 138.0, 100], [-36.0, 140.0, 12000]])
+        ecef = Geometry.lla2ecef_array(lla)
+        enu = frame.lla2enu(lla)
+        np.testing.assert_allclose(
+            np.linalg.norm(enu[0] - enu[1]), np.linalg.norm(ecef[0] - ecef[1])
+        )
@@ -0,0 +1,353 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
+
+import numpy as np
+from algorithm.geometry.Geometry import Geometry
+from algorithm.geometry.LocalFrame import LocalFrame
+from algorithm.localisation.EllipseParametric import EllipseParametric
+from algorithm.localisation.EllipsoidParametric import EllipsoidParametric
+from algorithm.localisation.Ensemble import Ensemble
+from algorithm.localisation.LeastSquares import LeastSquares
+from algorithm.localisation.SphericalIntersection import SphericalIntersection
+
+# Three bistatic pairs around Adelaide, as [lat, lon, alt]
+RADARS = {
+    "radar1": {"tx": [-34.80, 138.50, 100], "rx": [-34.95, 138.60, 50]},
+    "radar2": {"tx": [-34.80, 138.50, 100], "rx": [-35.00, 138.75, 60]},
+    "radar3": {"tx": [-34.90, 138.90, 300], "rx": [-34.85, 138.65, 40]},
+}
+TARGET = [-34.9123, 138.7234, 3210]
+TARGET_VELOCITY = [120.0, -80.0, 5.0]
+FC = 204640000
+
+
+def make_radar_data():
+    return {
+        name: {
+            "config": {
+                "location": {
+                    node: {"latitude": lla[0], "longitude": lla[1], "altitude": lla[2]}
+                    for node, lla in nodes.items()
+                },
+                "capture": {"fc": FC},
+            },
+        }
+        for name, nodes in RADARS.items()
+    }
+
+
+def bistatic_delay(target, nodes):
+    # exact bistatic range in km from ECEF positions
+    target_ecef, tx_ecef, rx_ecef = Geometry.lla2ecef_array(
+        [target, nodes["tx"], nodes["rx"]]
+    )
+    return (
+        np.linalg.norm(target_ecef - tx_ecef)
+        + np.linalg.norm(target_ecef - rx_ecef)
+        - np.linalg.norm(tx_ecef - rx_ecef)
+    ) / 1000
+
+
+def make_assoc_detections(target=TARGET):
+    detections = []
+    for name, nodes in RADARS.items():
+        # Doppler from range rate, relative to the rx node
+        frame = LocalFrame(*nodes["rx"])
+        target_enu, tx_enu = frame.lla2enu([target, nodes["tx"]])
+        u_tx = (target_enu - tx_enu) / np.linalg.norm(target_enu - tx_enu)
+        u_rx = target_enu / np.linalg.norm(target_enu)
+        range_rate = (u_tx + u_rx) @ np.array(TARGET_VELOCITY)
+        detections.append(
+            {
+                "radar": name,
+                "delay": bistatic_delay(target, nodes),
+                "doppler": -range_rate * FC / 299792458,
+            },
+        )
+    return {"target1": detections}
+
+
+class TestEllipsoidParametricAdaptive:
+    def test_adaptive_mean_localises_target(self):
+        localiser = EllipsoidParametric("mean", adaptive=True, tolerance=50)
+        output = localiser.process(make_assoc_detections(), make_radar_data())
+
+        assert "target1" in output
+        point = output["target1"]["points"][0]
+        # lat/lon are rounded to 3 decimal places (~100m)
+        assert Geometry.distance_lla(TARGET, point) < 200
+
+    def test_adaptive_minimum_within_tolerance(self):
+        localiser = EllipsoidParametric("minimum", adaptive=True, tolerance=50)
+        output = localiser.process(make_assoc_detections(), make_radar_data())
+
+        assert "target1" in output
+        assert Geometry.distance_lla(TARGET, output["target1"]["points"][0]) < 200
+
+    def test_adaptive_no_intersection(self):
+        assoc = make_assoc_detections()
+        # inconsistent delay on one radar removes the intersection
+        assoc["target1"][2]["delay"] += 50
+        localiser = EllipsoidParametric("mean", adaptive=True, tolerance=50)
+        assert localiser.process(assoc, make_radar_data()) == {}
+
+
+class TestTrackGates:
+    def gate(self, offset_m=300, radius=1500):
+        frame = LocalFrame(*TARGET)
+        return {"target1": (frame.enu2lla([offset_m, 0, 0]).tolist(), radius)}
+
+    def test_gated_grid_samples_only_near_track(self):
+        localiser = EllipsoidParametric("mean", nSamples=400)
+        radar_data = make_radar_data()
+        localiser.registry.update(radar_data)
+        geometry = localiser.registry["radar1"]
+        bistatic_range = make_assoc_detections()["target1"][0]["delay"] * 1000
+        centre = geometry.frame.lla2enu(self.gate()["target1"][0])
+        bounds = localiser.window(geometry, bistatic_range, centre, 1500)
+
+        gated = localiser.sample_array(geometry, bistatic_range, 400, bounds)
+        full = localiser.sample_array(geometry, bistatic_range, 400)
+        assert len(gated) < len(full) / 20
+        # the window covers every full-grid sample inside the gate
+        near = full[np.linalg.norm(full - centre, axis=1) < 1500]
+        assert len(near) > 0
+        distance = np.linalg.norm(near[:, None] - gated[None], axis=2).min(axis=1)
+        assert distance.max() < 500
+
+    def test_gated_adaptive_localises_target(self):
+        for localiser in [
+            EllipsoidParametric("mean", adaptive=True, tolerance=50),
+            EllipsoidParametric("minimum", adaptive=True, tolerance=50),
+        ]:
+            localiser.set_gates(self.gate())
+            output = localiser.process(make_assoc_detections(), make_radar_data())
+            assert Geometry.distance_lla(TARGET, output["target1"]["points"][0]) < 200
+
+    def test_wrong_gate_falls_back_to_full_search(self):
+        localiser = EllipsoidParametric("mean", adaptive=True, tolerance=50)
+        localiser.set_gates(self.gate(offset_m=20000, radius=500))
+        output = localiser.process(make_assoc_detections(), make_radar_data())
+        assert Geometry.distance_lla(TARGET, output["target1"]["points"][0]) < 200
+
+    def test_gated_ellipse_stays_in_gate(self):
+        # the 2D ellipse fixes altitude, so the target flies low
+        target = [*TARGET[:2], 100]
+        localiser = EllipseParametric("minimum", adaptive=True, tolerance=50)
+        localiser.set_gates(self.gate())
+        output = localiser.process(make_assoc_detections(target), make_radar_data())
+        assert Geometry.distance_lla(target, output["target1"]["points"][0]) < 200
+
+    def test_least_squares_starts_from_gate(self):
+        localiser = LeastSquares()
+        localiser.set_gates(self.gate())
+        output = localiser.process(make_assoc_detections(), make_radar_data())
+        assert Geometry.distance_lla(TARGET, output["target1"]["points"][0]) < 50
+
+
+class TestLeastSquares:
+    def test_localises_target_with_covariance(self):
+        localiser = LeastSquares()
+        output = localiser.process(make_assoc_detections(), make_radar_data())
+
+        assert "target1" in output
+        assert Geometry.distance_lla(TARGET, output["target1"]["points"][0]) < 50
+        covariance = np.array(output["target1"]["covariance"])
+        assert covariance.shape == (3, 3)
+        assert np.all(np.diag(covariance) > 0)
+
+    def test_starts_from_prior(self):
+        localiser = LeastSquares()
+        localiser.set_priors({"target1": [-34.95, 138.6, 1000]})
+        output = localiser.process(make_assoc_detections(), make_radar_data())
+
+        assert Geometry.distance_lla(TARGET, output["target1"]["points"][0]) < 50
+
+    def test_doppler_velocity(self):
+        localiser = LeastSquares(doppler=True)
+        output = localiser.process(make_assoc_detections(), make_radar_data())
+
+        np.testing.assert_allclose(
+            output["target1"]["velocity"], TARGET_VELOCITY, atol=5
+        )
+
+
+class TestSphericalIntersection:
+    def test_batched_targets_match_single_target(self):
+        # SX requires a common transmitter
+        common_tx = RADARS["radar1"]["tx"]
+        radars = {name: {**nodes, "tx": common_tx} for name, nodes in RADARS.items()}
+        radar_data = make_radar_data()
+        for name in radar_data:
+            radar_data[name]["config"]["location"]["tx"] = radar_data["radar1"][
+                "config"
+            ]["location"]["tx"]
+
+        targets = [[-34.90, 138.70, 2000], [-34.95, 138.80, 5000], TARGET]
+        assoc = {}
+        for index, target in enumerate(targets):
+            detections = []
+            for name, nodes in radars.items():
+                detections.append(
+                    {"radar": name, "delay": bistatic_delay(target, nodes)}
+                )
+            # mix radar order, which must not change the grouping
+            assoc[f"target{index}"] = detections[::-1] if index % 2 else detections
+
+        localiser = SphericalIntersection()
+        batched = localiser.process(assoc, radar_data)
+
+        for target_id in assoc:
+            single = localiser.process({target_id: assoc[target_id]}, radar_data)
+            np.testing.assert_allclose(
+                batched[target_id]["points"][0], single[target_id]["points"][0]
+            )
+        for index, target in enumerate(targets):
+            point = batched[f"target{index}"]["points"][0]
+            assert Geometry.distance_lla(target, point) < 50
+
+
+class TestQuality:
+    def test_spherical_intersection_alternative_root(self):
+        radar_data = make_radar_data()
+        for name in radar_data:
+            radar_data[name]["config"]["location"]["tx"] = radar_data["radar1"][
+                "config"
+            ]["location"]["tx"]
+        common_tx = RADARS["radar1"]["tx"]
+        radars = {name: {**nodes, "tx": common_tx} for name, nodes in RADARS.items()}
+        assoc = {
+            "target1": [
+                {"radar": name, "delay": bistatic_delay(TARGET, nodes)}
+                for name, nodes in radars.items()
+            ],
+        }
+
+        output = SphericalIntersection(quality=True).process(assoc, radar_data)
+
+        target = output["target1"]
+        assert Geometry.distance_lla(TARGET, target["points"][0]) < 50
+        assert len(target["alternatives"]) == 1
+        assert target["alternatives"][0][2] < target["points"][0][2]
+        assert target["residual"] < 1
+        assert target["gdop"] > 0
+        assert np.all(np.diag(target["covariance"]) > 0)
+
+    def test_adaptive_mean_reports_spread(self):
+        localiser = EllipsoidParametric(
+            "mean", adaptive=True, tolerance=50, quality=True, rangeStd=10
+        )
+        output = localiser.process(make_assoc_detections(), make_radar_data())
+
+        target = output["target1"]
+        covariance = np.array(target["covariance"])
+        np.testing.assert_allclose(covariance, covariance.T)
+        assert np.all(np.linalg.eigvalsh(covariance) > 0)
+        assert target["residual"] < 100
+
+    def test_ellipse_reports_configured_up_variance(self):
+        localiser = EllipseParametric(quality=True, rangeStd=10, upStd=1000)
+        localiser.registry.update(make_radar_data())
+        frame = localiser.registry["radar1"].frame
+        target = [-34.9123, 138.7234, 100]
+        detections = [
+            {"radar": name, "delay": bistatic_delay(target, nodes)}
+            for name, nodes in RADARS.items()
+        ]
+
+        quality = localiser.assess(frame, frame.lla2enu(target), detections)
+
+        covariance = np.array(quality["covariance"])
+        assert abs(covariance[2, 2] - 1000**2) / 1000**2 < 0.01
+        assert 0 < covariance[0, 0] < 1000**2
+        assert 0 < covariance[1, 1] < 1000**2
+
+    def test_quality_is_optional(self):
+        output = EllipsoidParametric("mean", adaptive=True).process(
+            make_assoc_detections(), make_radar_data()
+        )
+        assert set(output["target1"]) == {"points"}
+
+
+class SlowLocaliser:
+    """Stand-in localiser that sleeps, to check methods run concurrently."""
+
+    def __init__(self, point, covariance=None):
+        self.point = point
+        self.covariance = covariance
+
+    def process(self, assoc_detections, radar_data):
+        time.sleep(0.2)
+        output = {"points": [self.point]}
+        if self.covariance is not None:
+            output["covariance"] = self.covariance
+        return {target: dict(output) for target in assoc_detections}
+
+
+class TestEnsemble:
+    def test_runs_methods_concurrently_and_fuses_median(self):
+        points = [[-34.91, 138.72, 3000], [-34.92, 138.73, 3400], [-34.5, 138.0, 100]]
+        ensemble = Ensemble(
+            {f"method{i}": SlowLocaliser(point) for i, point in enumerate(points)}
+        )
+
+        start = time.time()
+        output = ensemble.process(make_assoc_detections(), make_radar_data())
+        assert time.time() - start < 0.5
+
+        target = output["target1"]
+        assert set(target["methods"]) == {"method0", "method1", "method2"}
+        # median ignores the outlying third method
+        assert Geometry.distance_lla(points[0], target["points"][0]) < 2000
+        assert "covariance" not in target
+
+    def test_inverse_covariance_weighting(self):
+        precise = np.diag([1.0, 1.0, 1.0]).tolist()
+        loose = np.diag([1e6, 1e6, 1e6]).tolist()
+        ensemble = Ensemble(
+            {
+                "precise": SlowLocaliser(TARGET, precise),
+                "loose": SlowLocaliser([-34.95, 138.8, 5000], loose),
+            },
+        )
+        target = ensemble.process(make_assoc_detections(), make_radar_data())["target1"]
+
+        assert Geometry.distance_lla(TARGET, target["points"][0]) < 1
+        assert np.all(np.diag(target["covariance"]) < 1.01)
+
+    def test_real_localisers_in_processes(self):
+        # SX requires a common transmitter
+        common_tx = RADARS["radar1"]["tx"]
+        radar_data = make_radar_data()
+        for name in radar_data:
+            radar_data[name]["config"]["location"]["tx"] = radar_data["radar1"][
+                "config"
+            ]["location"]["tx"]
+        assoc = {
+            "target1": [
+                {"radar": name, "delay": bistatic_delay(TARGET, {**nodes, "tx": common_tx})}
+                for name, nodes in RADARS.items()
+            ],
+        }
+        ensemble = Ensemble(
+            {
+                "spherical-intersection": SphericalIntersection(),
+                "least-squares": LeastSquares(),
+            },
+            processes=True,
+        )
+        # the pool is only started on first use
+        assert ensemble.executor is None
+        try:
+            target = ensemble.process(assoc, radar_data)["target1"]
+        finally:
+            ensemble.shutdown()
+
+        assert set(target["methods"]) == {"spherical-intersection", "least-squares"}
+        for method in target["methods"].values():
+            assert Geometry.distance_lla(TARGET, method["points"][0]) < 50
+        assert Geometry.distance_lla(TARGET, target["points"][0]) < 50
+        assert ensemble.executor is None
@@ -0,0 +1,54 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
+
+import logging
+
+import numpy as np
+from algorithm import Log
+from algorithm.Log import Sampler, configure_logging, get_logger
+from algorithm.track.Track import Track
+
+
+class RecordList(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestLog:
+    def teardown_method(self):
+        configure_logging("WARNING")
+        logging.getLogger(Log.ROOT).handlers.clear()
+        get_logger("track").setLevel(logging.NOTSET)
+
+    def test_sampler_keeps_one_in_every(self):
+        sample = Sampler(3)
+        assert [sample() for _ in range(7)] == [True, False, False, True, False, False, True]
+
+    def test_sampler_uses_configured_default(self):
+        configure_logging("WARNING", sample_every=2)
+        sample = Sampler()
+        assert [sample() for _ in range(4)] == [True, False, True, False]
+
+    def test_disabled_debug_skips_sampling_and_formatting(self):
+        configure_logging("WARNING")
+        sample = sys.modules["algorithm.track.Track"].sample
+        count = sample.count
+        track = Track()
+        for i in range(10):
+            track.update({}, i, np.zeros(6), np.eye(6))
+            track.increment_misses()
+        assert sample.count == count
+
+    def test_queued_handler_delivers_records(self):
+        listener = configure_logging("DEBUG", queued=True)
+        records = RecordList()
+        listener.handlers = (records,)
+        get_logger("test").debug("value %d", 42)
+        listener.stop()
+        assert [record.getMessage() for record in records.records] == ["value 42"]
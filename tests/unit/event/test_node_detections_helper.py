@@ -7,49 +7,57 @@ from unittest.mock import patch
 
 import numpy as np
 from algorithm.associator.NodeDetectionsHelper import NodeDetectionsHelper
+from algorithm.track.StoneSoupTracker import StoneSoupTracker
 
-
-class MockTrack:
-    def __init__(self, state_vector):
-        self.state_vector = np.array(state_vector)
+TRACK_LLA = [-34.9, 138.7, 3000]
 
 
 class TestNodeDetectionsHelper:
     def setup_method(self):
-        self.helper = NodeDetectionsHelper()
+        self.tracker = StoneSoupTracker()
+        self.tracker.update_all_tracks([{"lla_position": TRACK_LLA}], 1000)
+        self.helper = NodeDetectionsHelper(self.tracker.frame)
 
-    @patch("algorithm.geometry.Geometry.Geometry.lla2ecef")
-    def test_has_existing_tracks_in_detection_space_true(self, mock_lla2ecef):
-        # Setup
-        mock_lla2ecef.return_value = (1000, 2000, 3000)
-        new_detection_lla = [1, 2, 3]
-        existing_tracks_map = {
-            "track1": MockTrack([1001, 2001, 3001, 0, 0, 0]),
-            "track2": MockTrack([5000, 6000, 7000, 0, 0, 0]),
-        }
-        gating_threshold_m = 5
-        # Should be within threshold for track1
+    def offset_lla(self, offset_enu):
+        track = next(iter(self.tracker.active_tracks.values()))
+        position = np.asarray(track.state_vector[:3], dtype=float).ravel()
+        return self.tracker.frame.enu2lla(position + offset_enu).tolist()
+
+    def test_has_existing_tracks_in_detection_space_true(self):
+        # 3 m east of the only track, within the 5 m gate
         result = self.helper.has_existing_tracks_in_detection_space(
-            new_detection_lla,
-            existing_tracks_map,
-            gating_threshold_m,
+            self.offset_lla([3, 0, 0]),
+            self.tracker.active_tracks,
+            5,
         )
         assert result
 
-    @patch("algorithm.geometry.Geometry.Geometry.lla2ecef")
-    def test_has_existing_tracks_in_detection_space_false(self, mock_lla2ecef):
-        mock_lla2ecef.return_value = (0, 0, 0)
-        new_detection_lla = [1, 2, 3]
-        existing_tracks_map = {"track1": MockTrack([1000, 2000, 3000, 0, 0, 0])}
-        gating_threshold_m = 10
-        # Should be outside threshold
+    def test_has_existing_tracks_in_detection_space_false(self):
+        # 50 m north of the only track, outside the 10 m gate
         result = self.helper.has_existing_tracks_in_detection_space(
-            new_detection_lla,
-            existing_tracks_map,
-            gating_threshold_m,
+            self.offset_lla([0, 50, 0]),
+            self.tracker.active_tracks,
+            10,
         )
         assert not result
 
+    def test_index_follows_tracks_changed_in_place(self):
+        tracks = self.tracker.active_tracks
+        second = self.offset_lla([5000, 0, 0])
+        for timestamp_ms in (self.tracker.last_timestamp_ms, None):
+            assert not self.helper.has_existing_tracks_in_detection_space(
+                second, tracks, 1000, timestamp_ms
+            )
+
+        # a tick in the same dict starts a second track
+        self.tracker.update_all_tracks([{"lla_position": TRACK_LLA}, {"lla_position": second}], 2000)
+        assert self.tracker.active_tracks is tracks
+        assert len(tracks) == 2
+        for timestamp_ms in (self.tracker.last_timestamp_ms, None):
+            assert self.helper.has_existing_tracks_in_detection_space(
+                second, tracks, 1000, timestamp_ms
+            )
+
     def test_has_existing_tracks_in_detection_space_empty(self):
         new_detection_lla = [1, 2, 3]
         existing_tracks_map = {}
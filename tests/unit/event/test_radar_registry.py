@@ -0,0 +1,52 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
+
+import copy
+
+from data.RadarRegistry import RadarRegistry
+
+CONFIG = {
+    "location": {
+        "tx": {"latitude": -34.80, "longitude": 138.50, "altitude": 100},
+        "rx": {"latitude": -34.95, "longitude": 138.60, "altitude": 50},
+    },
+    "capture": {"fc": 204640000},
+    "truth": {"adsb": {"tar1090": "localhost:5001"}},
+}
+
+
+class TestRadarRegistry:
+    def test_get_reuses_geometry_for_same_config(self):
+        registry = RadarRegistry()
+        first = registry.get("radar1", CONFIG)
+        second = registry.get("radar1", copy.deepcopy(CONFIG))
+
+        assert first is second
+        assert registry["radar1"] is first
+        assert first.ellipsoid.name == "radar1"
+        assert first.adsb2dd_url.startswith("http")
+        assert "&fc=204.64" in first.adsb2dd_url
+
+    def test_config_change_rebuilds_geometry(self):
+        registry = RadarRegistry()
+        first = registry.get("radar1", CONFIG)
+
+        moved = copy.deepcopy(CONFIG)
+        moved["location"]["rx"]["latitude"] = -35.0
+        second = registry.get("radar1", moved)
+
+        assert second is not first
+        assert second.rx_lla[0] == -35.0
+
+    def test_update_skips_missing_config_and_invalidate(self):
+        registry = RadarRegistry()
+        registry.update({"radar1": {"config": CONFIG}, "radar2": {"config": None}})
+
+        assert "radar1" in registry
+        assert "radar2" not in registry
+
+        registry.invalidate("radar1")
+        assert "radar1" not in registry
+        assert registry.get("radar1") is None
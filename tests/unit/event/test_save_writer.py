@@ -0,0 +1,62 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
+
+import json
+import threading
+
+from data.SaveWriter import SaveWriter
+
+
+def read_lines(path):
+    with open(path) as file:
+        return file.read().splitlines()
+
+
+def paused(writer):
+    """Give the writer a thread that is not started yet, so its queue fills."""
+    writer.thread = threading.Thread(target=writer.run, daemon=True)
+    return writer
+
+
+class TestSaveWriter:
+    def test_writes_lines_in_order(self, tmp_path):
+        save, history = str(tmp_path / "save.ndjson"), str(tmp_path / "save_history.ndjson")
+        writer = SaveWriter(maxBatch=3)
+        for i in range(10):
+            assert writer.put(save, json.dumps([{"tick": i}]))
+        assert writer.put(history, [{"track_id": "a", "timestamp_ms": 1000}])
+        writer.stop()
+
+        assert [json.loads(line) for line in read_lines(save)] == [[{"tick": i}] for i in range(10)]
+        assert json.loads(read_lines(history)[0]) == [{"track_id": "a", "timestamp_ms": 1000}]
+        assert writer.stats() == {"queued": 0, "written": 11, "dropped": 0, "waited": 0}
+        assert writer.files == {}
+
+    def test_full_queue_drops_lines(self, tmp_path):
+        path = str(tmp_path / "save.ndjson")
+        writer = paused(SaveWriter(maxQueue=2))
+        assert [writer.put(path, str(i)) for i in range(4)] == [True, True, False, False]
+
+        writer.thread.start()
+        writer.stop()
+        assert read_lines(path) == ["0", "1"]
+        assert writer.stats()["dropped"] == 2
+
+    def test_full_queue_waits_before_dropping(self, tmp_path):
+        path = str(tmp_path / "save.ndjson")
+        writer = paused(SaveWriter(maxQueue=1, maxWait=0.05))
+        assert writer.put(path, "0")
+        assert not writer.put(path, "1")
+
+        writer.thread.start()
+        writer.stop()
+        assert writer.stats() == {"queued": 0, "written": 1, "dropped": 1, "waited": 1}
+
+    def test_write_errors_count_as_dropped(self, tmp_path):
+        writer = SaveWriter()
+        writer.put(str(tmp_path / "missing" / "save.ndjson"), "0")
+        writer.put(str(tmp_path / "save.ndjson"), {"bad": object()})
+        writer.stop()
+        assert writer.stats()["dropped"] == 2
@@ -0,0 +1,135 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
+
+import multiprocessing
+import threading
+
+import numpy as np
+from algorithm.track.ShardedTracker import ShardedTracker, _serve
+from algorithm.track.Track import TrackStatus
+from algorithm.track.Tracker import Tracker
+
+CONFIG = {"gating_euclidean_threshold_m": 1000.0, "measurement_noise_coeff": 10.0}
+SHARDS = {**CONFIG, "shard_cell_m": 10000.0, "shard_workers": 0}
+
+
+def targets(tick):
+    """ENU positions of targets spread over several cells, the first crossing e = 0."""
+    return np.array(
+        [
+            [-1000.0 + 150.0 * tick, 3000.0, 1000.0],
+            [25000.0, -12000.0 + 100.0 * tick, 2000.0],
+            [-34000.0, 41000.0, 3000.0],
+            [5000.0, 5000.0 - 120.0 * tick, 4000.0],
+        ]
+    )
+
+
+def run(tracker, start=0, stop=15):
+    for tick in range(start, stop):
+        radar = [{"lla_position": lla} for lla in tracker.frame.enu2lla(targets(tick)).tolist()]
+        adsb = [
+            {
+                "lla_position": tracker.frame.enu2lla([-20000.0 + 200.0 * tick, -20000.0, 6000.0]).tolist(),
+                "adsb_info": {"hex": "ABC123", "flight": "TEST01"},
+            }
+        ]
+        tracker.update_all_tracks(radar, 1000 * (tick + 1), adsb_detections_lla=adsb)
+    return tracker
+
+
+def by_position(tracker):
+    order = np.lexsort(tracker.means[:, :3].T)
+    return tracker.means[order], tracker.covars[order]
+
+
+class TestShardedTracker:
+    def test_matches_single_tracker(self):
+        single = run(Tracker(CONFIG))
+        sharded = run(ShardedTracker(SHARDS))
+
+        assert len(sharded.track_ids) == len(single.track_ids) == 5
+        for expected, actual in zip(by_position(single), by_position(sharded)):
+            np.testing.assert_allclose(actual, expected, atol=1e-6)
+        assert {track.status for track in sharded.active_tracks.values()} == {TrackStatus.CONFIRMED}
+        assert len(set(sharded.owner.values())) >= 4
+
+    def test_handover_keeps_track_id(self):
+        tracker = ShardedTracker(SHARDS)
+        run(tracker, stop=5)
+        row = int(np.argmin(np.linalg.norm(tracker.means[:, :3] - targets(4)[0], axis=1)))
+        track_id = tracker.track_ids[row]
+        assert tracker.owner[track_id] == (-1, 0)
+
+        run(tracker, start=5)
+        assert tracker.owner[track_id] == (0, 0)
+        track = tracker.active_tracks[track_id]
+        assert track.misses == 0
+        # history is kept across the handover
+        assert len(track.history) == 15
+        assert len(tracker.track_ids) == 5
+
+    def test_worker_processes(self):
+        tracker = ShardedTracker({**SHARDS, "shard_workers": 2})
+        try:
+            run(tracker)
+        finally:
+            tracker.shutdown()
+        expected = run(ShardedTracker(SHARDS))
+        for a, b in zip(by_position(tracker), by_position(expected)):
+            np.testing.assert_allclose(a, b, atol=1e-6)
+
+    def test_restore_hands_tracks_to_cells(self, tmp_path):
+        path = str(tmp_path / "tracker.npz")
+        run(Tracker(CONFIG), stop=5).save_checkpoint(path)
+
+        tracker = ShardedTracker(SHARDS)
+        assert tracker.restore_checkpoint(path, 5000) == 5
+        track_ids = set(tracker.track_ids)
+        radar = [{"lla_position": lla} for lla in tracker.frame.enu2lla(targets(5)).tolist()]
+        tracker.update_all_tracks(radar, 6000)
+
+        assert set(tracker.track_ids) == track_ids
+        radar_tracks = [track for track in tracker.active_tracks.values() if track.adsb_info is None]
+        assert [track.misses for track in radar_tracks] == [0] * 4
+
+    def test_failed_worker_is_replaced(self):
+        tracker = ShardedTracker({**SHARDS, "shard_workers": 2})
+        try:
+            run(tracker, stop=5)
+            track_ids = set(tracker.track_ids)
+            process, _ = tracker.workers[0]
+            process.kill()
+            process.join()
+
+            # the tick with the dead worker keeps the tracks as they were
+            run(tracker, start=5, stop=6)
+            assert tracker.workers is None
+            assert tracker.owner == {}
+            assert set(tracker.track_ids) == track_ids
+
+            # new workers take the tracks over on the next tick
+            run(tracker, start=6, stop=8)
+            assert set(tracker.track_ids) == track_ids
+            assert len(set(tracker.owner.values())) >= 4
+            assert all(track.misses == 0 for track in tracker.active_tracks.values())
+        finally:
+            tracker.shutdown()
+        assert tracker.workers is None
+
+    def test_worker_reports_errors(self):
+        parent, child = multiprocessing.Pipe()
+        worker = threading.Thread(target=_serve, args=(child, CONFIG))
+        worker.start()
+        parent.send((1000, {(0, 0): "not a command"}))
+        error = parent.recv()
+        assert isinstance(error, RuntimeError)
+        assert "AttributeError" in str(error)
+
+        # the worker keeps serving after an error
+        parent.send((2000, {}))
+        assert parent.recv() == {}
+        parent.send(None)
+        worker.join()
@@ -0,0 +1,33 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
+
+import numpy as np
+from algorithm.geometry.SpatialIndex import SpatialIndex
+
+
+class TestSpatialIndex:
+    def test_pairs_match_brute_force(self):
+        rng = np.random.default_rng(0)
+        points = rng.uniform(0, 10000, (300, 3))
+        queries = rng.uniform(0, 10000, (200, 3))
+
+        rows, columns, distance = SpatialIndex(points).pairs(queries, 1000)
+
+        brute = np.linalg.norm(points[:, None] - queries[None], axis=2)
+        expected = set(zip(*np.nonzero(brute <= 1000)))
+        assert set(zip(rows, columns)) == expected
+        np.testing.assert_allclose(distance, brute[rows, columns])
+
+    def test_within(self):
+        points = np.array([[0, 0, 0], [500, 0, 0], [5000, 0, 0]], dtype=float)
+        index = SpatialIndex(points)
+        assert sorted(index.within([100, 0, 0], 1000)) == [0, 1]
+        assert len(index.within([20000, 0, 0], 1000)) == 0
+
+    def test_empty(self):
+        index = SpatialIndex(np.zeros((0, 3)))
+        rows, columns, distance = index.pairs([[0, 0, 0]], 1000)
+        assert len(rows) == len(columns) == len(distance) == 0
+        assert len(index.within([0, 0, 0], 1000)) == 0
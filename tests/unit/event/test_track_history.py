@@ -0,0 +1,74 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
+
+import numpy as np
+from algorithm.track.Track import Track
+from algorithm.track.TrackHistory import TrackHistory
+
+
+class TestTrackHistory:
+    def test_ring_buffer_keeps_latest_in_order(self):
+        history = TrackHistory(3)
+        for i in range(5):
+            history.append(np.full(6, i), np.eye(6) * i, 1000 * i)
+
+        states, covars, timestamps = history.arrays()
+        assert len(history) == 3
+        np.testing.assert_array_equal(states[:, 0], [2, 3, 4])
+        np.testing.assert_array_equal(covars[:, 0, 0], [2, 3, 4])
+        np.testing.assert_array_equal(timestamps, [2000, 3000, 4000])
+        state, _, timestamp = history.latest()
+        assert state[0] == 4
+        assert timestamp == 4000
+
+    def test_evicted_entries_are_spilled(self):
+        spilled = []
+        history = TrackHistory(2, spill=lambda *entry: spilled.append(entry), key="t1")
+        for i in range(4):
+            history.append(np.full(6, i), np.eye(6), 1000 * i)
+
+        assert [(key, timestamp) for key, _, _, timestamp in spilled] == [
+            ("t1", 0.0),
+            ("t1", 1000.0),
+        ]
+        assert spilled[1][1][0] == 1
+
+    def test_track_memory_is_bounded(self):
+        Track.configure_history(4)
+        try:
+            track = Track()
+            for i in range(100):
+                track.update({"timestamp_ms": i}, i, np.full(6, float(i)), np.eye(6))
+
+            assert len(track.history) == 4
+            assert len(track.associated_detections_history) == 4
+            assert track.to_dict()["history_len"] == 4
+            assert track.history.latest()[0][0] == 99
+        finally:
+            Track.configure_history(50)
+
+    def test_storage_grows_to_capacity(self):
+        history = TrackHistory(10)
+        for i in range(7):
+            history.append(np.full(6, i), np.eye(6), i)
+        assert len(history.states) == 8
+        np.testing.assert_array_equal(history.arrays()[2], np.arange(7))
+
+        for i in range(7, 15):
+            history.append(np.full(6, i), np.eye(6), i)
+        assert len(history.states) == 10
+        np.testing.assert_array_equal(history.arrays()[2], np.arange(5, 15))
+
+    def test_stone_soup_adapter(self):
+        track = Track()
+        for i in range(3):
+            track.update({}, 1000 * (i + 1), np.full(6, float(i)), np.eye(6) * (i + 1))
+
+        exported = track.to_stone_soup()
+        assert exported.id == track.id
+        assert len(exported) == 3
+        np.testing.assert_array_equal(np.ravel(exported.state_vector), np.full(6, 2.0))
+        np.testing.assert_array_equal(exported.covar, np.eye(6) * 3)
+        assert (exported.states[1].timestamp - exported.states[0].timestamp).total_seconds() == 1
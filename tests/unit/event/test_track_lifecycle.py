@@ -5,55 +5,95 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
 
 
 import numpy as np
+import pytest
 from algorithm.track.Track import Track, TrackStatus
+from algorithm.track.Tracker import Tracker
+
+CONFIG = {"gating_euclidean_threshold_m": 1000.0, "measurement_noise_coeff": 10.0}
+
+
+def run(tracker, ticks, detect=True):
+    """Tick the tracker each second in ticks, detecting a target flying east at 100 m/s."""
+    for tick in ticks:
+        position = [100.0 * tick, 0.0, 3000.0]
+        detections = [{"lla_position": tracker.frame.enu2lla(position).tolist()}] if detect else []
+        tracker.update_all_tracks(detections, 1000 * (tick + 1))
 
 
 class TestTrackLifecycle:
     def test_track_states(self):
         """Test that tracks move through states correctly:
         TENTATIVE → CONFIRMED → COASTING → DELETED"""
+        tracker = Tracker(CONFIG)
+        run(tracker, range(3))
+        track = tracker.active_tracks[tracker.track_ids[0]]
 
-        # Create a tentative track
-        initial_detection = {
-            "timestamp_ms": 1000,
-            "lla_position": [-34.9286, 138.5999, 1000],
-        }
-        track = Track(
-            initial_detection=initial_detection,
-            timestamp_ms=1000,
-            status=TrackStatus.TENTATIVE,
-        )
-
-        # Initially tentative
-        assert track.status == TrackStatus.TENTATIVE
-        assert track.hits == 1
-        assert track.misses == 0
-
-        # Update track multiple times to confirm it
-        for i in range(3):
-            new_state = np.array(
-                [1000 + i * 10, 2000 + i * 10, 3000 + i * 10, 10, 10, 10]
-            )
-            new_covariance = np.eye(6) * 100
-            track.update(
-                detection={"timestamp_ms": 1000 + i * 1000, "test": True},
-                timestamp_ms=1000 + i * 1000,
-                new_state=new_state,
-                new_covariance=new_covariance,
-            )
-
-        # Should be confirmed after enough hits
+        # Confirmed after enough hits
         assert track.status == TrackStatus.CONFIRMED
-        assert track.hits >= 3
+        assert track.hits == 3
 
-        # Miss the track several times to make it coast
-        for _ in range(4):
-            track.increment_misses()
-            track.increment_age()
-
-        # Should be coasting after enough misses
+        # Coasting after more than max_misses_to_coast misses
+        run(tracker, range(3, 6), detect=False)
+        assert track.status == TrackStatus.CONFIRMED
+        run(tracker, range(6, 7), detect=False)
+        assert track.status == TrackStatus.COASTING
+        assert track.misses == 4
+
+        # Deleted after more than max_misses_to_delete misses
+        run(tracker, range(7, 9), detect=False)
+        assert track.status == TrackStatus.DELETED
+        assert tracker.track_ids == []
+        assert tracker.active_tracks == {}
+
+    def test_coasting_track_resumes(self):
+        tracker = Tracker(CONFIG)
+        run(tracker, range(3))
+        run(tracker, range(3, 7), detect=False)
+        track = tracker.active_tracks[tracker.track_ids[0]]
         assert track.status == TrackStatus.COASTING
-        assert track.misses > 3
+
+        run(tracker, range(7, 8))
+        assert track.status == TrackStatus.CONFIRMED
+        assert track.misses == 0
+        assert track.timestamp_update_ms == 8000
+
+    def test_slow_ticks_expire_by_time(self):
+        """A track unseen for longer than max_coast_s goes, however few ticks that took."""
+        tracker = Tracker({**CONFIG, "max_misses_to_delete": 100})
+        run(tracker, range(3))
+        run(tracker, [12], detect=False)
+        assert len(tracker.track_ids) == 1
+        run(tracker, [14], detect=False)
+        assert tracker.track_ids == []
+
+        # tentative tracks expire sooner
+        tracker = Tracker({**CONFIG, "min_hits_to_confirm": 5})
+        run(tracker, range(2))
+        run(tracker, [7], detect=False)
+        assert tracker.track_ids == []
+
+    def test_uncertain_tracks_are_deleted(self):
+        tracker = Tracker({**CONFIG, "max_position_trace_m2": 5000.0, "max_coast_s": None})
+        run(tracker, range(3))
+        run(tracker, range(3, 5), detect=False)
+        assert len(tracker.track_ids) == 1
+        assert np.trace(tracker.covars[0, :3, :3]) < 5000.0
+        run(tracker, range(5, 6), detect=False)
+        assert tracker.track_ids == []
+
+    def test_limits_can_be_disabled(self):
+        tracker = Tracker(
+            {
+                **CONFIG,
+                "max_misses_to_delete": 100,
+                "max_coast_s": None,
+                "max_position_trace_m2": None,
+            }
+        )
+        run(tracker, range(3))
+        run(tracker, [60], detect=False)
+        assert len(tracker.track_ids) == 1
+        assert tracker.active_tracks[tracker.track_ids[0]].status == TrackStatus.CONFIRMED
 
     def test_adsb_track_starts_confirmed(self):
         """Test that ADS-B tracks start as CONFIRMED"""
@@ -115,3 +155,10 @@ class TestTrackLifecycle:
 
         # Misses should increment
         assert track.misses == initial_misses + 1
+
+    def test_track_records_initial_detection(self):
+        track = Track(initial_detection={"timestamp_ms": 1000}, timestamp_ms=1000)
+        assert list(track.associated_detections_history) == [{"timestamp_ms": 1000}]
+        assert track.timestamp_update_ms == 1000
+        with pytest.raises(TypeError):
+            Track(timestamp=1000)
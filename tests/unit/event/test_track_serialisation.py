@@ -0,0 +1,66 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
+
+import json
+
+import numpy as np
+from algorithm.track.Track import Track, TrackStatus
+
+
+def make_tracks(n):
+    tracks = []
+    for i in range(n):
+        track = Track(adsb_info={"hex": f"{i:06x}"} if i % 2 else None)
+        track.record_state(
+            [1000.0 * i, -500.0 * i, 2000.0 + i, 10.0, -5.0, 0.5], np.eye(6), 1000
+        )
+        tracks.append(track)
+    return tracks
+
+
+class TestTrackSerialisation:
+    def test_serialise_all_matches_to_dict(self):
+        tracks = make_tracks(5)
+        batch = Track.serialise_all(tracks)
+
+        for track, serialised in zip(tracks, batch):
+            track.dirty = True
+            expected = track.to_dict()
+            assert serialised.keys() == expected.keys()
+            np.testing.assert_allclose(
+                serialised["current_state_vector"], expected["current_state_vector"]
+            )
+            lla = Track.frame.enu2lla(track.state_vector[:3])
+            np.testing.assert_allclose(serialised["current_state_vector"][:3], lla)
+            assert serialised["current_state_vector"][3:] == [10.0, -5.0, 0.5]
+
+    def test_cache_reused_until_track_changes(self):
+        track = make_tracks(1)[0]
+        first = track.to_dict()
+        assert track.to_dict() is first
+
+        track.increment_misses()
+        assert track.dirty
+        second = track.to_dict()
+        assert second is not first
+        assert second["misses"] == 1
+
+        track.status = TrackStatus.CONFIRMED
+        assert track.to_dict()["status"] == "CONFIRMED"
+
+    def test_only_dirty_tracks_are_rebuilt(self):
+        tracks = make_tracks(4)
+        before = Track.serialise_all(tracks)
+        tracks[2].update({}, 2000, np.zeros(6), np.eye(6))
+
+        after = Track.serialise_all(tracks)
+        assert [a is b for a, b in zip(after, before)] == [True, True, False, True]
+        assert after[2]["hits"] == 2
+
+    def test_encode_all_is_json_of_dicts(self):
+        tracks = [*make_tracks(3), Track()]
+        dicts = Track.serialise_all(tracks)
+        assert json.loads(Track.encode_all(tracks)) == json.loads(json.dumps(dicts))
+        assert dicts[-1]["current_state_vector"] is None
@@ -0,0 +1,83 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
+
+import numpy as np
+from algorithm.track.BatchKalman import BatchKalman
+from algorithm.track.Track import TrackStatus
+from algorithm.track.Tracker import Tracker
+
+CONFIG = {"gating_euclidean_threshold_m": 1000.0, "measurement_noise_coeff": 10.0}
+
+
+def run_tracker():
+    tracker = Tracker(CONFIG)
+    for tick in range(4):
+        enu = np.array([[0.0, 100.0 * tick, 1000.0], [5000.0, 0.0, 2000.0]])
+        radar = [{"lla_position": lla} for lla in tracker.frame.enu2lla(enu[:1]).tolist()]
+        adsb = [
+            {
+                "lla_position": tracker.frame.enu2lla(enu[1]).tolist(),
+                "adsb_info": {"hex": "ABC123", "flight": "TEST01"},
+            }
+        ]
+        tracker.update_all_tracks(radar, 1000 * (tick + 1), adsb_detections_lla=adsb)
+    return tracker
+
+
+class TestTrackerCheckpoint:
+    def test_restore_predicts_to_now(self, tmp_path):
+        path = str(tmp_path / "tracker.npz")
+        tracker = run_tracker()
+        tracker.save_checkpoint(path)
+        assert not os.path.exists(path + ".tmp")
+
+        restored = Tracker(CONFIG)
+        assert restored.restore_checkpoint(path, 6000) == 2
+
+        means, covars = BatchKalman(0.1).predict(tracker.means, tracker.covars, np.full(2, 2.0))
+        np.testing.assert_allclose(restored.means, means)
+        np.testing.assert_allclose(restored.covars, covars)
+        assert restored.track_ids == tracker.track_ids
+        assert restored.hex_index == tracker.hex_index
+        assert restored.last_timestamp_ms == 4000
+        for track_id, track in tracker.active_tracks.items():
+            copy = restored.active_tracks[track_id]
+            assert copy.status == track.status == TrackStatus.CONFIRMED
+            assert (copy.hits, copy.misses, copy.age_scans) == (track.hits, track.misses, track.age_scans)
+            assert copy.adsb_info == track.adsb_info
+            np.testing.assert_allclose(copy.state_vector, restored.means[restored.rows[track_id]])
+
+    def test_restored_tracks_keep_updating(self, tmp_path):
+        path = str(tmp_path / "tracker.npz")
+        run_tracker().save_checkpoint(path)
+        restored = Tracker(CONFIG)
+        restored.restore_checkpoint(path, 5000)
+
+        enu = np.array([[0.0, 400.0, 1000.0]])
+        tracks = restored.update_all_tracks(
+            [{"lla_position": restored.frame.enu2lla(enu[0]).tolist()}], 5000
+        )
+        radar = [track for track in tracks.values() if track.adsb_info is None]
+        assert len(radar) == 1
+        assert radar[0].hits == 5
+
+    def test_missing_or_stale_checkpoint_is_ignored(self, tmp_path):
+        path = str(tmp_path / "tracker.npz")
+        tracker = Tracker(CONFIG)
+        assert tracker.restore_checkpoint(path, 1000) == 0
+
+        run_tracker().save_checkpoint(path)
+        assert tracker.restore_checkpoint(path, 400000, max_age_s=60) == 0
+        assert tracker.active_tracks == {}
+
+    def test_downtime_does_not_expire_tracks(self, tmp_path):
+        path = str(tmp_path / "tracker.npz")
+        run_tracker().save_checkpoint(path)
+        restored = Tracker(CONFIG)
+        assert restored.restore_checkpoint(path, 64000) == 2
+
+        restored.update_all_tracks([], 65000)
+        assert len(restored.track_ids) == 2
+        np.testing.assert_allclose(restored.updated_s, 64.0)
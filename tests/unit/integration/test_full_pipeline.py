@@ -3,6 +3,7 @@ import sys
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../event"))
 
+import numpy as np
 from algorithm.track.Track import TrackStatus
 from algorithm.track.Tracker import Tracker
 
@@ -187,3 +188,55 @@ class TestFullPipeline:
             assert "status" in track_dict
             assert "hits" in track_dict
             assert "misses" in track_dict
+
+    def test_detection_covariance_and_gdop_gate(self):
+        """Localiser covariance becomes measurement noise, high GDOP is rejected"""
+        tracker = Tracker({"max_gdop": 10.0, "verbose": False})
+        covariance = [[400.0, 0, 0], [0, 900.0, 0], [0, 0, 2500.0]]
+        detections = [
+            {
+                "timestamp_ms": 1000,
+                "lla_position": [-34.9286, 138.5999, 1000],
+                "covariance": covariance,
+                "gdop": 2.0,
+            },
+            {
+                "timestamp_ms": 1000,
+                "lla_position": [-34.5, 138.0, 1000],
+                "gdop": 50.0,
+            },
+        ]
+
+        tracks = tracker.update_all_tracks(
+            all_localised_detections_lla=detections, current_timestamp_ms=1000
+        )
+
+        assert len(tracks) == 1
+        track = next(iter(tracks.values()))
+        # reference point is the detection, so no rotation is applied
+        assert abs(track.covariance_matrix[0, 0] - 400.0) < 1
+        assert abs(track.covariance_matrix[2, 2] - 2500.0) < 1
+
+    def test_update_weighted_by_detection_covariance(self):
+        """A precise detection pulls the track further than a vague one"""
+        start = [-34.9286, 138.5999, 1000]
+        moved = [-34.9286, 138.6021, 1000]  # about 200 m east
+        positions = {}
+        for variance in [1.0, 1e8]:
+            tracker = Tracker({"verbose": False})
+            tracker.update_all_tracks([{"lla_position": start}], 1000)
+            detection = {
+                "lla_position": moved,
+                "covariance": [[variance, 0, 0], [0, variance, 0], [0, 0, variance]],
+            }
+            tracks = tracker.update_all_tracks([detection], 2000)
+            assert len(tracks) == 1
+            track = next(iter(tracks.values()))
+            measured = tracker.frame.lla2enu(moved)
+            positions[variance] = (track, measured)
+
+        track, measured = positions[1.0]
+        assert np.linalg.norm(track.state_vector[:3].ravel() - measured) < 1
+        assert track.covariance_matrix[0, 0] < 1.1
+        track, measured = positions[1e8]
+        assert np.linalg.norm(track.state_vector[:3].ravel() - measured) > 150